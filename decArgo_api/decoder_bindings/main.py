@@ -1,13 +1,51 @@
 """Decoder Bindings."""
 
 import os
+import argparse
 import re
+import json
+import signal
+import asyncio
+import inspect
 import time
-import subprocess
+import tempfile
+import threading
+import xml.etree.ElementTree as ET
+from collections.abc import AsyncIterator, Awaitable, Callable, Iterable, Iterator
+from contextlib import suppress
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
 from pathlib import Path
+from typing import NamedTuple
 
 from pydantic import BaseModel, Field, field_validator
+from utilities.admission import AdmissionController, CostHistory, detect_limits
+from utilities.cache import ResultCache
+from utilities.compare import compare_trees
 from utilities.dict2json import save_info_meta_conf
+from utilities.fake_decoder import install_fake_decoder
+from utilities.process import BoundedOutput, ProcessControl, ProcessRun, run_monitored, signal_process_group
+from utilities.jobqueue import CoalescingQueue
+from utilities.locks import FloatLocks, FloatLockTimeout
+from utilities.manifest import OutputPublisher, PublishReport
+from utilities.netcdf import VOLATILE_VARIABLES
+from utilities.orchestrator import DEFAULT_IMAGE, DEFAULT_RUNTIME_VOLUME, ContainerOrchestrator
+from utilities.registry import FloatRegistry
+from utilities.reprocess import Ledger, ReprocessProgress, reprocess
+from utilities.rsynclog import RsyncLogHistory, parse_rsync_log
+from utilities.scheduler import LaneScheduler
+from utilities.staging import OutputStage, float_state_directories, wipe_float_outputs
+from utilities.state import InputState, Snapshot
+from utilities.timeouts import TimeoutPolicy
+from utilities.watcher import DropWatcher
+from utilities.xml_report import (
+    BatchSummary,
+    FloatReport,
+    RunReport,
+    parse_report,
+    report_file_name,
+    summarize_report_files,
+    summarize_reports,
+)
 from mock_data import info_dict, meta_dict, conf_dict  # Used for testing purposes only.
 
 
@@ -23,6 +61,72 @@ class WmoValidationError(ValueError):
     """Raised when WMO number is invalid."""
 
 
+# Valeur de FLOAT_TRANSMISSION_TYPE pour les flotteurs Argos (seul cas où le décodeur accepte 'floatwmolist')
+ARGOS_TRANSMISSION_TYPE = "1"
+
+
+# Modes de sortie : écriture directe, copie de travail échangée fichier par fichier, ou effacement préalable
+OUTPUT_MODES = ("in_place", "incremental", "full")
+
+
+# Callback de sortie : (nom du flux, ligne) ; peut être une coroutine
+OutputCallback = Callable[[str, str], Awaitable[None] | None]
+
+
+class DecodeResult(ProcessRun):
+    """Outcome of one decoder run: exit status, timing, resource usage and produced files."""
+
+    wmo: str | None = None
+    command: list[str] = Field(default_factory=list)
+    # Erreur de lancement (exécutable introuvable...)
+    error: str | None = None
+    netcdf_files: list[Path] = Field(default_factory=list)
+    # Zone privée du run (conf dérivée, log/csv/xml) et rapport XML attendu
+    work_directory: Path | None = None
+    report_file: Path | None = None
+    # Contenu du rapport XML, s'il a été écrit et est lisible
+    report: RunReport | None = None
+    # Aucun nouveau fichier d'entrée depuis le dernier décodage réussi : le décodeur n'a pas été lancé
+    skipped: bool = False
+    # Timeout appliqué au run (adaptatif ou fixe) et relance après un dépassement
+    timeout_seconds: float | None = None
+    relaunched: bool = False
+    # Sorties et rapport restaurés depuis le cache de résultats, sans lancer le décodeur
+    cached: bool = False
+    # Fichiers NetCDF nouveaux ou modifiés copiés dans l'arborescence de publication
+    published: list[Path] = Field(default_factory=list)
+
+    @property
+    def status(self) -> str:
+        """``ok``, ``skipped``, ``failed`` (non-zero exit), ``timeout``, ``memory_exceeded`` or ``error``."""
+        if self.skipped:
+            return "skipped"
+        if self.error is not None:
+            return "error"
+        if self.memory_exceeded:
+            return "memory_exceeded"
+        if self.timed_out:
+            return "timeout"
+        return "ok" if self.returncode == 0 else "failed"
+
+    @property
+    def ok(self) -> bool:
+        """True when the decoder exited with code 0, or had nothing new to decode."""
+        return self.status in ("ok", "skipped")
+
+
+class _RunPlan(NamedTuple):
+    """What the checks before a run decided (see ``Decoder._plan_run``)."""
+
+    # Empreinte des entrées, enregistrée après un run réussi
+    snapshot: Snapshot | None
+    # Listes rsync pas encore traitées par le décodeur (None : 'rsynclog all')
+    rsync_logs: tuple[Path, list[str]] | None
+    cache_key: str | None
+    # Sorties et état Iridium effacés avant le run (mode full, retraitement)
+    full: bool = False
+
+
 class DecoderConfiguration(BaseModel):
     """Configuration used to pass to the decoder, with validation applied."""
 
@@ -41,6 +145,11 @@ class DecoderConfiguration(BaseModel):
     # Options d’exécution
     timeout_seconds: int | None = Field(default=3600, ge=1)  # 1h par défaut
     check_wmo_format: bool = True
+    # Octets conservés (fin de flux) de stdout et de stderr dans le DecodeResult
+    max_captured_output: int = Field(default=64 * 1024, ge=0)
+    # Budget mémoire (RSS de tout l'arbre de process) au-delà duquel le run est arrêté
+    memory_budget_mb: int | None = Field(default=None, ge=1)
+    memory_sample_interval: float = Field(default=1.0, gt=0)
 
     @field_validator("input_files_directory", mode="before")
     @classmethod
@@ -99,17 +208,99 @@ class Decoder:
 
     _WMO_RE = re.compile(r"^\d{7}$")  # ex: '6902892'
 
+    # Délai laissé au décodeur entre SIGTERM et SIGKILL lors d'une annulation
+    _KILL_GRACE_SECONDS = 5.0
+    # Taille maximale d'une ligne lue sur stdout/stderr en mode asyncio
+    _STREAM_LINE_LIMIT = 1024 * 1024
+
+    # Répertoires de travail propres à chaque run (clé de conf -> sous-dossier)
+    _SCRATCH_DIRS = {
+        "DIR_OUTPUT_LOG_FILE": "log",
+        "DIR_OUTPUT_CSV_FILE": "csv",
+        "DIR_OUTPUT_XML_FILE": "xml",
+    }
+
     def __init__(
         self,
         decoder_conf_file: str | Path,
         decoder_executable: str | Path = None,
         matlab_runtime: str | Path = None,
-        input_files_directory: str | Path | None = Field(default=None),
-        output_files_directory: str | Path | None = Field(default=None),
+        input_files_directory: str | Path | None = None,
+        output_files_directory: str | Path | None = None,
         timeout_seconds: int | None = 3600,
         hold_after_run: int | None = None,
+        max_captured_output: int = 64 * 1024,
+        memory_budget_mb: int | None = None,
+        memory_sample_interval: float = 1.0,
+        state_directory: str | Path | None = None,
+        use_content_hash: bool = False,
+        archive_catalog: bool = False,
+        float_info_file: str | Path | None = None,
+        scratch_directory: str | Path | None = None,
+        lock_directory: str | Path | None = None,
+        cost_history_file: str | Path | None = None,
+        timeout_policy: TimeoutPolicy | None = None,
+        delta_rsync_logs: bool = False,
+        cache_directory: str | Path | None = None,
+        cache_max_mb: int | None = None,
+        cache_max_age_days: float | None = None,
+        publish_directory: str | Path | None = None,
+        manifest_directory: str | Path | None = None,
+        output_mode: str = "in_place",
     ):
-        """Initialise the bindings instance."""
+        """Initialise the bindings instance.
+
+        When ``state_directory`` is given, the input files of each successful run are
+        recorded there and later runs of the same float are skipped until its
+        ``DIR_INPUT_RSYNC_DATA/<imei>/`` directory changes (see :meth:`decode`).
+        With ``archive_catalog``, those input files are read from an SQLite catalog
+        of the archive kept in ``state_directory``, which lists a float directory
+        again only when its mtime changed.
+        ``float_info_file`` (``argo_floats_information_co.txt``) completes the
+        json_float_info files in :meth:`float_registry`.
+
+        Every run gets a private area under ``scratch_directory`` (a temporary
+        directory by default) holding a derived configuration file and its own
+        log/csv/xml directories, and writes a uniquely named XML report. Runs of
+        the same float are serialised by lock files in ``lock_directory``, shared
+        by every process of the node (``<tmp>/decoder_locks`` by default).
+
+        With a ``cost_history_file``, the peak RSS and duration of every run are
+        recorded there and :meth:`decode_many` admits floats by predicted memory.
+        A ``timeout_policy`` then replaces ``timeout_seconds`` by a timeout derived
+        from the durations of each float (``timeout_seconds`` stays the upper bound).
+
+        With ``delta_rsync_logs``, the rsync lists of ``DIR_INPUT_RSYNC_LOG/<imei>/``
+        not in the decoder history (``processed_rsync_log_<wmo>.txt`` under
+        ``IRIDIUM_DATA_DIRECTORY``) are checked before a run: without a new list,
+        or with only empty ones, it is skipped; a single new list is passed by name
+        instead of ``rsynclog all``.
+
+        With a ``cache_directory`` and the ``full`` output mode, the NetCDF tree,
+        Iridium state and report of every successful run are cached under the hash
+        of the float input files, the resolved configuration and the decoder
+        executables; a later run with the same hashes restores them instead of
+        launching the decoder (``result.cached``).
+        The cache is bounded by ``cache_max_mb`` and ``cache_max_age_days``.
+
+        With a ``publish_directory``, the NetCDF files of a successful run are hashed
+        (dates and history left out) and only the new and changed ones are copied
+        to ``<publish_directory>/<wmo>/`` (``result.published``); the manifests of
+        the published files are kept in ``manifest_directory``.
+
+        ``output_mode`` selects how a run treats the earlier outputs of the float:
+        ``in_place`` (the decoder updates them directly), ``incremental`` (they and
+        the Iridium buffers are kept; on a file system with reflinks the decoder
+        writes into a copy-on-write clone and only the new and changed files are
+        renamed over the live ones after a successful run, otherwise it writes in
+        place and the changed files are found by size and mtime; the Iridium state
+        of the float is put back after a failed run) or ``full``
+        (``nc/<wmo>`` and ``iridium/*<wmo>`` are deleted first, like
+        ``docker-decoder-linux.sh``, and the whole history is decoded again).
+        """
+        if output_mode not in OUTPUT_MODES:
+            raise ValueError(f"Unknown output mode '{output_mode}', expected one of {', '.join(OUTPUT_MODES)}.")
+        self.output_mode = output_mode
         self.config = DecoderConfiguration(
             input_files_directory=input_files_directory,
             output_files_directory=output_files_directory,
@@ -117,8 +308,35 @@ class Decoder:
             decoder_executable=decoder_executable,
             matlab_runtime=matlab_runtime,
             timeout_seconds=timeout_seconds,
+            max_captured_output=max_captured_output,
+            memory_budget_mb=memory_budget_mb,
+            memory_sample_interval=memory_sample_interval,
         )
         self.hold_after_run = hold_after_run
+        self.job_queue: CoalescingQueue | None = None
+        self.input_state = (
+            InputState(state_directory, use_content_hash, archive_catalog) if state_directory is not None else None
+        )
+        self.delta_rsync_logs = delta_rsync_logs
+        self.float_info_file = float_info_file
+        self._registry: FloatRegistry | None = None
+        self._registry_lock = threading.Lock()
+        self.scratch_directory = Path(scratch_directory) if scratch_directory is not None else None
+        self.float_locks = FloatLocks(lock_directory or Path(tempfile.gettempdir()) / "decoder_locks")
+        self.cost_history = CostHistory(cost_history_file) if cost_history_file is not None else None
+        self.timeout_policy = timeout_policy
+        self.result_cache = (
+            ResultCache(
+                cache_directory,
+                max_bytes=cache_max_mb * 1024 * 1024 if cache_max_mb is not None else None,
+                max_age=cache_max_age_days * 86400 if cache_max_age_days is not None else None,
+            )
+            if cache_directory is not None
+            else None
+        )
+        self.publisher = (
+            OutputPublisher(publish_directory, manifest_directory) if publish_directory is not None else None
+        )
 
     @staticmethod
     def _validate_wmo(wmonum: str):
@@ -127,37 +345,178 @@ class Decoder:
         if not Decoder._WMO_RE.match(wmonum):
             raise WmoValidationError(f"Invalid WMO '{wmonum}'. Expected 7 digits (e.g., '6902892').")
 
-    def _build_cmd(self, wmonum: str) -> list[str]:
+    def _build_cmd(
+        self,
+        wmonum: str,
+        conf_file: Path,
+        report_name: str,
+        overrides: dict[str, str] | None = None,
+        rsync_log: str = "all",
+    ) -> list[str]:
         cmd: list[str] = [
             str(self.config.decoder_executable),
             str(self.config.matlab_runtime),
             "rsynclog",
-            "all",
+            rsync_log,
             "configfile",
-            str(self.config.decoder_conf_file),
+            str(conf_file),
             "xmlreport",
-            "logfilexml.xml",
+            report_name,
             "floatwmo",
             wmonum,
             "PROCESS_REMAINING_BUFFERS",
             "1",
         ]
+        return cmd + self._without(self._io_args(), overrides) + self._override_args(overrides)
+
+    @staticmethod
+    def _without(args: list[str], overrides: dict[str, str] | None) -> list[str]:
+        # une surcharge remplace la paire nom/valeur de même nom
+        pairs = zip(args[::2], args[1::2], strict=True)
+        return [item for key, value in pairs if key not in (overrides or {}) for item in (key, value)]
+
+    def _build_list_cmd(
+        self,
+        float_list_file: Path,
+        conf_file: Path,
+        report_name: str,
+        overrides: dict[str, str] | None = None,
+    ) -> list[str]:
+        """Command decoding every float of ``float_list_file`` in one run (Argos 'redecode' mode)."""
+        cmd: list[str] = [
+            str(self.config.decoder_executable),
+            str(self.config.matlab_runtime),
+            "configfile",
+            str(conf_file),
+            "xmlreport",
+            report_name,
+            "processmode",
+            "redecode",
+            "floatwmolist",
+            str(float_list_file),
+        ]
+        return cmd + self._io_args() + self._override_args(overrides)
 
+    def _io_args(self) -> list[str]:
         # Si l’utilisateur veut imposer les chemins I/O, on ne les ajoute que s’ils sont tous deux fournis
-        if self.config.input_files_directory is not None:
-            if self.config.output_files_directory is None:
-                raise ValueError(
-                    "If 'input_files_directory' is provided, 'output_files_directory' must also be provided."
-                )
-            cmd.extend(
-                [
-                    "DIR_INPUT_RSYNC_DATA",
-                    str(self.config.input_files_directory),
-                    "DIR_OUTPUT_NETCDF_FILE",
-                    str(self.config.output_files_directory),
-                ]
+        if self.config.input_files_directory is None:
+            return []
+        if self.config.output_files_directory is None:
+            raise ValueError("If 'input_files_directory' is provided, 'output_files_directory' must also be provided.")
+        return [
+            "DIR_INPUT_RSYNC_DATA",
+            str(self.config.input_files_directory),
+            "DIR_OUTPUT_NETCDF_FILE",
+            str(self.config.output_files_directory),
+        ]
+
+    @staticmethod
+    def _override_args(overrides: dict[str, str] | None) -> list[str]:
+        # Surcharges de configuration (paires nom/valeur acceptées par le décodeur)
+        args: list[str] = []
+        for key, value in (overrides or {}).items():
+            args.extend([key, str(value)])
+        return args
+
+    def _read_decoder_conf(self) -> dict:
+        """Load the decoder JSON configuration file."""
+        with open(self.config.decoder_conf_file, encoding="utf-8") as f:
+            return json.load(f)
+
+    def _scratch_root(self) -> Path:
+        with self._registry_lock:
+            if self.scratch_directory is None:
+                self.scratch_directory = Path(tempfile.mkdtemp(prefix="decoder_runs_"))
+            return self.scratch_directory
+
+    def _prepare_run(self, name: str, scratch_root: Path | None = None) -> tuple[Path, Path, str]:
+        """Create the private area of one run.
+
+        Returns:
+            The area, its derived configuration file (log/csv/xml directories
+            pointing inside the area) and a report name unique to the run.
+        """
+        root = scratch_root or self._scratch_root()
+        root.mkdir(parents=True, exist_ok=True)
+        area = Path(tempfile.mkdtemp(prefix=f"{name}_", dir=root))
+        conf = self._read_decoder_conf()
+        for key, directory in self._SCRATCH_DIRS.items():
+            (area / directory).mkdir()
+            conf[key] = str(area / directory)
+        conf_file = area / "decoder_conf.json"
+        conf_file.write_text(json.dumps(conf, indent=4, ensure_ascii=False), encoding="utf-8")
+        # co041404_<horodatage>_<nom de la zone>.xml : accepté par le décodeur et unique
+        report_name = report_file_name(time.strftime("%Y%m%dT%H%M%SZ", time.gmtime()), area.name)
+        return area, conf_file, report_name
+
+    def start_job_queue(self, workers: int = 1) -> CoalescingQueue:
+        """Start the queue behind :meth:`submit`, running up to ``workers`` floats at the same time."""
+        self.stop_job_queue()
+        self.job_queue = CoalescingQueue(lambda wmonum, force: self._run(wmonum, force=force), workers=workers)
+        return self.job_queue
+
+    def stop_job_queue(self, wait: bool = True) -> None:
+        """Stop the job queue; with ``wait``, queued jobs are decoded first, otherwise cancelled."""
+        if self.job_queue is not None:
+            self.job_queue.close(wait=wait)
+            self.job_queue = None
+
+    def lane_scheduler(self, slots: int = 4, bulk_slots: int | None = None, preempt: bool = True) -> LaneScheduler:
+        """Scheduler with a real-time lane and a bulk lane running this decoder (see :class:`LaneScheduler`).
+
+        Bulk runs are paused while real-time runs wait for a slot; a bulk run is only
+        paused while its decoder process is running.
+        A real-time request for a float whose bulk run is paused resumes that run
+        instead of waiting for its float lock.
+        """
+
+        def handler(wmonum: str, force: bool, control: ProcessControl) -> DecodeResult:
+            if self.config.check_wmo_format:
+                self._validate_wmo(wmonum)
+            return self._run(wmonum, force=force, control=control)
+
+        return LaneScheduler(handler, slots=slots, bulk_slots=bulk_slots, preempt=preempt)
+
+    def submit(self, wmonum: str, force: bool = False) -> "Future[DecodeResult]":
+        """Queue a decoding of ``wmonum`` (see :class:`CoalescingQueue`).
+
+        A request for a float already waiting in the queue is merged with it; a request
+        for a float being decoded schedules a single follow-up run. A one-worker queue
+        is started on first use.
+        """
+        if self.config.check_wmo_format:
+            self._validate_wmo(wmonum)
+        if self.job_queue is None:
+            self.start_job_queue()
+        return self.job_queue.submit(wmonum, force)
+
+    def watch(
+        self, workers: int = 1, debounce: float = 2.0, poll_interval: float = 5.0, use_inotify: bool = True
+    ) -> DropWatcher:
+        """Queue a decoding (:meth:`submit`) of every float that receives new rsync files.
+
+        ``DIR_INPUT_RSYNC_LOG`` and ``DIR_INPUT_RSYNC_DATA`` (or ``input_files_directory``)
+        are watched with inotify, or scanned every ``poll_interval`` seconds without it;
+        the IMEI/PTT directory of a float is mapped to its WMO by :meth:`float_registry`.
+        With a ``state_directory``, floats whose input files did not change are skipped.
+
+        Returns:
+            The started watcher; call ``stop()`` on it, then :meth:`stop_job_queue`.
+        """
+        conf = self._read_decoder_conf()
+        roots = [
+            root
+            for root in (
+                conf.get("DIR_INPUT_RSYNC_LOG"),
+                self.config.input_files_directory or conf.get("DIR_INPUT_RSYNC_DATA"),
             )
-        return cmd
+            if root
+        ]
+        if not roots:
+            raise ExecutionError("Neither DIR_INPUT_RSYNC_LOG nor DIR_INPUT_RSYNC_DATA is configured.")
+        self.start_job_queue(workers)
+        registry = self.float_registry()
+        return DropWatcher(roots, registry.wmo, self.submit, debounce, poll_interval, use_inotify).start()
 
     def _post_run_hold(self) -> None:
         """Remplace la boucle infinie par un hold optionnel et contrôlable."""
@@ -170,37 +529,862 @@ class Decoder:
         while True:
             time.sleep(60)
 
-    def decode(
+    def _run(
         self,
         wmonum: str,
-    ) -> subprocess.CompletedProcess[str]:
-        """Run the Coriolis Decoder."""
-        if self.config.check_wmo_format:
-            self._validate_wmo(wmonum)
+        scratch_root: Path | None = None,
+        force: bool = False,
+        control: ProcessControl | None = None,
+        full: bool = False,
+    ) -> DecodeResult:
+        """Launch the decoder once for ``wmonum``, under its float lock, and wait for it to finish.
+
+        ``full`` wipes the outputs of the float first, whatever ``output_mode``.
+        """
+        try:
+            with self.float_locks.hold([wmonum], timeout=self.config.timeout_seconds):
+                plan = self._plan_run(wmonum, force, full)
+                if isinstance(plan, DecodeResult):
+                    return plan
+                result = self._from_cache(wmonum, plan.cache_key, scratch_root)
+                if result is None:
+                    result = self._attempt_with_relaunch(wmonum, scratch_root, control, plan)
+                self._finish_run(wmonum, plan, result)
+                return result
+        except FloatLockTimeout as e:
+            print(e)
+            return DecodeResult(wmo=wmonum, error=str(e))
+
+    def _plan_run(self, wmonum: str, force: bool, full: bool = False) -> _RunPlan | DecodeResult:
+        """Checks before a run of ``wmonum``: a skipped result, or what the run needs."""
+        snapshot = self._input_snapshot(wmonum)
+        if not force and self._inputs_unchanged(wmonum, snapshot):
+            return DecodeResult(wmo=wmonum, skipped=True)
+        logs = self._pending_rsync_logs(wmonum)
+        if not force and logs is not None and not self._has_new_rsync_files(wmonum, *logs):
+            return DecodeResult(wmo=wmonum, skipped=True)
+        full = full or self.output_mode == "full"
+        # forcé : 'rsynclog all', le décodeur écarte lui-même les listes de son historique ;
+        # mode full : l'historique est effacé avant le run, toutes les listes sont à reprendre
+        rsync_logs = None if force or full else logs
+        # seul un run parti de zéro a des sorties qui ne dépendent que de la clé
+        cache_key = self._cache_key(wmonum) if full else None
+        return _RunPlan(snapshot, rsync_logs, cache_key, full)
+
+    def _finish_run(self, wmonum: str, plan: _RunPlan, result: DecodeResult) -> None:
+        """Steps after a run (or a cache hit) of ``wmonum``: cache, input state, costs, publishing."""
+        if not result.cached:
+            self._store_in_cache(wmonum, plan.cache_key, result)
+        self._record_inputs(wmonum, plan.snapshot, result)
+        self._record_cost(wmonum, result)
+        self._publish(wmonum, result)
+
+    def _attempt_with_relaunch(
+        self,
+        wmonum: str,
+        scratch_root: Path | None,
+        control: ProcessControl | None,
+        plan: _RunPlan,
+    ) -> DecodeResult:
+        """Run the decoder with the timeout of ``wmonum``, and once more with the flat one if allowed."""
+        timeout = self._timeout_for(wmonum)
+        result = self._attempt(wmonum, scratch_root, control, timeout, plan)
+        if result.timed_out and self._relaunch_allowed(timeout):
+            print(f"{wmonum} went over its adaptive timeout ({timeout:.0f}s), relaunching it")
+            result = self._attempt(wmonum, scratch_root, control, self.config.timeout_seconds, plan)
+            result.relaunched = True
+        return result
+
+    def _attempt(
+        self,
+        wmonum: str,
+        scratch_root: Path | None,
+        control: ProcessControl | None,
+        timeout: float | None,
+        plan: _RunPlan,
+    ) -> DecodeResult:
+        """One decoder run of ``wmonum`` in a fresh scratch area, as decided by ``plan``."""
+        cmd, area, report_name, stage = self._begin_attempt(wmonum, scratch_root, plan)
+        try:
+            result = self._execute(
+                cmd, wmonum, work_directory=area, report_name=report_name, control=control, timeout=timeout
+            )
+            if stage is not None and result.status == "ok":
+                self._commit_stage(stage, result)
+        finally:
+            if stage is not None:
+                stage.discard()
+        return result
+
+    def _begin_attempt(
+        self, wmonum: str, scratch_root: Path | None, plan: _RunPlan
+    ) -> tuple[list[str], Path, str, OutputStage | None]:
+        """Scratch area, rsync lists and output mode of one run; returns its command, area, report and stage."""
+        area, conf_file, report_name = self._prepare_run(wmonum, scratch_root)
+        if plan.full:
+            self._wipe_outputs(wmonum)
+        stage = self._output_stage(wmonum) if not plan.full else None
+        overrides = self._stage_overrides(stage) if stage is not None else None
+        rsync_log = self._rsync_log_argument(plan.rsync_logs)
+        return self._build_cmd(wmonum, conf_file, report_name, overrides, rsync_log=rsync_log), area, report_name, stage
+
+    # -- modes de sortie ----------------------------------------------------
+
+    def _iridium_data_directory(self) -> Path | None:
+        try:
+            iridium = self._read_decoder_conf().get("IRIDIUM_DATA_DIRECTORY")
+        except (OSError, ValueError):
+            return None
+        return Path(iridium) if iridium else None
+
+    def _iridium_float_directories(self, wmonum: str) -> list[Path]:
+        """``IRIDIUM_DATA_DIRECTORY/<imei>_<wmo>`` (buffers, history) of ``wmonum``."""
+        root = self._iridium_data_directory()
+        return float_state_directories(root, wmonum) if root is not None else []
+
+    def _wipe_outputs(self, wmonum: str) -> None:
+        deleted = wipe_float_outputs(self._netcdf_output_directory(), self._iridium_data_directory(), wmonum)
+        if deleted:
+            print(f"Full decoding of {wmonum}: deleted {', '.join(map(str, deleted))}")
+
+    def _output_stage(self, wmonum: str) -> OutputStage | None:
+        """Stage of the outputs of ``wmonum`` in incremental mode (a clone, or the live tree without reflinks)."""
+        root = self._netcdf_output_directory()
+        if self.output_mode != "incremental" or root is None:
+            return None
+        # buffers et historique des listes rsync : remis en état si le run échoue
+        stage = OutputStage(root, wmonum, self._iridium_data_directory())
+        try:
+            stage.prepare()
+        except OSError:
+            stage.discard()
+            raise
+        return stage
+
+    def _stage_overrides(self, stage: OutputStage) -> dict[str, str]:
+        overrides = {"DIR_OUTPUT_NETCDF_FILE": str(stage.directory)}
+        try:
+            traj = self._read_decoder_conf().get("DIR_OUTPUT_NETCDF_TRAJ_3_2_FILE")
+        except (OSError, ValueError):
+            traj = None
+        # trajectoires 3.2 écrites avec les autres fichiers : elles passent aussi par la copie de travail
+        if traj and Path(traj).resolve() == stage.root.resolve():
+            overrides["DIR_OUTPUT_NETCDF_TRAJ_3_2_FILE"] = str(stage.directory)
+        return overrides
+
+    @staticmethod
+    def _commit_stage(stage: OutputStage, result: DecodeResult) -> None:
+        report = stage.commit()
+        result.netcdf_files = [stage.live / name for name in report.published]
+        print(
+            f"{stage.wmonum}: {len(report.new)} new, {len(report.changed)} changed, "
+            f"{report.unchanged} unchanged, {len(report.removed)} removed NetCDF file(s)"
+        )
+
+    def _timeout_for(self, wmonum: str) -> float | None:
+        """Timeout of the next run of ``wmonum``: adaptive with a policy and a history, flat otherwise."""
+        if self.timeout_policy is None or self.cost_history is None:
+            return self.config.timeout_seconds
+        return self.timeout_policy.timeout_for(self.cost_history.durations(wmonum), self.config.timeout_seconds)
+
+    def _relaunch_allowed(self, timeout: float | None) -> bool:
+        # une relance n'a de sens que si le premier run avait un timeout plus court que le timeout fixe
+        return (
+            self.timeout_policy is not None
+            and self.timeout_policy.relaunch
+            and timeout is not None
+            and (self.config.timeout_seconds is None or timeout < self.config.timeout_seconds)
+        )
+
+    def float_registry(self) -> FloatRegistry:
+        """WMO/PTT registry built from the decoder json_float_info directory (loaded once, then refreshed)."""
+        with self._registry_lock:
+            if self._registry is None:
+                try:
+                    info_directory = self._read_decoder_conf().get("DIR_INPUT_JSON_FLOAT_DECODING_PARAMETERS_FILE")
+                except (OSError, ValueError):
+                    info_directory = None
+                self._registry = FloatRegistry(info_directory or None, self.float_info_file)
+            return self._registry
+
+    def _float_directory(self, wmonum: str, conf_key: str, root: Path | None = None) -> Path | None:
+        """``<root>/<imei>/`` of ``wmonum``, ``root`` defaulting to the ``conf_key`` directory."""
+        try:
+            root = root or self._read_decoder_conf().get(conf_key)
+        except (OSError, ValueError):
+            return None
+        imei = self.float_registry().ptt(wmonum)
+        if not root or not imei or not (Path(root) / imei).is_dir():
+            return None
+        return Path(root) / imei
+
+    def _float_input_directory(self, wmonum: str) -> Path | None:
+        """``DIR_INPUT_RSYNC_DATA/<imei>/`` of ``wmonum``."""
+        return self._float_directory(wmonum, "DIR_INPUT_RSYNC_DATA", self.config.input_files_directory)
+
+    def _pending_rsync_logs(self, wmonum: str) -> tuple[Path, list[str]] | None:
+        """``DIR_INPUT_RSYNC_LOG/<imei>/`` and its lists not processed by the decoder; None when not tracked."""
+        if not self.delta_rsync_logs:
+            return None
+        directory = self._float_directory(wmonum, "DIR_INPUT_RSYNC_LOG")
+        try:
+            iridium = self._read_decoder_conf().get("IRIDIUM_DATA_DIRECTORY")
+        except (OSError, ValueError):
+            iridium = None
+        if directory is None or not iridium:
+            return None
+        try:
+            return directory, RsyncLogHistory(iridium).new_logs(wmonum, directory.name, directory)
+        except OSError as e:
+            print(f"Cannot read the rsync list history of {wmonum}: {e}")
+            return None
+
+    @staticmethod
+    def _has_new_rsync_files(wmonum: str, directory: Path, names: list[str]) -> bool:
+        # listes vides (session rsync sans transfert) : rien à décoder ; le décodeur les
+        # inscrira dans son historique au prochain run
+        if any(parse_rsync_log(directory / name) for name in names):
+            return True
+        print(f"No new rsync file for {wmonum}, decoding skipped")
+        return False
+
+    @staticmethod
+    def _rsync_log_argument(rsync_logs: tuple[Path, list[str]] | None) -> str:
+        """``rsynclog`` value: the name of the only new list, 'all' otherwise.
+
+        With 'all', the decoder leaves out by itself the lists of its history, so
+        the lists are always read from the real ``DIR_INPUT_RSYNC_LOG`` and the
+        history keeps their real paths.
+        """
+        if rsync_logs is not None and len(rsync_logs[1]) == 1:
+            return rsync_logs[1][0]
+        return "all"
+
+    def _input_snapshot(self, wmonum: str) -> Snapshot | None:
+        """Fingerprint of the float input files, or None when it cannot be taken (incremental mode off...)."""
+        if self.input_state is None:
+            return None
+        directory = self._float_input_directory(wmonum)
+        if directory is None:
+            return None
+        try:
+            return self.input_state.snapshot(directory)
+        except OSError as e:
+            print(f"Cannot list the input files of {wmonum}: {e}")
+            return None
+
+    def _inputs_unchanged(self, wmonum: str, snapshot: Snapshot | None) -> bool:
+        if snapshot is None or not self.input_state.unchanged(wmonum, snapshot):
+            return False
+        print(f"No new input file for {wmonum}, decoding skipped")
+        return True
+
+    def _record_inputs(self, wmonum: str, snapshot: Snapshot | None, result: DecodeResult) -> None:
+        # Empreinte prise avant le run : un fichier arrivé pendant le décodage déclenchera le suivant
+        if snapshot is not None and result.ok:
+            self.input_state.save(wmonum, snapshot)
+
+    # -- cache de résultats -------------------------------------------------
+
+    def _cache_inputs(self, wmonum: str, conf: dict) -> dict[str, Path]:
+        """Input files of ``wmonum`` (rsync data and lists, json info and meta), by a run-independent name."""
+        files: dict[str, Path] = {}
+        for key, root in (
+            ("DIR_INPUT_RSYNC_DATA", self.config.input_files_directory),
+            ("DIR_INPUT_RSYNC_LOG", None),
+        ):
+            directory = self._float_directory(wmonum, key, root)
+            if directory is not None:
+                files.update({f"{key}/{p.relative_to(directory)}": p for p in directory.rglob("*") if p.is_file()})
+        if not files:
+            return files
+        for key in ("DIR_INPUT_JSON_FLOAT_DECODING_PARAMETERS_FILE", "DIR_INPUT_JSON_FLOAT_META_DATA_FILE"):
+            if conf.get(key) and Path(conf[key]).is_dir():
+                files.update({f"{key}/{p.name}": p for p in Path(conf[key]).glob(f"{wmonum}_*.json")})
+        return files
+
+    # répertoires de référence communs à tous les flotteurs (libellés des paramètres, listes DM)
+    _REFERENCE_DIRS = (
+        "DIR_INPUT_JSON_TECH_LABEL_FILE",
+        "DIR_INPUT_JSON_CONF_LABEL_FILE",
+        "DIR_INPUT_DM_BUFFER_LIST",
+    )
+
+    def _cache_references(self, conf: dict) -> dict[str, Path]:
+        """Reference files the configuration points to (label JSON files, DM lists, GEBCO, grey list, WOA...)."""
+        files: dict[str, Path] = {}
+        for key in self._REFERENCE_DIRS:
+            if conf.get(key) and Path(conf[key]).is_dir():
+                directory = Path(conf[key])
+                files.update({f"{key}/{p.relative_to(directory)}": p for p in directory.rglob("*") if p.is_file()})
+        for key, value in conf.items():
+            if (
+                key.endswith("_FILE")
+                and not key.startswith("DIR_")
+                and isinstance(value, str)
+                and Path(value).is_file()
+            ):
+                files[key] = Path(value)
+        return files
+
+    def _decoder_executables(self) -> list[Path]:
+        # le script lance le binaire compilé posé à côté de lui
+        executable = Path(self.config.decoder_executable)
+        binary = executable.parent / "decode_argo_2_nc_rt"
+        return [executable, binary] if binary.is_file() and binary != executable else [executable]
+
+    def _cache_key(self, wmonum: str) -> str | None:
+        """Cache key of a full run of ``wmonum``; None without cache or with unknown inputs."""
+        if self.result_cache is None:
+            return None
+        try:
+            conf = self._read_decoder_conf()
+            inputs = self._cache_inputs(wmonum, conf)
+            if not inputs:
+                return None
+            inputs.update(self._cache_references(conf))
+            resolved = {k: v for k, v in conf.items() if k not in self._SCRATCH_DIRS}
+            io_args = self._io_args()
+            resolved.update(zip(io_args[::2], io_args[1::2], strict=True))
+            return self.result_cache.key(wmonum, inputs, resolved, self._decoder_executables())
+        except (OSError, ValueError) as e:
+            print(f"No cache key for {wmonum}: {e}")
+            return None
+
+    def _from_cache(self, wmonum: str, cache_key: str | None, scratch_root: Path | None) -> DecodeResult | None:
+        entry = self.result_cache.lookup(cache_key) if cache_key is not None else None
+        output_root = self._netcdf_output_directory()
+        if entry is None or output_root is None:
+            return None
+        started = time.monotonic()
+        area, _, report_name = self._prepare_run(wmonum, scratch_root)
+        report_file = area / "xml" / report_name
+        # comme le run remplacé : sorties et buffers Iridium effacés, puis ceux du run en cache
+        self._wipe_outputs(wmonum)
+        try:
+            files = self.result_cache.restore(entry, output_root, report_file, self._iridium_data_directory())
+        except (OSError, ValueError) as e:
+            print(f"Cannot restore {wmonum} from the result cache: {e}")
+            return None
+        print(f"{wmonum}: {len(files)} NetCDF file(s) restored from the result cache")
+        return DecodeResult(
+            wmo=wmonum,
+            returncode=0,
+            cached=True,
+            wall_time=time.monotonic() - started,
+            netcdf_files=files,
+            work_directory=area,
+            report_file=report_file,
+            report=self._read_report(report_file),
+        )
+
+    def _store_in_cache(self, wmonum: str, cache_key: str | None, result: DecodeResult) -> None:
+        output_root = self._netcdf_output_directory()
+        if cache_key is None or output_root is None or result.status != "ok":
+            return
+        # un rapport 'nok' (erreur de décodage, exception MATLAB) n'est pas mis en cache
+        if result.report is None or result.report.status != "ok":
+            return
+        # arborescence complète du flotteur et état du décodeur, pas seulement les fichiers du run
+        files = [p for p in (output_root / wmonum).rglob("*") if p.is_file()]
+        state_root = self._iridium_data_directory()
+        state_files = [p for d in self._iridium_float_directories(wmonum) for p in d.rglob("*") if p.is_file()]
+        try:
+            self.result_cache.store(cache_key, wmonum, output_root, files, result.report_file, state_root, state_files)
+        except (OSError, ValueError) as e:
+            print(f"Cannot cache the outputs of {wmonum}: {e}")
 
-        cmd = self._build_cmd(wmonum)
+    def _publish(self, wmonum: str, result: DecodeResult) -> PublishReport | None:
+        """Publish the new and changed NetCDF files of a successful run."""
+        output_root = self._netcdf_output_directory()
+        if self.publisher is None or output_root is None or result.status != "ok":
+            return None
         try:
-            print(cmd)
-            result = subprocess.run(
+            report = self.publisher.publish(wmonum, output_root / wmonum)
+        except (OSError, ValueError) as e:
+            print(f"Cannot publish the outputs of {wmonum}: {e}")
+            return None
+        target = self.publisher.destination / wmonum
+        result.published = [target / name for name in report.published]
+        print(f"{wmonum}: {len(report.published)} NetCDF file(s) published, {report.unchanged} unchanged")
+        return report
+
+    def _record_cost(self, wmonum: str, result: DecodeResult) -> None:
+        if self.cost_history is None or result.returncode is None or result.cached:
+            return
+        # la durée d'un run tué par le timeout n'est qu'une borne inférieure
+        duration = None if result.timed_out else result.wall_time
+        self.cost_history.record(wmonum, result.peak_tree_rss_kb or result.peak_rss_kb, duration)
+
+    def _execute(
+        self,
+        cmd: list[str],
+        wmonum: str | None = None,
+        work_directory: Path | None = None,
+        report_name: str | None = None,
+        control: ProcessControl | None = None,
+        timeout: float | None = None,
+    ) -> DecodeResult:
+        print(cmd)
+        timeout = timeout or self.config.timeout_seconds
+        context = {
+            "wmo": wmonum,
+            "command": cmd,
+            "work_directory": work_directory,
+            "report_file": work_directory / "xml" / report_name if work_directory and report_name else None,
+            "timeout_seconds": timeout,
+        }
+        started = time.time()
+        try:
+            run = run_monitored(
                 cmd,
                 env=os.environ.copy(),
-                check=True,
-                text=True,
-                timeout=self.config.timeout_seconds,
+                timeout=timeout,
+                max_output_bytes=self.config.max_captured_output,
+                poll_interval=self.config.memory_sample_interval,
+                memory_budget_kb=self._memory_budget_kb(),
+                control=control,
             )
-        except subprocess.CalledProcessError as e:
-            print("Command failed with return code:", e.returncode)
-            print("STDERR:", e.stderr)
-        except FileNotFoundError:
-            print("Invalid command")
+        except OSError as e:
+            print("Invalid command:", e)
+            return DecodeResult(error=str(e), **context)
+
+        result = DecodeResult(
+            **context,
+            netcdf_files=self._produced_netcdf_files(wmonum, started) if wmonum else [],
+            report=self._read_report(context["report_file"]),
+            **run.model_dump(),
+        )
+        if result.ok:
+            print(f"Decoding ran in {result.wall_time:.1f}s, {len(result.netcdf_files)} NetCDF file(s)")
         else:
-            print("Decoding ran:", result)
+            print(f"Decoding {result.status}, return code: {result.returncode}")
+            if result.memory_exceeded:
+                print(f"Process tree went over {self.config.memory_budget_mb} MB (peak {result.peak_tree_rss_kb} kB)")
+            if result.stderr:
+                print("STDERR:", result.stderr)
+        return result
+
+    @staticmethod
+    def _read_report(report_file: Path | None) -> RunReport | None:
+        if report_file is None or not report_file.is_file():
+            return None
+        try:
+            return parse_report(report_file)
+        except ET.ParseError as e:
+            print(f"Unreadable XML report {report_file}: {e}")
+            return None
+
+    def _memory_budget_kb(self) -> int | None:
+        if self.config.memory_budget_mb is None:
+            return None
+        return self.config.memory_budget_mb * 1024
+
+    def _netcdf_output_directory(self) -> Path | None:
+        """Root directory of the NetCDF outputs (per-WMO sub-directories)."""
+        if self.config.output_files_directory is not None:
+            return self.config.output_files_directory
+        try:
+            directory = self._read_decoder_conf().get("DIR_OUTPUT_NETCDF_FILE")
+        except (OSError, ValueError):
+            return None
+        return Path(directory) if directory else None
+
+    def _produced_netcdf_files(self, wmonum: str, since: float) -> list[Path]:
+        """NetCDF files of ``wmonum`` written since ``since`` (epoch seconds)."""
+        root = self._netcdf_output_directory()
+        if root is None or not (root / wmonum).is_dir():
+            return []
+        # marge d'une seconde pour les systèmes de fichiers à horodatage grossier
+        return sorted(p for p in (root / wmonum).rglob("*.nc") if p.stat().st_mtime >= since - 1)
+
+    def decode(
+        self,
+        wmonum: str,
+        force: bool = False,
+    ) -> DecodeResult:
+        """Run the Coriolis Decoder.
+
+        With a ``state_directory``, the run is skipped (status ``skipped``) when the
+        float input files are the same as at its last successful decoding; ``force``
+        bypasses that check.
+        """
+        if self.config.check_wmo_format:
+            self._validate_wmo(wmonum)
+
+        result = self._run(wmonum, force=force)
 
         # << remplace `while True: pass`
         self._post_run_hold()
+        return result
+
+    def decode_many(
+        self,
+        wmonums: Iterable[str],
+        max_workers: int | None = None,
+        scratch_directory: str | Path | None = None,
+        force: bool = False,
+        batch_memory_mb: int | None = None,
+        full: bool = False,
+    ) -> Iterator[tuple[str, DecodeResult]]:
+        """Decode several floats concurrently.
 
+        Each run gets its own private area under ``scratch_directory`` (the decoder
+        scratch directory by default) and holds its float lock; NetCDF outputs already
+        land in a per-WMO sub-directory. Every worker thread drives its own decoder
+        process, so wall time scales with ``max_workers`` (by default the CPU quota of
+        the cgroup, or the CPUs of the host).
 
-if __name__ == "__main__":  # pragma: no cover
+        With a ``cost_history_file``, floats are admitted so that the sum of their
+        predicted peak RSS stays under ``batch_memory_mb`` (by default 90 % of the
+        cgroup memory limit, or of the host available memory): the largest start
+        first and smaller ones fill the memory left.
+
+        Args:
+            wmonums: WMO numbers to decode; duplicates are decoded once.
+            max_workers: Number of decoder processes running at the same time.
+            scratch_directory: Root directory of the per-run scratch areas.
+            force: Decode floats whose input files did not change (see :meth:`decode`).
+            batch_memory_mb: Memory the runs of the batch may use together.
+            full: Delete the outputs and Iridium state of each float first, as in the ``full``
+                output mode, so that its whole history is decoded again.
+
+        Yields:
+            ``(wmo, result)`` pairs, in completion order.
+        """
+        wmos = list(dict.fromkeys(wmonums))
+        if self.config.check_wmo_format:
+            for wmonum in wmos:
+                self._validate_wmo(wmonum)
+        if not wmos:
+            return
+
+        scratch_root = Path(scratch_directory) if scratch_directory is not None else None
+        limits = detect_limits()
+        workers = max_workers or limits.cpu_slots
+
+        pool = ThreadPoolExecutor(max_workers=min(workers, len(wmos)), thread_name_prefix="decoder")
+        try:
+            if self.cost_history is not None:
+                budget_kb = batch_memory_mb * 1024 if batch_memory_mb is not None else limits.memory_budget_kb()
+                admission = AdmissionController(budget_kb, slots=workers)
+                costs = [self.cost_history.estimate(wmonum) for wmonum in wmos]
+                runs = admission.run(pool, costs, lambda wmonum: self._run(wmonum, scratch_root, force, full=full))
+            else:
+                futures = {pool.submit(self._run, wmonum, scratch_root, force, full=full): wmonum for wmonum in wmos}
+                runs = ((futures[future], future) for future in as_completed(futures))
+            for wmonum, future in runs:
+                yield wmonum, future.result()
+        finally:
+            # Si l'appelant abandonne l'itération, on n'attend pas les runs pas encore démarrés
+            pool.shutdown(wait=True, cancel_futures=True)
+
+        self._post_run_hold()
+
+    def decode_chunks(
+        self,
+        wmonums: Iterable[str],
+        chunk_size: int = 20,
+        max_workers: int | None = None,
+        scratch_directory: str | Path | None = None,
+    ) -> Iterator[tuple[str, FloatReport]]:
+        """Decode floats by chunks, one decoder run per chunk, and split the outcome per float.
+
+        Each chunk is written to a temporary float list file passed with ``floatwmolist``,
+        so the runtime starts and the configuration is loaded once per chunk. The decoder
+        only accepts a float list in Argos ``redecode`` mode: for Iridium configurations
+        (``FLOAT_TRANSMISSION_TYPE`` other than 1) every float still needs its own run and
+        this falls back to :meth:`decode_many`.
+
+        Args:
+            wmonums: WMO numbers to decode; duplicates are decoded once.
+            chunk_size: Maximum number of floats per decoder run.
+            max_workers: Number of chunks decoded at the same time.
+            scratch_directory: Root directory of the float lists and per-chunk scratch areas.
+
+        Yields:
+            ``(wmo, report)`` pairs, chunk by chunk in completion order.
+        """
+        if chunk_size < 1:
+            raise ValueError("chunk_size must be at least 1.")
+        wmos = list(dict.fromkeys(wmonums))
+        if self.config.check_wmo_format:
+            for wmonum in wmos:
+                self._validate_wmo(wmonum)
+        if not wmos:
+            return
+        scratch_root = Path(scratch_directory) if scratch_directory is not None else self._scratch_root()
+
+        if str(self._read_decoder_conf().get("FLOAT_TRANSMISSION_TYPE", "")).strip() != ARGOS_TRANSMISSION_TYPE:
+            # Iridium : le décodeur temps réel n'accepte qu'un 'floatwmo' par exécution
+            for wmonum, result in self.decode_many(wmos, max_workers, scratch_root):
+                yield wmonum, self._split_results([wmonum], result)[wmonum]
+            return
+
+        chunks = [wmos[i : i + chunk_size] for i in range(0, len(wmos), chunk_size)]
+        workers = max_workers or os.cpu_count() or 1
+        pool = ThreadPoolExecutor(max_workers=min(workers, len(chunks)), thread_name_prefix="decoder")
+        try:
+            futures = [pool.submit(self._run_chunk, index, chunk, scratch_root) for index, chunk in enumerate(chunks)]
+            for future in as_completed(futures):
+                yield from future.result().items()
+        finally:
+            pool.shutdown(wait=True, cancel_futures=True)
+
+        self._post_run_hold()
+
+    def _run_chunk(self, index: int, wmos: list[str], scratch_root: Path) -> dict[str, FloatReport]:
+        try:
+            with self.float_locks.hold(wmos, timeout=self.config.timeout_seconds):
+                area, conf_file, report_name = self._prepare_run(f"chunk_{index:04d}", scratch_root)
+                float_list_file = area / "float_list.txt"
+                float_list_file.write_text("\n".join(wmos) + "\n", encoding="utf-8")
+                result = self._execute(
+                    self._build_list_cmd(float_list_file, conf_file, report_name),
+                    work_directory=area,
+                    report_name=report_name,
+                )
+        except FloatLockTimeout as e:
+            print(e)
+            result = DecodeResult(error=str(e))
+        return self._split_results(wmos, result)
+
+    @staticmethod
+    def _split_results(wmos: list[str], result: DecodeResult) -> dict[str, FloatReport]:
+        """Attach the run exit status and the matching part of its XML report to each float."""
+        returncode = result.returncode
+        report_file = result.report.report_file if result.report is not None else None
+        reports = {f.wmo: f for f in result.report.floats} if result.report is not None else {}
+
+        split: dict[str, FloatReport] = {}
+        for wmonum in wmos:
+            report = reports.get(wmonum) or FloatReport(wmo=wmonum, report_file=report_file)
+            report.returncode = returncode
+            if result.skipped:
+                report.status = "skipped"
+            elif returncode != 0:
+                report.status = "nok"
+            split[wmonum] = report
+        return split
+
+    def reprocess(
+        self,
+        ledger_file: str | Path,
+        wmonums: Iterable[str] | None = None,
+        max_workers: int | None = None,
+        retry_failed: bool = False,
+        on_progress: Callable[[ReprocessProgress], None] | None = None,
+    ) -> ReprocessProgress:
+        """Re-decode a whole fleet, resumably.
+
+        The plan is every float of :meth:`float_registry` (json_float_info plus
+        ``float_info_file``) unless ``wmonums`` is given. Floats run in parallel with
+        :meth:`decode_many`; each outcome is appended to ``ledger_file`` so that
+        running again with the same ledger only decodes what is left.
+
+        Whatever ``output_mode``, the outputs and Iridium state of every float are
+        deleted before its run, as in the ``full`` mode: the decoder would otherwise
+        leave out the rsync lists of its history and decode nothing again.
+
+        Args:
+            ledger_file: JSON-lines checkpoint file of the campaign.
+            wmonums: Floats to decode instead of the whole registry.
+            max_workers: Number of decoder processes running at the same time.
+            retry_failed: Also decode the floats that failed in a previous run.
+            on_progress: Called after every finished float (progress, throughput, ETA).
+        """
+        if wmonums is None:
+            wmonums = sorted(self.float_registry().wmos())
+        return reprocess(
+            wmonums,
+            Ledger(ledger_file),
+            lambda todo: self.decode_many(todo, max_workers=max_workers, force=True, full=True),
+            retry_failed=retry_failed,
+            on_progress=on_progress,
+        )
+
+    @staticmethod
+    def summarize(results: Iterable[DecodeResult | tuple[str, DecodeResult]], slowest: int = 10) -> BatchSummary:
+        """Merge the XML reports of a batch (e.g. the pairs of :meth:`decode_many`) into one summary.
+
+        A run that left no readable report still counts, as a float with the run status
+        (``skipped``, ``failed``, ``timeout``...).
+        """
+
+        def reports() -> Iterator[RunReport]:
+            for item in results:
+                result = item[1] if isinstance(item, tuple) else item
+                if result.report is not None:
+                    yield result.report
+                elif result.wmo is not None:
+                    yield RunReport(status=result.status, floats=[FloatReport(wmo=result.wmo, status=result.status)])
+
+        return summarize_reports(reports(), slowest)
+
+    async def adecode(
+        self,
+        wmonum: str,
+        on_output: OutputCallback | None = None,
+        force: bool = False,
+    ) -> DecodeResult:
+        """Asyncio counterpart of :meth:`decode`.
+
+        The decoder runs as an asyncio subprocess in its own session; each stdout/stderr
+        line is passed to ``on_output(stream, line)`` as soon as it is read. Cancelling
+        the awaiting task, or reaching the timeout, kills the whole process tree.
+        The steps around the run are those of :meth:`decode` (rsync lists, output mode,
+        result cache, adaptive timeout and relaunch, cost history, publishing); they
+        run on the event loop thread. ``hold_after_run`` is ignored here since it would
+        block the event loop, and CPU, memory and I/O figures are not measured (the
+        event loop reaps the process).
+        """
+        if self.config.check_wmo_format:
+            self._validate_wmo(wmonum)
+        try:
+            async with self.float_locks.ahold([wmonum], timeout=self.config.timeout_seconds):
+                return await self._arun(wmonum, on_output, force)
+        except FloatLockTimeout as e:
+            print(e)
+            return DecodeResult(wmo=wmonum, error=str(e))
+
+    async def _arun(self, wmonum: str, on_output: OutputCallback | None, force: bool) -> DecodeResult:
+        plan = self._plan_run(wmonum, force)
+        if isinstance(plan, DecodeResult):
+            return plan
+        result = self._from_cache(wmonum, plan.cache_key, None)
+        if result is None:
+            timeout = self._timeout_for(wmonum)
+            result = await self._aattempt(wmonum, on_output, timeout, plan)
+            if result.timed_out and self._relaunch_allowed(timeout):
+                print(f"{wmonum} went over its adaptive timeout ({timeout:.0f}s), relaunching it")
+                result = await self._aattempt(wmonum, on_output, self.config.timeout_seconds, plan)
+                result.relaunched = True
+        self._finish_run(wmonum, plan, result)
+        return result
+
+    async def _aattempt(
+        self,
+        wmonum: str,
+        on_output: OutputCallback | None,
+        timeout: float | None,
+        plan: _RunPlan,
+    ) -> DecodeResult:
+        """Asyncio counterpart of :meth:`_attempt`."""
+        cmd, area, report_name, stage = self._begin_attempt(wmonum, None, plan)
+        try:
+            result = await self._aexecute(cmd, wmonum, area, report_name, on_output, timeout)
+            if stage is not None and result.status == "ok":
+                self._commit_stage(stage, result)
+        finally:
+            if stage is not None:
+                stage.discard()
+        return result
+
+    async def _aexecute(
+        self,
+        cmd: list[str],
+        wmonum: str,
+        work_directory: Path,
+        report_name: str,
+        on_output: OutputCallback | None,
+        timeout: float | None,
+    ) -> DecodeResult:
+        timeout = timeout or self.config.timeout_seconds
+        context = {
+            "wmo": wmonum,
+            "command": cmd,
+            "work_directory": work_directory,
+            "report_file": work_directory / "xml" / report_name,
+            "timeout_seconds": timeout,
+        }
+        print(cmd)
+        started, start = time.time(), time.monotonic()
+        try:
+            process = await asyncio.create_subprocess_exec(
+                *cmd,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE,
+                env=os.environ.copy(),
+                start_new_session=True,
+                limit=self._STREAM_LINE_LIMIT,
+            )
+        except OSError as e:
+            print("Invalid command:", e)
+            return DecodeResult(error=str(e), **context)
+
+        captured = {
+            "stdout": BoundedOutput(self.config.max_captured_output),
+            "stderr": BoundedOutput(self.config.max_captured_output),
+        }
+
+        async def pump(stream: asyncio.StreamReader, name: str) -> None:
+            async for raw in stream:
+                captured[name].write(raw)
+                if on_output is not None:
+                    outcome = on_output(name, raw.decode(errors="replace").rstrip("\n"))
+                    if inspect.isawaitable(outcome):
+                        await outcome
+
+        timed_out = False
+        try:
+            await asyncio.wait_for(
+                asyncio.gather(pump(process.stdout, "stdout"), pump(process.stderr, "stderr"), process.wait()),
+                timeout=timeout,
+            )
+        except asyncio.TimeoutError:
+            timed_out = True
+            await self._akill_process_tree(process)
+        except BaseException:
+            # annulation (ou erreur du callback) : on ne laisse pas tourner le décodeur
+            await self._akill_process_tree(process)
+            raise
+
+        result = DecodeResult(
+            **context,
+            returncode=process.returncode,
+            timed_out=timed_out,
+            wall_time=time.monotonic() - start,
+            stdout=captured["stdout"].text(),
+            stderr=captured["stderr"].text(),
+            output_truncated=captured["stdout"].truncated or captured["stderr"].truncated,
+            netcdf_files=self._produced_netcdf_files(wmonum, started),
+            report=self._read_report(context["report_file"]),
+        )
+        if not result.ok:
+            print(f"Decoding {result.status}, return code: {result.returncode}")
+        return result
+
+    async def astream(self, wmonum: str) -> AsyncIterator[tuple[str, str]]:
+        """Run :meth:`adecode` and yield its ``(stream, line)`` output pairs as they arrive.
+
+        Leaving the iteration early (``break``, cancellation) kills the decoder.
+        """
+        lines: asyncio.Queue = asyncio.Queue()
+        finished = object()
+        task = asyncio.ensure_future(self.adecode(wmonum, on_output=lambda name, line: lines.put_nowait((name, line))))
+        task.add_done_callback(lambda _: lines.put_nowait(finished))
+        try:
+            while (item := await lines.get()) is not finished:
+                yield item
+            await task  # remonte les erreurs du run
+        finally:
+            if not task.done():
+                task.cancel()
+                with suppress(asyncio.CancelledError):
+                    await task
+
+    async def _akill_process_tree(self, process: asyncio.subprocess.Process) -> None:
+        if process.returncode is not None:
+            return
+        signal_process_group(process.pid, signal.SIGTERM)
+        try:
+            await asyncio.wait_for(asyncio.shield(process.wait()), timeout=self._KILL_GRACE_SECONDS)
+        except asyncio.TimeoutError:
+            signal_process_group(process.pid, signal.SIGKILL)
+            await process.wait()
+
+
+def _run_demo() -> None:  # pragma: no cover
     print("Running...")
 
     try:
@@ -227,3 +1411,244 @@ if __name__ == "__main__":  # pragma: no cover
         timeout_seconds=3600,
     )
     decoder.decode("6902892")
+
+
+def _decoder_from_args(args: argparse.Namespace) -> Decoder:
+    return Decoder(
+        decoder_conf_file=args.conf,
+        decoder_executable=args.executable,
+        matlab_runtime=args.runtime,
+        timeout_seconds=args.timeout,
+        float_info_file=args.float_info_file,
+        cost_history_file=args.cost_history,
+        timeout_policy=TimeoutPolicy(relaunch=args.relaunch_stragglers) if args.adaptive_timeouts else None,
+        cache_directory=args.cache_directory,
+        cache_max_mb=args.cache_max_mb,
+        cache_max_age_days=args.cache_max_age_days,
+        publish_directory=args.publish_directory,
+        # retraitement : chaque flotteur repart de zéro
+        output_mode="full",
+    )
+
+
+def _watch(args: argparse.Namespace) -> int:  # pragma: no cover - tourne jusqu'à Ctrl-C
+    decoder = Decoder(
+        decoder_conf_file=args.conf,
+        decoder_executable=args.executable,
+        matlab_runtime=args.runtime,
+        timeout_seconds=args.timeout,
+        float_info_file=args.float_info_file,
+        state_directory=args.state_directory,
+        archive_catalog=args.archive_catalog,
+        delta_rsync_logs=args.delta_rsync_logs,
+        output_mode=args.output_mode,
+    )
+    watcher = decoder.watch(args.workers, args.debounce, args.poll_interval)
+    print(f"Watching {', '.join(map(str, watcher.roots))} ({watcher.backend}), Ctrl-C to stop")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        watcher.stop()
+        decoder.stop_job_queue()
+    return 0
+
+
+def _run_containers(args: argparse.Namespace, client: object = None) -> int:
+    wmonums = args.wmo
+    if not wmonums and args.float_info_file:
+        wmonums = FloatRegistry(info_file=args.float_info_file, refresh_interval=None).wmos()
+    if not wmonums:
+        print("No float to decode: pass --wmo or --float-info-file.")
+        return 2
+    orchestrator = ContainerOrchestrator(
+        input_directory=args.input,
+        conf_directory=args.config,
+        output_directory=args.output,
+        runtime=args.runtime,
+        greylist_file=args.greylist,
+        image=args.image,
+        cpus=args.cpus,
+        mem_limit=args.memory,
+        max_parallel=args.parallel,
+        timeout=args.timeout,
+        client=client,
+    )
+    if args.ledger:
+        progress = reprocess(
+            wmonums, Ledger(args.ledger), orchestrator.run_many, on_progress=lambda p: print(p.summary())
+        )
+        print("Decoding finished:", progress.summary())
+        return 0 if progress.failed == 0 else 1
+    failed = 0
+    for wmonum, result in orchestrator.run_many(wmonums):
+        print(f"{wmonum}: {result.status} ({result.wall_time:.0f}s, container {result.container_name})")
+        failed += not result.ok
+    return 0 if failed == 0 else 1
+
+
+def _publish(args: argparse.Namespace) -> int:
+    source = Path(args.source)
+    wmonums = args.wmo or sorted(p.name for p in source.iterdir() if p.is_dir() and not p.name.startswith("."))
+    publisher = OutputPublisher(args.destination, args.manifest_directory, args.hardlink, args.delete_removed)
+    for wmonum in wmonums:
+        report = publisher.publish(wmonum, source / wmonum)
+        print(
+            f"{wmonum}: {len(report.new)} new, {len(report.changed)} changed, {report.unchanged} unchanged, "
+            f"{len(report.removed)} removed"
+        )
+    return 0
+
+
+def _report(args: argparse.Namespace) -> int:
+    paths = list(args.paths)
+    if args.ledger:
+        paths += [e.report_file for e in Ledger(args.ledger).entries().values() if e.report_file]
+    if not paths:
+        print("No report to read: pass XML files, directories or --ledger.")
+        return 2
+    summary = summarize_report_files(paths, slowest=args.slowest)
+    print(summary.summary())
+    for group in summary.errors[: args.slowest]:
+        print(f"  {group.count:5d} x {group.stage} error: {group.example} ({len(group.wmos)} floats)")
+    if args.output:
+        summary.write(args.output)
+        print(f"Summary written to {args.output}")
+    return 0 if not summary.failed and not summary.unreadable else 1
+
+
+def _compare(args: argparse.Namespace) -> int:
+    ignore_variables = frozenset() if args.strict_dates else VOLATILE_VARIABLES
+    report = compare_trees(
+        args.test,
+        args.reference,
+        workers=args.workers,
+        atol=args.atol,
+        rtol=args.rtol,
+        ignore_variables=ignore_variables,
+    )
+    print(report.summary())
+    for diff in report.files:
+        details = diff.differences + [f"{v.name}: {v.mismatches} value(s) differ" for v in diff.variables]
+        print(f"  {diff.path} ({diff.status}): {'; '.join(details[:5])}")
+    if args.output:
+        report.write(args.output)
+        print(f"Comparison written to {args.output}")
+    return 0 if report.equal else 1
+
+
+def main(argv: list[str] | None = None) -> int:
+    """Command line entry point (``decoder``); without arguments, runs the demo decoding."""
+    parser = argparse.ArgumentParser(prog="decoder", description="Python bindings of the Coriolis Argo decoder.")
+    commands = parser.add_subparsers(dest="command")
+    rp = commands.add_parser("reprocess", help="Re-decode a whole fleet, resuming from a ledger.")
+    rp.add_argument("--conf", required=True, help="Decoder JSON configuration file.")
+    rp.add_argument("--executable", required=True, help="run_decode_argo_2_nc_rt.sh wrapper.")
+    rp.add_argument("--runtime", required=True, help="MATLAB Runtime directory.")
+    rp.add_argument("--ledger", required=True, help="JSON-lines checkpoint file of the campaign.")
+    rp.add_argument("--float-info-file", help="argo_floats_information_co.txt (in addition to json_float_info).")
+    rp.add_argument("--wmo", action="append", help="Float to decode (repeatable); the whole registry by default.")
+    rp.add_argument("--workers", type=int, default=None, help="Decoder processes running at the same time.")
+    rp.add_argument("--timeout", type=int, default=3600, help="Timeout of one decoder run (seconds).")
+    rp.add_argument("--retry-failed", action="store_true", help="Also decode the floats that failed before.")
+    rp.add_argument("--cost-history", help="Per-float peak RSS/duration history, to admit floats by memory.")
+    rp.add_argument(
+        "--adaptive-timeouts", action="store_true", help="Derive each float timeout from --cost-history durations."
+    )
+    rp.add_argument(
+        "--relaunch-stragglers", action="store_true", help="Relaunch once, with --timeout, a run over its timeout."
+    )
+    rp.add_argument("--cache-directory", help="Reuse the results of full-mode runs with the same inputs and decoder.")
+    rp.add_argument("--cache-max-mb", type=int, default=None, help="Size bound of the result cache (MB).")
+    rp.add_argument("--cache-max-age-days", type=float, default=None, help="Age bound of the result cache (days).")
+    rp.add_argument("--publish-directory", help="Copy only the new and changed NetCDF files of each run there.")
+    wt = commands.add_parser("watch", help="Decode floats as soon as rsync drops their files.")
+    wt.add_argument("--conf", required=True, help="Decoder JSON configuration file.")
+    wt.add_argument("--executable", required=True, help="run_decode_argo_2_nc_rt.sh wrapper.")
+    wt.add_argument("--runtime", required=True, help="MATLAB Runtime directory.")
+    wt.add_argument("--float-info-file", help="argo_floats_information_co.txt (in addition to json_float_info).")
+    wt.add_argument("--state-directory", help="Skip floats whose input files did not change since their last run.")
+    wt.add_argument(
+        "--archive-catalog",
+        action="store_true",
+        help="List the input files from an SQLite catalog kept in --state-directory.",
+    )
+    wt.add_argument(
+        "--delta-rsync-logs",
+        action="store_true",
+        help="Skip floats without new rsync list; pass a single new list by name.",
+    )
+    wt.add_argument("--workers", type=int, default=1, help="Floats decoded at the same time.")
+    wt.add_argument("--debounce", type=float, default=2.0, help="Quiet time before a float is queued (seconds).")
+    wt.add_argument("--poll-interval", type=float, default=5.0, help="Scan period without inotify (seconds).")
+    wt.add_argument("--timeout", type=int, default=3600, help="Timeout of one decoder run (seconds).")
+    wt.add_argument("--output-mode", choices=OUTPUT_MODES, default="incremental", help="Earlier outputs of a float.")
+    ct = commands.add_parser("containers", help="Decode floats in parallel decoder containers (Docker).")
+    ct.add_argument("--input", required=True, help="Host rsync directory (mounted on /mnt/data/rsync).")
+    ct.add_argument("--config", required=True, help="Host directory holding decoder_conf.json.")
+    ct.add_argument("--output", required=True, help="Host output directory (mounted on /mnt/data/output).")
+    ct.add_argument("--runtime", default=DEFAULT_RUNTIME_VOLUME, help="MATLAB Runtime directory or docker volume.")
+    ct.add_argument("--greylist", help="Greylist file (mounted on /tmp/ar_greylist.txt).")
+    ct.add_argument("--image", default=DEFAULT_IMAGE, help="Decoder image.")
+    ct.add_argument("--float-info-file", help="argo_floats_information_co.txt, to decode every float it lists.")
+    ct.add_argument("--wmo", action="append", help="Float to decode (repeatable).")
+    ct.add_argument("--cpus", type=float, default=1.0, help="CPU limit of one container.")
+    ct.add_argument("--memory", help="Memory limit of one container (e.g. 4g).")
+    ct.add_argument("--parallel", type=int, default=None, help="Containers running at the same time.")
+    ct.add_argument("--timeout", type=int, default=3600, help="Timeout of one container (seconds).")
+    ct.add_argument("--ledger", help="JSON-lines checkpoint file, to resume an interrupted campaign.")
+    pb = commands.add_parser("publish", help="Copy the new and changed NetCDF files to a publishing tree.")
+    pb.add_argument("--source", required=True, help="DIR_OUTPUT_NETCDF_FILE (one sub-directory per WMO).")
+    pb.add_argument("--destination", required=True, help="Publishing tree, e.g. the GDAC transfer directory.")
+    pb.add_argument("--manifest-directory", help="Manifests of the published files (<destination>/.manifests).")
+    pb.add_argument("--wmo", action="append", help="Float to publish (repeatable); every float by default.")
+    pb.add_argument("--hardlink", action="store_true", help="Link the files instead of copying them.")
+    pb.add_argument("--delete-removed", action="store_true", help="Delete the files no longer produced.")
+    rr = commands.add_parser("report", help="Merge the XML reports of a batch into one JSON summary.")
+    rr.add_argument("paths", nargs="*", help="XML reports, or directories searched for co041404_*.xml.")
+    rr.add_argument("--ledger", help="Also read the reports recorded in a reprocess/containers ledger.")
+    rr.add_argument("--output", help="JSON file the summary is written to.")
+    rr.add_argument("--slowest", type=int, default=10, help="Longest runs (and most frequent errors) listed.")
+    fk = commands.add_parser("install-fake-decoder", help="Write a fake decoder, to load-test without MATLAB.")
+    fk.add_argument("directory", help="Where run_decode_argo_2_nc_rt.sh and decode_argo_2_nc_rt are written.")
+    cp = commands.add_parser("compare", help="Compare two NetCDF output trees (e.g. two decoder versions).")
+    cp.add_argument("test", help="Output tree to check.")
+    cp.add_argument("reference", help="Reference output tree.")
+    cp.add_argument("--output", help="JSON file the differences are written to.")
+    cp.add_argument("--workers", type=int, default=None, help="Processes comparing files at the same time.")
+    cp.add_argument("--atol", type=float, default=0.0, help="Absolute tolerance on numeric values.")
+    cp.add_argument("--rtol", type=float, default=0.0, help="Relative tolerance on numeric values.")
+    cp.add_argument("--strict-dates", action="store_true", help="Also compare DATE_CREATION/DATE_UPDATE/HISTORY_DATE.")
+    args = parser.parse_args(argv)
+
+    if args.command is None:  # pragma: no cover
+        _run_demo()
+        return 0
+    if args.command == "containers":
+        return _run_containers(args)
+    if args.command == "report":
+        return _report(args)
+    if args.command == "publish":
+        return _publish(args)
+    if args.command == "compare":
+        return _compare(args)
+    if args.command == "install-fake-decoder":
+        print(install_fake_decoder(args.directory))
+        return 0
+    if args.command == "watch":  # pragma: no cover - tourne jusqu'à Ctrl-C
+        return _watch(args)
+
+    progress = _decoder_from_args(args).reprocess(
+        args.ledger,
+        wmonums=args.wmo,
+        max_workers=args.workers,
+        retry_failed=args.retry_failed,
+        on_progress=lambda p: print(p.summary(), flush=True),
+    )
+    print("Reprocessing finished:", progress.summary())
+    return 0 if progress.failed == 0 else 1
+
+
+if __name__ == "__main__":  # pragma: no cover
+    raise SystemExit(main())
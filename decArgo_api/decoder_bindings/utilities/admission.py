@@ -0,0 +1,276 @@
+"""Resource-aware admission of decoder runs in a batch.
+
+* :func:`detect_limits` reads the CPU quota and memory limit of the current cgroup
+  (v2 ``cpu.max``/``memory.max``, v1 ``cpu.cfs_quota_us``/``memory.limit_in_bytes``,
+  taking the tightest value up the hierarchy); without limits, the CPU affinity and
+  ``MemAvailable`` of the host are used;
+* :class:`CostHistory` keeps, per float, the peak RSS and duration of its last runs;
+* :class:`AdmissionController` starts the floats largest first and, when the next
+  one does not fit in the free memory, the largest one that does: small floats
+  fill the room left around the large ones, and the predicted total stays under
+  the budget.
+"""
+
+import json
+import os
+import statistics
+import threading
+from collections.abc import Callable, Iterator
+from concurrent.futures import FIRST_COMPLETED, Executor, Future, wait
+from pathlib import Path
+
+from pydantic import BaseModel
+
+from .state import atomic_write_text, file_lock
+
+# Limites mémoire cgroup v1 au-delà desquelles il n'y a en fait pas de limite
+_V1_UNLIMITED = 1 << 60
+# Part de la mémoire disponible allouée aux runs du lot
+DEFAULT_HEADROOM = 0.9
+
+
+class ResourceLimits(BaseModel):
+    """CPU and memory available to the decoder runs of this process."""
+
+    cpus: float
+    memory_kb: int | None = None
+    source: str = "host"
+
+    @property
+    def cpu_slots(self) -> int:
+        """Number of single-threaded decoder runs the CPU quota allows."""
+        return max(1, int(self.cpus))
+
+    def memory_budget_kb(self, headroom: float = DEFAULT_HEADROOM) -> int | None:
+        """Memory the runs of a batch may use together."""
+        return None if self.memory_kb is None else int(self.memory_kb * headroom)
+
+
+def _read(path: Path) -> str | None:
+    try:
+        return path.read_text(encoding="utf-8").strip()
+    except OSError:
+        return None
+
+
+def _v2_cpus(directory: Path) -> float | None:
+    quota, _, period = (_read(directory / "cpu.max") or "max").partition(" ")
+    return None if quota == "max" or not period else int(quota) / int(period)
+
+
+def _v2_memory(directory: Path) -> int | None:
+    value = _read(directory / "memory.max")
+    return None if value in (None, "max") else int(value)
+
+
+def _v1_cpus(directory: Path) -> float | None:
+    quota, period = _read(directory / "cpu.cfs_quota_us"), _read(directory / "cpu.cfs_period_us")
+    if quota is None or period is None or int(quota) <= 0:
+        return None
+    return int(quota) / int(period)
+
+
+def _v1_memory(directory: Path) -> int | None:
+    value = _read(directory / "memory.limit_in_bytes")
+    return None if value is None or int(value) >= _V1_UNLIMITED else int(value)
+
+
+def _own_cgroups(proc_root: Path) -> dict[str, str]:
+    """Controller -> cgroup path of this process (``""`` for the cgroup v2 hierarchy)."""
+    paths: dict[str, str] = {}
+    for line in (_read(proc_root / "self" / "cgroup") or "").splitlines():
+        parts = line.split(":", 2)
+        if len(parts) == 3:
+            for controller in parts[1].split(","):
+                paths[controller] = parts[2]
+    return paths
+
+
+def _tightest(root: Path, path: str | None, reader: Callable[[Path], float | None]) -> float | None:
+    """Smallest limit from the cgroup of the process up to ``root``."""
+    if not root.is_dir():
+        return None
+    directory = root / (path or "/").lstrip("/")
+    # dans un conteneur, le chemin vu par /proc/self/cgroup n'est souvent pas monté
+    if not directory.is_dir():
+        directory = root
+    values = []
+    while True:
+        value = reader(directory)
+        if value is not None:
+            values.append(value)
+        if directory == root:
+            return min(values, default=None)
+        directory = directory.parent
+
+
+def _available_memory_kb(proc_root: Path) -> int | None:
+    for line in (_read(proc_root / "meminfo") or "").splitlines():
+        if line.startswith("MemAvailable:"):
+            return int(line.split()[1])
+    return None
+
+
+def detect_limits(cgroup_root: str | Path = "/sys/fs/cgroup", proc_root: str | Path = "/proc") -> ResourceLimits:
+    """CPU and memory limits of the current process (cgroup v2, then v1, then host)."""
+    cgroup_root, proc_root = Path(cgroup_root), Path(proc_root)
+    cpus = float(len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else os.cpu_count() or 1)
+    memory_kb = _available_memory_kb(proc_root)
+    paths = _own_cgroups(proc_root)
+    if (cgroup_root / "cgroup.controllers").exists():
+        source = "cgroup2"
+        quota = _tightest(cgroup_root, paths.get(""), _v2_cpus)
+        limit = _tightest(cgroup_root, paths.get(""), _v2_memory)
+    else:
+        source = "cgroup1"
+        quota = _tightest(cgroup_root / "cpu", paths.get("cpu"), _v1_cpus)
+        limit = _tightest(cgroup_root / "memory", paths.get("memory"), _v1_memory)
+    if quota is None and limit is None:
+        source = "host"
+    if quota is not None:
+        cpus = min(cpus, quota)
+    if limit is not None:
+        memory_kb = min(memory_kb, int(limit) // 1024) if memory_kb is not None else int(limit) // 1024
+    return ResourceLimits(cpus=cpus, memory_kb=memory_kb, source=source)
+
+
+class FloatCost(BaseModel):
+    """Predicted cost of one decoder run."""
+
+    wmo: str
+    peak_rss_kb: int
+    duration: float
+    # Nombre de runs mesurés (0 : estimation par défaut)
+    runs: int = 0
+
+
+class CostHistory:
+    """Peak RSS and duration of the last runs of every float, kept in a JSON file.
+
+    Args:
+        path: History file (created on the first record).
+        keep: Runs kept per float.
+        default_rss_kb: Predicted peak RSS of a float never measured, when no float was measured either.
+        default_duration: Same for the duration (seconds).
+    """
+
+    def __init__(
+        self,
+        path: str | Path,
+        keep: int = 20,
+        default_rss_kb: int = 2 * 1024 * 1024,
+        default_duration: float = 600.0,
+    ):
+        """Load the history file, if it exists."""
+        self.path = Path(path)
+        self.keep = keep
+        self.default_rss_kb = default_rss_kb
+        self.default_duration = default_duration
+        self._lock = threading.Lock()
+        self._runs: dict[str, dict[str, list]] = self._load()
+
+    def _load(self) -> dict[str, dict[str, list]]:
+        try:
+            return json.loads(self.path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return {}
+
+    def record(self, wmonum: str, peak_rss_kb: int | None, duration: float | None) -> None:
+        """Add the measures of a finished run (None when not measured).
+
+        The file is re-read under a file lock before the update, so that processes
+        sharing the history keep each other's records.
+        """
+        with self._lock, file_lock(self.path):
+            self._runs = self._load()
+            runs = self._runs.setdefault(wmonum, {"peak_rss_kb": [], "durations": []})
+            for key, value in (("peak_rss_kb", peak_rss_kb), ("durations", duration)):
+                if value is not None:
+                    runs[key] = [*runs[key], value][-self.keep :]
+            atomic_write_text(self.path, json.dumps(self._runs, sort_keys=True))
+
+    def peak_rss(self, wmonum: str) -> list[int]:
+        """Recorded peak RSS of ``wmonum`` (kB), oldest first."""
+        with self._lock:
+            return list(self._runs.get(wmonum, {}).get("peak_rss_kb", []))
+
+    def durations(self, wmonum: str) -> list[float]:
+        """Recorded durations of ``wmonum`` (seconds), oldest first."""
+        with self._lock:
+            return list(self._runs.get(wmonum, {}).get("durations", []))
+
+    def estimate(self, wmonum: str) -> FloatCost:
+        """Predicted cost: highest recent peak RSS and median duration.
+
+        A float never measured gets the median of the measured floats.
+        """
+        peaks, durations = self.peak_rss(wmonum), self.durations(wmonum)
+        if peaks and durations:
+            return FloatCost(
+                wmo=wmonum, peak_rss_kb=max(peaks), duration=statistics.median(durations), runs=len(durations)
+            )
+        with self._lock:
+            fleet_peaks = [max(r["peak_rss_kb"]) for r in self._runs.values() if r["peak_rss_kb"]]
+            fleet_durations = [statistics.median(r["durations"]) for r in self._runs.values() if r["durations"]]
+        return FloatCost(
+            wmo=wmonum,
+            peak_rss_kb=max(peaks) if peaks else int(statistics.median(fleet_peaks or [self.default_rss_kb])),
+            duration=statistics.median(durations or fleet_durations or [self.default_duration]),
+            runs=len(durations),
+        )
+
+
+class AdmissionController:
+    """Decide which floats start, so that at most ``slots`` run and their predicted memory fits ``memory_budget_kb``.
+
+    A float larger than the whole budget still runs, alone.
+    """
+
+    def __init__(self, memory_budget_kb: int | None, slots: int):
+        """Start with nothing running."""
+        self.memory_budget_kb = memory_budget_kb
+        self.slots = max(1, slots)
+        self.running: dict[str, FloatCost] = {}
+
+    @property
+    def used_kb(self) -> int:
+        """Predicted memory of the running floats."""
+        return sum(cost.peak_rss_kb for cost in self.running.values())
+
+    def select(self, pending: list[FloatCost]) -> FloatCost | None:
+        """First float of ``pending`` (sorted largest first) that may start now, if any."""
+        if not pending or len(self.running) >= self.slots:
+            return None
+        if not self.running or self.memory_budget_kb is None:
+            return pending[0]
+        free = self.memory_budget_kb - self.used_kb
+        return next((cost for cost in pending if cost.peak_rss_kb <= free), None)
+
+    def admit(self, cost: FloatCost) -> None:
+        """Count ``cost`` as running."""
+        self.running[cost.wmo] = cost
+
+    def release(self, wmonum: str) -> None:
+        """Count the run of ``wmonum`` as finished."""
+        self.running.pop(wmonum, None)
+
+    def run(
+        self, executor: Executor, costs: list[FloatCost], fn: Callable[[str], object]
+    ) -> Iterator[tuple[str, Future]]:
+        """Submit ``fn(wmo)`` for every float of ``costs`` as admission allows.
+
+        Yields:
+            ``(wmo, future)`` pairs as the runs finish.
+        """
+        pending = sorted(costs, key=lambda c: (c.peak_rss_kb, c.duration), reverse=True)
+        futures: dict[Future, FloatCost] = {}
+        while pending or futures:
+            while (cost := self.select(pending)) is not None:
+                pending.remove(cost)
+                self.admit(cost)
+                futures[executor.submit(fn, cost.wmo)] = cost
+            done, _ = wait(futures, return_when=FIRST_COMPLETED)
+            for future in done:
+                cost = futures.pop(future)
+                self.release(cost.wmo)
+                yield cost.wmo, future
@@ -0,0 +1,251 @@
+"""Content-addressed cache of decoder results.
+
+Decoding a float from scratch again with the same input files, the same resolved
+configuration and the same decoder build produces the same outputs. The key of a
+run is the SHA-256 of three hashes: the input file set (float files and the
+reference files the configuration points to), the configuration and the decoder
+executables. On a hit, the outputs, decoder state and XML report
+of the earlier run are copied back instead of launching the decoder.
+
+Files are stored once, by SHA-256, under ``objects/``; each cached run is an
+``entries/<key>.json`` file listing its outputs (relative to the NetCDF output
+root), its decoder state files (relative to the Iridium data root) and its
+report. Entries older than ``max_age`` seconds are dropped, and
+the least recently used ones go when the stored files exceed ``max_bytes``.
+
+Several processes may share a cache root: storing and evicting take an exclusive
+``flock`` on it, restoring a shared one, so an entry is never evicted while it is
+being copied in or out.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+from collections.abc import Iterable
+from contextlib import AbstractContextManager
+from pathlib import Path
+
+from pydantic import BaseModel, Field
+
+from .state import atomic_write_text, file_lock, file_sha256
+
+
+class CacheEntry(BaseModel):
+    """One cached decoder run."""
+
+    key: str
+    wmo: str
+    created: float
+    last_used: float
+    # chemin relatif à la racine des NetCDF -> SHA-256 du contenu
+    files: dict[str, str] = Field(default_factory=dict)
+    # état du décodeur (buffers Iridium, historique des listes traitées), relatif à IRIDIUM_DATA_DIRECTORY
+    state_files: dict[str, str] = Field(default_factory=dict)
+    report: str | None = None
+
+    def digests(self) -> set[str]:
+        """Every stored file the entry needs."""
+        return {*self.files.values(), *self.state_files.values(), *([self.report] if self.report else [])}
+
+
+def _copy_atomic(source: Path, destination: Path) -> None:
+    """Copy ``source`` next to ``destination`` then rename it over ``destination``."""
+    destination.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=destination.parent, prefix=f".{destination.name}.", suffix=".tmp")
+    os.close(fd)
+    try:
+        shutil.copy2(source, tmp)
+        os.replace(tmp, destination)
+    except BaseException:
+        Path(tmp).unlink(missing_ok=True)
+        raise
+
+
+class ResultCache:
+    """Decoder outputs and reports indexed by the hash of what produced them.
+
+    Args:
+        directory: Root of the cache (created if needed).
+        max_bytes: Size above which the least recently used entries are evicted.
+        max_age: Age (seconds) after which an entry is evicted.
+    """
+
+    def __init__(self, directory: str | Path, max_bytes: int | None = None, max_age: float | None = None):
+        """Use (and create if needed) ``directory``."""
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        (self.directory / "objects").mkdir(parents=True, exist_ok=True)
+        (self.directory / "entries").mkdir(parents=True, exist_ok=True)
+        # chemin -> (taille, mtime_ns, sha256) : les exécutables ne sont hachés qu'une fois
+        self._hashes: dict[str, tuple[int, int, str]] = {}
+
+    # -- clés -----------------------------------------------------------------
+
+    def file_hash(self, path: Path) -> str:
+        """SHA-256 of a file, remembered while its size and mtime do not change."""
+        st = path.stat()
+        known = self._hashes.get(str(path))
+        if known is not None and known[:2] == (st.st_size, st.st_mtime_ns):
+            return known[2]
+        digest = file_sha256(path)
+        self._hashes[str(path)] = (st.st_size, st.st_mtime_ns, digest)
+        return digest
+
+    def _files_hash(self, files: dict[str, Path]) -> str:
+        digest = hashlib.sha256()
+        for name in sorted(files):
+            digest.update(f"{name}\0{self.file_hash(files[name])}\n".encode())
+        return digest.hexdigest()
+
+    def key(self, wmonum: str, inputs: dict[str, Path], conf: dict, executables: Iterable[Path]) -> str:
+        """Key of a run of ``wmonum``.
+
+        Args:
+            wmonum: Decoded float.
+            inputs: Input files of the float and reference files, by a name stable across runs.
+            conf: Resolved decoder configuration (without the per-run directories).
+            executables: Decoder wrapper and binary.
+        """
+        conf_hash = hashlib.sha256(json.dumps(conf, sort_keys=True, default=str).encode()).hexdigest()
+        executables_hash = self._files_hash({str(path): path for path in executables})
+        parts = (wmonum, self._files_hash(inputs), conf_hash, executables_hash)
+        return hashlib.sha256("\n".join(parts).encode()).hexdigest()
+
+    # -- entrées --------------------------------------------------------------
+
+    def _object(self, digest: str) -> Path:
+        return self.directory / "objects" / digest[:2] / digest
+
+    def _entry_path(self, key: str) -> Path:
+        return self.directory / "entries" / f"{key}.json"
+
+    def _entries(self) -> list[CacheEntry]:
+        entries = []
+        for path in (self.directory / "entries").glob("*.json"):
+            try:
+                entries.append(CacheEntry.model_validate_json(path.read_text(encoding="utf-8")))
+            except (OSError, ValueError):
+                continue
+        return entries
+
+    def _lock(self, shared: bool = False) -> AbstractContextManager[None]:
+        # verrou du répertoire partagé par les processus qui utilisent le cache
+        return file_lock(self.directory / "entries", shared)
+
+    def _put(self, path: Path) -> str:
+        digest = file_sha256(path)
+        if not self._object(digest).is_file():
+            _copy_atomic(path, self._object(digest))
+        return digest
+
+    def lookup(self, key: str) -> CacheEntry | None:
+        """Entry of ``key`` if it is cached, not expired and complete."""
+        try:
+            entry = CacheEntry.model_validate_json(self._entry_path(key).read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+        if self.max_age is not None and time.time() - entry.created > self.max_age:
+            return None
+        if not all(self._object(digest).is_file() for digest in entry.digests()):
+            return None
+        return entry
+
+    def store(
+        self,
+        key: str,
+        wmonum: str,
+        output_root: Path,
+        files: Iterable[Path],
+        report_file: Path | None,
+        state_root: Path | None = None,
+        state_files: Iterable[Path] = (),
+    ) -> None:
+        """Cache the output ``files`` (under ``output_root``), decoder ``state_files`` and report, then evict."""
+        with self._lock():
+            now = time.time()
+            entry = CacheEntry(key=key, wmo=wmonum, created=now, last_used=now)
+            for path in files:
+                entry.files[path.relative_to(output_root).as_posix()] = self._put(path)
+            for path in state_files:
+                entry.state_files[path.relative_to(state_root).as_posix()] = self._put(path)
+            if report_file is not None:
+                entry.report = self._put(report_file)
+            atomic_write_text(self._entry_path(key), entry.model_dump_json())
+            self._evict()
+
+    def restore(
+        self, entry: CacheEntry, output_root: Path, report_file: Path, state_root: Path | None = None
+    ) -> list[Path]:
+        """Copy the files of ``entry`` back under ``output_root`` and ``state_root``, its report to ``report_file``.
+
+        Returns:
+            The restored output files.
+        """
+        if entry.state_files and state_root is None:
+            raise ValueError("The cache entry holds decoder state files but no state root was given.")
+        restored = []
+        with self._lock(shared=True):
+            for name, digest in sorted(entry.files.items()):
+                _copy_atomic(self._object(digest), output_root / name)
+                restored.append(output_root / name)
+            for name, digest in sorted(entry.state_files.items()):
+                _copy_atomic(self._object(digest), state_root / name)
+            if entry.report is not None:
+                _copy_atomic(self._object(entry.report), report_file)
+            entry.last_used = time.time()
+            atomic_write_text(self._entry_path(entry.key), entry.model_dump_json())
+        return restored
+
+    # -- éviction -------------------------------------------------------------
+
+    def _size(self, digest: str) -> int:
+        try:
+            return self._object(digest).stat().st_size
+        except FileNotFoundError:
+            return 0
+
+    def _kept(self, entries: list[CacheEntry]) -> list[CacheEntry]:
+        """Most recently used entries fitting ``max_bytes``, the expired ones left out."""
+        now = time.time()
+        kept, digests, size = [], set(), 0
+        for entry in sorted(entries, key=lambda e: e.last_used, reverse=True):
+            if self.max_age is not None and now - entry.created > self.max_age:
+                continue
+            new = entry.digests() - digests
+            added = sum(self._size(digest) for digest in new)
+            if self.max_bytes is not None and size + added > self.max_bytes:
+                break
+            kept.append(entry)
+            digests |= new
+            size += added
+        return kept
+
+    def _evict(self) -> int:
+        entries = self._entries()
+        kept = self._kept(entries)
+        kept_keys = {entry.key for entry in kept}
+        for entry in entries:
+            if entry.key not in kept_keys:
+                self._entry_path(entry.key).unlink(missing_ok=True)
+        referenced = {digest for entry in kept for digest in entry.digests()}
+        for path in (self.directory / "objects").glob("*/*"):
+            if path.name not in referenced:
+                path.unlink(missing_ok=True)
+        return len(entries) - len(kept)
+
+    def evict(self) -> int:
+        """Drop the expired entries, then the least recently used ones over ``max_bytes``.
+
+        Returns:
+            The number of entries removed.
+        """
+        with self._lock():
+            return self._evict()
+
+    def size(self) -> int:
+        """Bytes of the stored files."""
+        return sum(path.stat().st_size for path in (self.directory / "objects").glob("*/*") if path.is_file())
@@ -0,0 +1,225 @@
+"""SQLite catalog of the rsync archive (``DIR_INPUT_RSYNC_DATA/<imei>/``).
+
+Archive file names carry everything needed to select them:
+
+* Iridium SBD: ``co_20200629T084534Z_300234065895840_000007_000000_32201.txt``
+  (timestamp, IMEI, cycle, counter, size);
+* Iridium RUDICS: ``250912_205203_nocbio002b_00137.bin`` (date, time, login, cycle).
+
+The catalog parses them once into an indexed table, with the size and mtime of
+every regular file of the float directories (files with other names are kept
+too, without timestamp or cycle). A refresh only rescans the float directories
+whose mtime changed (a directory mtime moves whenever an entry is added, removed
+or renamed, as rsync does when it replaces a file), so keeping it up to date
+costs one ``stat`` per float instead of a walk of the whole archive. A file
+rewritten in place (``rsync --inplace``) does not move the directory mtime and
+is not seen.
+
+:class:`~.state.InputState` reads the fingerprints of a float from the catalog
+(:meth:`ArchiveCatalog.snapshot`) instead of listing its directory.
+"""
+
+import os
+import re
+import sqlite3
+import threading
+from datetime import datetime, timezone
+from pathlib import Path
+
+from pydantic import BaseModel
+
+_SBD_RE = re.compile(r"^co_(\d{8}T\d{6}Z)_(\w+?)_(\d{6})_(\d{6})_(\d+)\.txt$")
+_RUDICS_RE = re.compile(r"^(\d{6})_(\d{6})_(\w+?)_(\d{5})\.bin$")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    imei TEXT NOT NULL,
+    name TEXT NOT NULL,
+    timestamp TEXT,
+    cycle INTEGER,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    PRIMARY KEY (imei, name)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS files_by_time ON files (imei, timestamp);
+CREATE INDEX IF NOT EXISTS files_by_cycle ON files (imei, cycle);
+CREATE TABLE IF NOT EXISTS directories (
+    imei TEXT PRIMARY KEY,
+    mtime_ns INTEGER NOT NULL
+);
+"""
+
+# Horodatage normalisé (tri lexicographique = tri chronologique)
+_TIMESTAMP_FORMAT = "%Y%m%dT%H%M%SZ"
+
+
+class ArchiveFile(BaseModel):
+    """One archive file, as described by its name, with its size and mtime."""
+
+    imei: str
+    name: str
+    timestamp: str
+    cycle: int
+    size: int | None = None
+    mtime_ns: int | None = None
+
+    @property
+    def time(self) -> datetime:
+        """Transmission time encoded in the name (UTC)."""
+        return datetime.strptime(self.timestamp, _TIMESTAMP_FORMAT).replace(tzinfo=timezone.utc)
+
+
+def parse_archive_name(name: str) -> tuple[str, str, int, int | None] | None:
+    """``(timestamp, imei or login, cycle, size)`` encoded in an archive file name, or None."""
+    if match := _SBD_RE.match(name):
+        timestamp, imei, cycle, _, size = match.groups()
+        return timestamp, imei, int(cycle), int(size)
+    if match := _RUDICS_RE.match(name):
+        day, hour, login, cycle = match.groups()
+        return f"20{day}T{hour}Z", login, int(cycle), None
+    return None
+
+
+def _normalise_time(value: datetime | str) -> str:
+    if isinstance(value, str):
+        return value
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc)
+    return value.strftime(_TIMESTAMP_FORMAT)
+
+
+class ArchiveCatalog:
+    """Indexed view of an rsync archive, stored in an SQLite database.
+
+    Args:
+        archive_directory: Root of the archive, holding one sub-directory per IMEI (or RUDICS login).
+        database: SQLite file of the catalog (``":memory:"`` for a throw-away one).
+    """
+
+    def __init__(self, archive_directory: str | Path, database: str | Path = ":memory:"):
+        """Open (and create if needed) the catalog database."""
+        self.archive_directory = Path(archive_directory)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(str(database), check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(_SCHEMA)
+
+    def close(self) -> None:
+        """Close the database."""
+        with self._lock:
+            self._db.close()
+
+    def __enter__(self) -> "ArchiveCatalog":
+        """Use the catalog as a context manager."""
+        return self
+
+    def __exit__(self, *exc) -> None:
+        """Close the catalog."""
+        self.close()
+
+    # -- mise à jour ----------------------------------------------------------
+    def refresh(self, imei: str | None = None) -> int:
+        """Bring the catalog up to date with the archive; returns the number of files added, changed or removed.
+
+        Only directories whose mtime changed since the last refresh are listed again.
+        """
+        if imei is not None:
+            directories = [self.archive_directory / imei]
+        else:
+            with os.scandir(self.archive_directory) as entries:
+                directories = [Path(e.path) for e in entries if e.is_dir()]
+        with self._lock:
+            known = dict(self._db.execute("SELECT imei, mtime_ns FROM directories"))
+            changes = 0
+            for directory in directories:
+                try:
+                    mtime_ns = directory.stat().st_mtime_ns
+                except FileNotFoundError:
+                    changes += self._forget(directory.name)
+                    continue
+                if known.get(directory.name) != mtime_ns:
+                    changes += self._rescan(directory, mtime_ns)
+            if imei is None:
+                for gone in known.keys() - {d.name for d in directories}:
+                    changes += self._forget(gone)
+            self._db.commit()
+        return changes
+
+    def _rescan(self, directory: Path, mtime_ns: int) -> int:
+        key = directory.name
+        indexed = {
+            name: (size, file_mtime_ns)
+            for name, size, file_mtime_ns in self._db.execute(
+                "SELECT name, size, mtime_ns FROM files WHERE imei = ?", (key,)
+            )
+        }
+        present: set[str] = set()
+        upserts = []
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                if not entry.is_file():
+                    continue
+                present.add(entry.name)
+                st = entry.stat()
+                # fichier nouveau ou remplacé (rsync écrit un fichier temporaire puis le renomme)
+                if indexed.get(entry.name) == (st.st_size, st.st_mtime_ns):
+                    continue
+                timestamp, _, cycle, _ = parse_archive_name(entry.name) or (None, None, None, None)
+                upserts.append((key, entry.name, timestamp, cycle, st.st_size, st.st_mtime_ns))
+        removed = [(key, name) for name in indexed.keys() - present]
+        self._db.executemany("INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?, ?)", upserts)
+        self._db.executemany("DELETE FROM files WHERE imei = ? AND name = ?", removed)
+        self._db.execute("INSERT OR REPLACE INTO directories VALUES (?, ?)", (key, mtime_ns))
+        return len(upserts) + len(removed)
+
+    def _forget(self, imei: str) -> int:
+        removed = self._db.execute("DELETE FROM files WHERE imei = ?", (imei,)).rowcount
+        self._db.execute("DELETE FROM directories WHERE imei = ?", (imei,))
+        return removed
+
+    # -- requêtes -------------------------------------------------------------
+    def _select(self, where: str, params: tuple) -> list[ArchiveFile]:
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT imei, name, timestamp, cycle, size, mtime_ns FROM files"
+                f" WHERE timestamp IS NOT NULL AND {where} ORDER BY timestamp, name",
+                params,
+            ).fetchall()
+        return [ArchiveFile(imei=i, name=n, timestamp=t, cycle=c, size=s, mtime_ns=mt) for i, n, t, c, s, mt in rows]
+
+    def files(self, imei: str) -> list[ArchiveFile]:
+        """Every archive file of ``imei``, in transmission order."""
+        return self._select("imei = ?", (imei,))
+
+    def new_files(self, imei: str, since: datetime | str) -> list[ArchiveFile]:
+        """Files of ``imei`` transmitted after ``since`` (a datetime or a ``yyyymmddTHHMMSSZ`` string)."""
+        return self._select("imei = ? AND timestamp > ?", (imei, _normalise_time(since)))
+
+    def cycle_files(self, imei: str, cycle: int) -> list[ArchiveFile]:
+        """Files of ``imei`` holding data of ``cycle``."""
+        return self._select("imei = ? AND cycle = ?", (imei, cycle))
+
+    def cycles(self, imei: str) -> list[int]:
+        """Cycle numbers present in the archive of ``imei``."""
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT DISTINCT cycle FROM files WHERE imei = ? AND cycle IS NOT NULL ORDER BY cycle", (imei,)
+            )
+            return [cycle for (cycle,) in rows]
+
+    def last_timestamp(self, imei: str) -> str | None:
+        """Most recent transmission timestamp of ``imei``."""
+        with self._lock:
+            (timestamp,) = self._db.execute("SELECT MAX(timestamp) FROM files WHERE imei = ?", (imei,)).fetchone()
+        return timestamp
+
+    def snapshot(self, imei: str) -> dict[str, list]:
+        """``{name: [size, mtime_ns]}`` of every file of ``imei``, as :meth:`~.state.InputState.snapshot` lists them."""
+        with self._lock:
+            rows = self._db.execute("SELECT name, size, mtime_ns FROM files WHERE imei = ?", (imei,))
+            return {name: [size, mtime_ns] for name, size, mtime_ns in rows}
+
+    def imeis(self) -> list[str]:
+        """Every IMEI (or RUDICS login) with at least one file."""
+        with self._lock:
+            return [imei for (imei,) in self._db.execute("SELECT DISTINCT imei FROM files ORDER BY imei")]
@@ -0,0 +1,371 @@
+"""Comparison of two trees of NetCDF outputs, e.g. before and after a decoder upgrade.
+
+Files are compared in parallel processes. Each comparison first checks the raw
+bytes: identical files, the common case between two decoder versions, are not
+decoded at all. Otherwise the headers are compared (dimensions, attributes
+except the volatile ones, variable declarations). Then each variable is read by
+chunks from both files, so the memory used does not depend on the file size.
+Chunks whose bytes match are skipped, and the others are compared value by
+value with ``atol``/``rtol`` tolerances (NaN equals NaN).
+
+Classic files are read with :mod:`.netcdf`. NetCDF-4 files need ``netCDF4``,
+and numpy speeds up the value comparisons when it is installed.
+"""
+
+import filecmp
+import math
+import os
+import struct
+import sys
+from array import array
+from collections.abc import Iterator
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from pathlib import Path
+
+from pydantic import BaseModel, Field
+
+from .netcdf import (
+    NC_TYPES,
+    VOLATILE_GLOBALS,
+    VOLATILE_VARIABLES,
+    NcHeader,
+    NetcdfFormatError,
+    iter_variable_data,
+    read_header,
+)
+from .state import atomic_write_text
+
+try:  # optionnel : accélère la comparaison des blocs différents
+    import numpy as np
+except ImportError:  # pragma: no cover - numpy absent
+    np = None
+
+# Statuts d'un fichier : octets identiques, égal aux tolérances près, différent, illisible
+EQUAL_STATUSES = ("identical", "equal")
+
+
+class VariableDiff(BaseModel):
+    """Values of a variable that differ beyond the tolerances."""
+
+    name: str
+    mismatches: int = 0
+    # Indice (à plat) de la première valeur différente
+    first_index: int | None = None
+    max_abs_diff: float | None = None
+
+
+class FileDiff(BaseModel):
+    """Outcome of the comparison of one file."""
+
+    path: str
+    status: str = "identical"
+    differences: list[str] = Field(default_factory=list)
+    variables: list[VariableDiff] = Field(default_factory=list)
+
+    @property
+    def equal(self) -> bool:
+        """True when the files match (byte for byte or within the tolerances)."""
+        return self.status in EQUAL_STATUSES
+
+
+class ComparisonReport(BaseModel):
+    """Comparison of two output trees; only the files that do not match are detailed."""
+
+    test_directory: str
+    reference_directory: str
+    only_in_test: list[str] = Field(default_factory=list)
+    only_in_reference: list[str] = Field(default_factory=list)
+    counts: dict[str, int] = Field(default_factory=dict)
+    files: list[FileDiff] = Field(default_factory=list)
+
+    @property
+    def equal(self) -> bool:
+        """True when both trees hold the same files and they all match."""
+        return not (self.only_in_test or self.only_in_reference or self.files)
+
+    def summary(self) -> str:
+        """One-line report."""
+        counts = ", ".join(f"{count} {status}" for status, count in sorted(self.counts.items()))
+        return (
+            f"{sum(self.counts.values())} files compared ({counts or 'none'}), "
+            f"{len(self.only_in_test)} only in test, {len(self.only_in_reference)} only in reference"
+        )
+
+    def write(self, path: str | Path) -> None:
+        """Save the report as JSON (atomic replacement)."""
+        atomic_write_text(Path(path), self.model_dump_json(indent=2))
+
+
+# -- valeurs ------------------------------------------------------------------
+
+
+def _values(data: bytes, code: str) -> list:
+    values = array(code)
+    if values.itemsize != struct.calcsize(code):  # pragma: no cover - plateformes exotiques
+        return list(struct.unpack(f">{len(data) // struct.calcsize(code)}{code}", data))
+    values.frombytes(data)
+    if sys.byteorder == "little":
+        values.byteswap()
+    return values.tolist()
+
+
+def _close(a: float, b: float, atol: float, rtol: float) -> bool:
+    if a == b or (math.isnan(a) and math.isnan(b)):
+        return True
+    return abs(a - b) <= atol + rtol * abs(b)
+
+
+def _chunk_mismatches(test: bytes, ref: bytes, code: str, atol: float, rtol: float) -> tuple[int, int | None, float]:
+    """Number of differing values of two chunks, index of the first one and largest absolute difference."""
+    if code == "c":
+        diffs = [i for i, (a, b) in enumerate(zip(test, ref, strict=True)) if a != b]
+        return len(diffs), diffs[0] if diffs else None, 0.0
+    if np is not None:
+        a = np.frombuffer(test, dtype=f">{code}").astype(np.float64)
+        b = np.frombuffer(ref, dtype=f">{code}").astype(np.float64)
+        bad = ~np.isclose(a, b, atol=atol, rtol=rtol, equal_nan=True)
+        indexes = np.flatnonzero(bad)
+        if not indexes.size:
+            return 0, None, 0.0
+        with np.errstate(invalid="ignore"):
+            largest = float(np.nanmax(np.abs(a[bad] - b[bad]))) if np.isfinite(a[bad] - b[bad]).any() else math.inf
+        return int(indexes.size), int(indexes[0]), largest
+    diffs = [
+        (i, abs(a - b))
+        for i, (a, b) in enumerate(zip(_values(test, code), _values(ref, code), strict=True))
+        if not _close(a, b, atol, rtol)
+    ]
+    largest = max((d for _, d in diffs if not math.isnan(d)), default=math.inf if diffs else 0.0)
+    return len(diffs), diffs[0][0] if diffs else None, largest
+
+
+def _aligned_chunks(path: Path, header: NcHeader, name: str, chunk_size: int) -> Iterator[bytes]:
+    variable = header.variable(name)
+    with open(path, "rb") as f:
+        yield from iter_variable_data(
+            f, header, variable, max(1, chunk_size // variable.item_size) * variable.item_size
+        )
+
+
+def _compare_variable(
+    test: Path,
+    ref: Path,
+    headers: tuple[NcHeader, NcHeader],
+    name: str,
+    tolerances: tuple[float, float],
+    chunk_size: int,
+) -> VariableDiff | None:
+    code = NC_TYPES[headers[1].variable(name).nc_type][0]
+    diff = VariableDiff(name=name, max_abs_diff=0.0)
+    offset = 0
+    chunks = zip(
+        _aligned_chunks(test, headers[0], name, chunk_size),
+        _aligned_chunks(ref, headers[1], name, chunk_size),
+        strict=True,
+    )
+    for test_chunk, ref_chunk in chunks:
+        if test_chunk != ref_chunk:
+            count, first, largest = _chunk_mismatches(test_chunk, ref_chunk, code, *tolerances)
+            if count:
+                diff.mismatches += count
+                diff.first_index = diff.first_index if diff.first_index is not None else offset + first
+                diff.max_abs_diff = max(diff.max_abs_diff, largest)
+        offset += len(test_chunk) // struct.calcsize(code)
+    if not diff.mismatches:
+        return None
+    if code == "c":
+        diff.max_abs_diff = None
+    return diff
+
+
+# -- fichiers -----------------------------------------------------------------
+
+
+def _header_differences(test: NcHeader, ref: NcHeader, ignore_globals: frozenset[str]) -> list[str]:
+    differences = []
+    if test.dimensions != ref.dimensions:
+        differences.append(f"dimensions: {test.dimensions} != {ref.dimensions}")
+    for name in sorted((test.attributes.keys() | ref.attributes.keys()) - ignore_globals):
+        if test.attributes.get(name) != ref.attributes.get(name):
+            differences.append(
+                f"global attribute {name}: {test.attributes.get(name)!r} != {ref.attributes.get(name)!r}"
+            )
+    test_vars = {v.name: v for v in test.variables}
+    ref_vars = {v.name: v for v in ref.variables}
+    for name in sorted(test_vars.keys() ^ ref_vars.keys()):
+        differences.append(f"variable {name} only in {'test' if name in test_vars else 'reference'}")
+    for name in sorted(test_vars.keys() & ref_vars.keys()):
+        t, r = test_vars[name], ref_vars[name]
+        if (t.nc_type, t.dimensions, t.shape) != (r.nc_type, r.dimensions, r.shape):
+            differences.append(f"variable {name}: type or shape differs")
+        elif t.attributes != r.attributes:
+            differences.append(f"variable {name}: attributes differ")
+    return differences
+
+
+def _comparable_variables(test: NcHeader, ref: NcHeader, ignore_variables: frozenset[str]) -> list[str]:
+    ref_vars = {v.name: v for v in ref.variables}
+    return [
+        v.name
+        for v in test.variables
+        if v.name in ref_vars
+        and v.name not in ignore_variables
+        and (v.nc_type, v.shape) == (ref_vars[v.name].nc_type, ref_vars[v.name].shape)
+    ]
+
+
+def compare_files(
+    test: str | Path,
+    reference: str | Path,
+    atol: float = 0.0,
+    rtol: float = 0.0,
+    ignore_globals: frozenset[str] = VOLATILE_GLOBALS,
+    ignore_variables: frozenset[str] = VOLATILE_VARIABLES,
+    chunk_size: int = 4 * 1024 * 1024,
+    name: str | None = None,
+) -> FileDiff:
+    """Compare two NetCDF files.
+
+    Args:
+        test: File to check.
+        reference: Expected file.
+        atol: Absolute tolerance on numeric values.
+        rtol: Relative tolerance on numeric values.
+        ignore_globals: Global attributes left out (volatile ones by default).
+        ignore_variables: Variables whose values are left out (file dates by default).
+        chunk_size: Bytes of a variable read at once from each file.
+        name: Name of the file in the report (``test`` by default).
+    """
+    test, reference = Path(test), Path(reference)
+    diff = FileDiff(path=name or str(test))
+    if filecmp.cmp(test, reference, shallow=False):
+        return diff
+    try:
+        headers = read_header(test), read_header(reference)
+    except NetcdfFormatError:
+        return _compare_netcdf4(
+            test, reference, diff, (atol, rtol), frozenset(ignore_globals), frozenset(ignore_variables), chunk_size
+        )
+    except OSError as e:
+        diff.status, diff.differences = "error", [str(e)]
+        return diff
+    diff.differences = _header_differences(*headers, frozenset(ignore_globals))
+    for variable in _comparable_variables(*headers, frozenset(ignore_variables)):
+        variable_diff = _compare_variable(test, reference, headers, variable, (atol, rtol), chunk_size)
+        if variable_diff is not None:
+            diff.variables.append(variable_diff)
+    diff.status = "different" if diff.differences or diff.variables else "equal"
+    return diff
+
+
+def _compare_netcdf4_variable(tv, rv, atol: float, rtol: float, chunk_size: int) -> VariableDiff | None:
+    diff = VariableDiff(name=tv.name, max_abs_diff=0.0)
+    # lecture par tranches de la première dimension
+    rows = max(1, chunk_size // max(1, tv[:1].nbytes)) if tv.ndim else 1
+    offset = 0
+    for start in range(0, tv.shape[0] if tv.ndim else 1, rows):
+        part = slice(start, start + rows) if tv.ndim else ()
+        a, b = tv[part], rv[part]
+        if a.dtype.kind in "SUO":
+            code, a, b = "c", a.astype("S"), b.astype("S")
+        else:
+            code, a, b = a.dtype.char, a.astype(a.dtype.newbyteorder(">")), b.astype(b.dtype.newbyteorder(">"))
+        count, first, largest = _chunk_mismatches(a.tobytes(), b.tobytes(), code, atol, rtol)
+        if count:
+            diff.mismatches += count
+            diff.first_index = diff.first_index if diff.first_index is not None else offset + first
+            diff.max_abs_diff = max(diff.max_abs_diff, largest)
+        offset += a.size
+    if not diff.mismatches:
+        return None
+    if code == "c":
+        diff.max_abs_diff = None
+    return diff
+
+
+def _compare_netcdf4(
+    test: Path,
+    reference: Path,
+    diff: FileDiff,
+    tolerances: tuple[float, float],
+    ignore_globals: frozenset[str],
+    ignore_variables: frozenset[str],
+    chunk_size: int,
+) -> FileDiff:
+    try:
+        from netCDF4 import Dataset  # dépendance optionnelle, pour les fichiers NetCDF-4
+    except ImportError:
+        diff.status, diff.differences = "error", ["not NetCDF classic files and netCDF4 is not installed"]
+        return diff
+    with Dataset(test, "r") as tds, Dataset(reference, "r") as rds:
+        tds.set_auto_maskandscale(False)
+        rds.set_auto_maskandscale(False)
+        for attr in sorted((set(tds.ncattrs()) | set(rds.ncattrs())) - ignore_globals):
+            if str(getattr(tds, attr, None)) != str(getattr(rds, attr, None)):
+                diff.differences.append(f"global attribute {attr} differs")
+        for name in sorted(set(tds.variables) ^ set(rds.variables)):
+            diff.differences.append(f"variable {name} only in {'test' if name in tds.variables else 'reference'}")
+        for name in sorted((set(tds.variables) & set(rds.variables)) - ignore_variables):
+            tv, rv = tds.variables[name], rds.variables[name]
+            if (tv.dtype, tv.shape) != (rv.dtype, rv.shape):
+                diff.differences.append(f"variable {name}: type or shape differs")
+                continue
+            variable_diff = _compare_netcdf4_variable(tv, rv, *tolerances, chunk_size)
+            if variable_diff is not None:
+                diff.variables.append(variable_diff)
+    diff.status = "different" if diff.differences or diff.variables else "equal"
+    return diff
+
+
+# -- arborescences --------------------------------------------------------------
+
+
+def _compare_task(compare, paths: tuple[Path, Path, str]) -> FileDiff:
+    test, reference, name = paths
+    try:
+        return compare(test, reference, name=name)
+    except (OSError, ValueError, KeyError) as e:
+        return FileDiff(path=name, status="error", differences=[str(e)])
+
+
+def compare_trees(
+    test_directory: str | Path,
+    reference_directory: str | Path,
+    workers: int | None = None,
+    **options,
+) -> ComparisonReport:
+    """Compare every ``*.nc`` file of two trees, matched by relative path.
+
+    Args:
+        test_directory: Outputs to check.
+        reference_directory: Expected outputs.
+        workers: Processes comparing files at the same time (CPU count by default; 1 compares in this process).
+        **options: Passed to :func:`compare_files` (``atol``, ``rtol``, ``ignore_variables``...).
+    """
+    test_directory, reference_directory = Path(test_directory), Path(reference_directory)
+    test_files = {p.relative_to(test_directory).as_posix(): p for p in test_directory.rglob("*.nc")}
+    ref_files = {p.relative_to(reference_directory).as_posix(): p for p in reference_directory.rglob("*.nc")}
+    report = ComparisonReport(
+        test_directory=str(test_directory),
+        reference_directory=str(reference_directory),
+        only_in_test=sorted(test_files.keys() - ref_files.keys()),
+        only_in_reference=sorted(ref_files.keys() - test_files.keys()),
+    )
+    tasks = [(test_files[name], ref_files[name], name) for name in sorted(test_files.keys() & ref_files.keys())]
+    task = partial(_compare_task, partial(compare_files, **options))
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(tasks) < 2:
+        diffs = map(task, tasks)
+    else:
+        pool = ProcessPoolExecutor(max_workers=min(workers, len(tasks)))
+        diffs = pool.map(task, tasks, chunksize=max(1, len(tasks) // (workers * 8)))
+    try:
+        for diff in diffs:
+            report.counts[diff.status] = report.counts.get(diff.status, 0) + 1
+            if not diff.equal:
+                report.files.append(diff)
+    finally:
+        if workers != 1 and len(tasks) >= 2:
+            pool.shutdown(cancel_futures=True)
+    return report
@@ -1,6 +1,42 @@
+import hashlib
 import json
+from collections.abc import Iterable
 from pathlib import Path
 
+from .state import atomic_write_text, file_lock
+
+
+def write_json_if_changed(path: str | Path, data: dict) -> bool:
+    """Write ``data`` to ``path`` atomically, unless the file already holds the same content.
+
+    Returns:
+        bool: True if the file was (re)written.
+    """
+    path = Path(path)
+    text = json.dumps(data, indent=4, ensure_ascii=False)
+    digest = hashlib.sha256(text.encode("utf-8")).hexdigest()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with file_lock(path):
+        try:
+            if hashlib.sha256(path.read_bytes()).hexdigest() == digest:
+                return False
+        except FileNotFoundError:
+            pass
+        atomic_write_text(path, text)
+    return True
+
+
+def _float_ids(info: dict) -> tuple[str, str]:
+    wmo = info.get("WMO")
+    ptt = info.get("PTT")
+
+    if not wmo:
+        raise ValueError("Info dictionary must contain 'WMO' key")
+    if not ptt:
+        raise ValueError("Info dictionary must contain 'PTT' key")
+
+    return str(wmo).strip(), str(ptt).strip()
+
 
 def save_info_meta_conf(
     config_dir: str,
@@ -10,8 +46,8 @@ def save_info_meta_conf(
     meta: dict,
     decoder_conf: dict,
 ):
-    """
-    Save info and meta dictionaries into specified directory structure.
+    """Save info and meta dictionaries into specified directory structure.
+
     Extracts WMO and PTT from the info dictionary.
 
     Parameters:
@@ -28,19 +64,8 @@ def save_info_meta_conf(
     Raises:
         ValueError: If WMO or PTT keys are missing from info dictionary.
     """
-
     # Extract WMO and PTT from info dictionary
-    wmo = info.get("WMO")
-    ptt = info.get("PTT")
-
-    if not wmo:
-        raise ValueError("Info dictionary must contain 'WMO' key")
-    if not ptt:
-        raise ValueError("Info dictionary must contain 'PTT' key")
-
-    # Convert to strings and clean up
-    wmo = str(wmo).strip()
-    ptt = str(ptt).strip()
+    wmo, ptt = _float_ids(info)
 
     directories = {
         "json_float_info": Path(float_info_dir),
@@ -57,17 +82,10 @@ def save_info_meta_conf(
     conf_file = directories["config"] / "decoder_conf.json"
 
     try:
-        # Write info file
-        with open(info_file, "w", encoding="utf-8") as f:
-            json.dump(info, f, indent=4, ensure_ascii=False)
-
-        # Write meta file
-        with open(meta_file, "w", encoding="utf-8") as f:
-            json.dump(meta, f, indent=4, ensure_ascii=False)
-
-        # Write decoder configuration file
-        with open(conf_file, "w", encoding="utf-8") as f:
-            json.dump(decoder_conf, f, indent=4, ensure_ascii=False)
+        # Atomic writes, skipped when the content did not change
+        write_json_if_changed(info_file, info)
+        write_json_if_changed(meta_file, meta)
+        write_json_if_changed(conf_file, decoder_conf)
 
         print(f"Successfully saved info , meta and conf files for WMO {wmo}, PTT {ptt}")
 
@@ -78,4 +96,51 @@ def save_info_meta_conf(
         }
 
     except Exception as e:
-        raise IOError(f"Failed to save configuration files: {e}")
+        raise OSError(f"Failed to save configuration files: {e}") from e
+
+
+def save_fleet_info_meta_conf(
+    config_dir: str,
+    float_info_dir: str,
+    float_meta_dir: str,
+    floats: Iterable[tuple[dict, dict]],
+    decoder_conf: dict | None = None,
+) -> dict:
+    """Bulk version of save_info_meta_conf for many floats at once.
+
+    Every file is written through a temporary file and an atomic rename, under a
+    file lock, and only when its content changed.
+
+    Parameters:
+        config_dir (str): Base configuration directory for all floats.
+        float_info_dir (str): Directory to save float info JSON files.
+        float_meta_dir (str): Directory to save float meta JSON files.
+        floats (iterable): (info, meta) dictionary pairs, one per float.
+        decoder_conf (dict): Decoder configuration dictionary to save (written once, optional).
+
+    Returns:
+        dict: Lists of "written" and "unchanged" file paths.
+
+    Raises:
+        ValueError: If WMO or PTT keys are missing from an info dictionary
+            (checked for every float before anything is written).
+    """
+    info_dir, meta_dir = Path(float_info_dir), Path(float_meta_dir)
+    targets: list[tuple[Path, dict]] = []
+    for info, meta in floats:
+        wmo, ptt = _float_ids(info)
+        targets.append((info_dir / f"{wmo}_{ptt}_info.json", info))
+        targets.append((meta_dir / f"{wmo}_meta.json", meta))
+    if decoder_conf is not None:
+        targets.append((Path(config_dir) / "decoder_conf.json", decoder_conf))
+
+    summary: dict[str, list[str]] = {"written": [], "unchanged": []}
+    try:
+        for path, data in targets:
+            key = "written" if write_json_if_changed(path, data) else "unchanged"
+            summary[key].append(str(path.absolute()))
+    except OSError as e:
+        raise OSError(f"Failed to save configuration files: {e}") from e
+
+    print(f"Saved {len(summary['written'])} file(s), {len(summary['unchanged'])} unchanged")
+    return summary
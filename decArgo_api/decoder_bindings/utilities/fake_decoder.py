@@ -0,0 +1,346 @@
+"""Offline stand-in for the MATLAB decoder, to load-test the bindings without a MATLAB Runtime.
+
+:func:`install_fake_decoder` writes a ``run_decode_argo_2_nc_rt.sh`` wrapper and
+its ``decode_argo_2_nc_rt`` binary (a Python script) into a directory. The
+wrapper takes the MATLAB Runtime root as ``$1``, like the real one. The binary
+takes the same name/value arguments as ``decode_argo_2_nc_rt`` (``configfile``,
+``xmlreport``, ``floatwmo``, ``rsynclog``, ``DIR_*`` overrides...) and reads the
+JSON configuration. It then writes, where the real decoder would:
+
+* the NetCDF files of the float (``<wmo>_meta.nc``, ``<wmo>_Rtraj.nc``,
+  ``<wmo>_tech.nc`` and ``profiles/R<wmo>_<cycle>.nc``). There is one new cycle
+  per input file listed in the rsync lists of the run, numbered after the
+  profiles already present;
+* the ``decode_argo_2_nc_rt_*.log`` file, with ``INFO:``/``WARNING:`` lines;
+* the XML report, in the layout of ``finalize_xml_report.m``;
+* the processed rsync lists, appended to
+  ``IRIDIUM_DATA_DIRECTORY/<imei>_<wmo>/history_of_processed_data/processed_rsync_log_<wmo>.txt``.
+  As with the real decoder, the lists already there are left out of later runs.
+
+Its behaviour is tuned through environment variables:
+
+================================  ==================================================
+``FAKE_DECODER_SECONDS``          run duration (plus ``FAKE_DECODER_SECONDS_PER_CYCLE``)
+``FAKE_DECODER_MEMORY_MB``        memory held (and touched) during the run
+``FAKE_DECODER_CYCLES``           new cycles, instead of counting the input files
+``FAKE_DECODER_LEVELS``           levels of each profile (file size)
+``FAKE_DECODER_WARNINGS``         ``WARNING:`` lines written to the log
+``FAKE_DECODER_FAIL``             ``matlab_error``, ``exit``, ``crash`` or ``hang``
+``FAKE_DECODER_FAIL_WMOS``        comma-separated floats that fail (all by default)
+``FAKE_DECODER_FAIL_RATE``        probability that a float fails (1 by default)
+``FAKE_DECODER_SEED``             seed of the failure draw, made per float
+================================  ==================================================
+
+``matlab_error`` writes a ``nok`` report with a ``matlab_error`` element and
+exits with 0, like the real decoder. ``exit`` exits with code 1 before the report
+is written. ``crash`` leaves a truncated profile, then kills the process with
+SIGSEGV. ``hang`` sleeps until the process is killed (timeouts).
+"""
+
+import json
+import os
+import random
+import signal
+import stat
+import sys
+import time
+import xml.etree.ElementTree as ET
+from pathlib import Path
+
+from pydantic import BaseModel
+
+from .netcdf import write_classic
+from .rsynclog import RsyncLogHistory, parse_rsync_log
+
+FAILURE_MODES = ("matlab_error", "exit", "crash", "hang")
+
+_WRAPPER = """#!/bin/sh
+# run_decode_argo_2_nc_rt.sh de test : lance le décodeur factice posé à côté
+exe_dir=`dirname "$0"`
+if [ "x$1" = "x" ]; then
+  echo Usage:
+  echo    $0 \\<deployedMCRroot\\> args
+  exit 1
+fi
+shift 1
+exec "${exe_dir}/decode_argo_2_nc_rt" "$@"
+"""
+
+_BINARY = """#!{python}
+# decode_argo_2_nc_rt de test (decoder_bindings.utilities.fake_decoder)
+import sys
+
+sys.path.insert(0, {root!r})
+from decoder_bindings.utilities.fake_decoder import main
+
+sys.exit(main(sys.argv[1:]))
+"""
+
+
+class FakeDecoderSettings(BaseModel):
+    """Behaviour of the fake decoder, read from the ``FAKE_DECODER_*`` environment variables."""
+
+    seconds: float = 0.0
+    seconds_per_cycle: float = 0.0
+    memory_mb: int = 0
+    cycles: int | None = None
+    levels: int = 100
+    warnings: int = 0
+    fail: str | None = None
+    fail_wmos: list[str] = []
+    fail_rate: float = 1.0
+    seed: str = ""
+
+    @classmethod
+    def from_environ(cls, environ=os.environ) -> "FakeDecoderSettings":
+        """Settings of the ``FAKE_DECODER_<FIELD>`` variables that are set."""
+        values = {}
+        for name in cls.model_fields:
+            value = environ.get(f"FAKE_DECODER_{name.upper()}")
+            if value:
+                values[name] = [w for w in value.split(",") if w] if name == "fail_wmos" else value
+        return cls(**values)
+
+    def fails(self, wmonum: str) -> bool:
+        """True when the run of ``wmonum`` must fail."""
+        if self.fail not in FAILURE_MODES or (self.fail_wmos and wmonum not in self.fail_wmos):
+            return False
+        return random.Random(f"{self.seed}:{wmonum}").random() < self.fail_rate
+
+
+def install_fake_decoder(directory: str | Path) -> Path:
+    """Write the fake ``run_decode_argo_2_nc_rt.sh`` and ``decode_argo_2_nc_rt`` into ``directory``.
+
+    Returns:
+        The wrapper, to use as ``decoder_executable``.
+    """
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    root = str(Path(__file__).resolve().parents[2])
+    wrapper = directory / "run_decode_argo_2_nc_rt.sh"
+    binary = directory / "decode_argo_2_nc_rt"
+    wrapper.write_text(_WRAPPER, encoding="utf-8")
+    binary.write_text(_BINARY.format(python=sys.executable, root=root), encoding="utf-8")
+    for path in (wrapper, binary):
+        path.chmod(path.stat().st_mode | stat.S_IXUSR | stat.S_IXGRP | stat.S_IXOTH)
+    return wrapper
+
+
+# -- entrées ------------------------------------------------------------------
+
+
+def _float_ptt(conf: dict, wmonum: str) -> str | None:
+    directory = conf.get("DIR_INPUT_JSON_FLOAT_DECODING_PARAMETERS_FILE")
+    if not directory or not Path(directory).is_dir():
+        return None
+    for path in Path(directory).glob(f"{wmonum}_*_info.json"):
+        return path.name[: -len("_info.json")].partition("_")[2]
+    return None
+
+
+def _rsync_lists(conf: dict, rsync_log: str, processed: set[str]) -> list[Path]:
+    """Rsync lists of the run, without those of the float history (``processed``), like the decoder."""
+    directory = Path(conf.get("DIR_INPUT_RSYNC_LOG") or ".")
+    if rsync_log == "all":
+        lists = sorted(directory.rglob("rsync_*.txt"))
+    else:
+        lists = [directory / rsync_log] if (directory / rsync_log).is_file() else sorted(directory.rglob(rsync_log))
+    return [path for path in lists if path.name not in processed]
+
+
+def _input_files(conf: dict, lists: list[Path], ptt: str | None) -> list[str]:
+    """Files of the rsync ``lists`` that concern the float (all of them when its PTT is unknown)."""
+    directory = Path(conf.get("DIR_INPUT_RSYNC_LOG") or ".")
+    files = []
+    for path in lists:
+        own_list = ptt is None or ptt in path.relative_to(directory).parts
+        files += [name for name in parse_rsync_log(path) if own_list or name.startswith(f"{ptt}/")]
+    return files
+
+
+# -- sorties ------------------------------------------------------------------
+
+
+def _now() -> str:
+    return time.strftime("%Y%m%d%H%M%S", time.gmtime())
+
+
+def _write_profile(path: Path, wmonum: str, cycle: int, levels: int) -> None:
+    # valeurs déterministes : seules les dates changent d'un run à l'autre
+    pres = [5.0 + 2.0 * i for i in range(levels)]
+    write_classic(
+        path,
+        {"DATE_TIME": 14, "STRING8": 8, "N_PROF": 1, "N_LEVELS": levels},
+        {
+            "DATE_CREATION": (["DATE_TIME"], _now(), {}),
+            "DATE_UPDATE": (["DATE_TIME"], _now(), {}),
+            "PLATFORM_NUMBER": (["N_PROF", "STRING8"], wmonum.ljust(8), {"long_name": "Float unique identifier"}),
+            "CYCLE_NUMBER": (["N_PROF"], [cycle], {"long_name": "Float cycle number"}),
+            "PRES": (["N_PROF", "N_LEVELS"], pres, {"units": "decibar", "_FillValue": 99999.0}),
+            "TEMP": (
+                ["N_PROF", "N_LEVELS"],
+                [20.0 - p / 100 + cycle / 1000 for p in pres],
+                {"units": "degree_Celsius"},
+            ),
+            "PSAL": (["N_PROF", "N_LEVELS"], [35.0 + p / 10000 for p in pres], {"units": "psu"}),
+        },
+        {"title": "Argo float vertical profile", "history": f"{_now()} creation (fake decoder)"},
+    )
+
+
+def _write_float_file(path: Path, title: str, wmonum: str, cycles: list[int]) -> None:
+    write_classic(
+        path,
+        {"DATE_TIME": 14, "STRING8": 8, "N_CYCLE": max(1, len(cycles))},
+        {
+            "DATE_CREATION": (["DATE_TIME"], _now(), {}),
+            "DATE_UPDATE": (["DATE_TIME"], _now(), {}),
+            "PLATFORM_NUMBER": (["STRING8"], wmonum.ljust(8), {}),
+            "CYCLE_NUMBER": (["N_CYCLE"], cycles or [-1], {"_FillValue": 99999}),
+        },
+        {"title": title, "history": f"{_now()} creation (fake decoder)"},
+    )
+
+
+def _existing_cycles(float_directory: Path, wmonum: str) -> list[int]:
+    cycles = set()
+    for path in (float_directory / "profiles").glob(f"R{wmonum}_*.nc"):
+        # R<wmo>_<nnn>.nc (montée) ou R<wmo>_<nnn>D.nc (descente)
+        number = path.stem.split("_")[1].removesuffix("D")
+        if number.isdigit():
+            cycles.add(int(number))
+    return sorted(cycles)
+
+
+def _record_processed_lists(history_file: Path, lists: list[Path]) -> None:
+    # chemins complets, comme write_processed_rsync_log_file_ir_rudics_sbd_sbd2.m
+    history_file.parent.mkdir(parents=True, exist_ok=True)
+    with open(history_file, "a", encoding="utf-8") as f:
+        f.writelines(f"{path}\n" for path in lists)
+
+
+def _hold(settings: FakeDecoderSettings, cycles: int) -> None:
+    """Hold ``memory_mb`` (every page touched) during the run duration."""
+    ballast = bytearray(settings.memory_mb * 1024 * 1024)
+    ballast[::4096] = b"\x01" * len(range(0, len(ballast), 4096))
+    time.sleep(max(0.0, settings.seconds + settings.seconds_per_cycle * cycles))
+    del ballast
+
+
+def _add(parent: ET.Element, tag: str, text: str) -> ET.Element:
+    element = ET.SubElement(parent, tag)
+    element.text = text
+    return element
+
+
+def _write_report(path: Path, wmonum: str, log: list[str], files: dict[str, list], error: str | None, start: float):
+    root = ET.Element("coriolis_function_report")
+    _add(root, "function", "co041404")
+    _add(root, "comment", "Argo Coriolis Matlab decoder")
+    _add(root, "decoder_version", "fake")
+    _add(root, "date", time.strftime("%d/%m/%Y %H:%M:%S", time.gmtime(start)))
+    float_element = ET.SubElement(root, "float_1")
+    _add(float_element, "float_wmo", wmonum)
+    _add(float_element, "nb_cycles", str(len(files["cycles"])))
+    _add(float_element, "cycle_list", "".join(f"{c} " for c in files["cycles"]))
+    for tag, names in files.items():
+        for name in names if tag != "cycles" else []:
+            _add(float_element, tag, str(name))
+    status = "ok"
+    for line in log:
+        tag, _, text = line.partition(":")
+        tag = {"INFO": "decoding_info", "WARNING": "decoding_warning", "ERROR": "decoding_error"}.get(tag)
+        if tag is not None:
+            _add(root, tag, text.strip())
+            status = "nok" if tag == "decoding_error" else status
+    if error is not None:
+        status = "nok"
+        matlab_error = ET.SubElement(root, "matlab_error")
+        _add(matlab_error, "float_wmo", wmonum)
+        _add(matlab_error, "error_message", error)
+        _add(matlab_error, "stack_line", "Line: 1 File: fake_decoder.py (func: main)")
+    seconds = int(time.time() - start)
+    _add(root, "duration", f"{seconds // 3600:02d}:{seconds // 60 % 60:02d}:{seconds % 60:02d}")
+    _add(root, "status", status)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    ET.ElementTree(root).write(path, encoding="utf-8", xml_declaration=True)
+
+
+def _arguments(argv: list[str]) -> dict[str, str]:
+    if len(argv) % 2:
+        raise ValueError(f"arguments must be name/value pairs: {argv}")
+    return dict(zip(argv[::2], argv[1::2], strict=True))
+
+
+def main(argv: list[str] | None = None) -> int:
+    """Decode one float the way ``decode_argo_2_nc_rt`` would, from its name/value arguments."""
+    start = time.time()
+    args = _arguments(sys.argv[1:] if argv is None else argv)
+    settings = FakeDecoderSettings.from_environ()
+    conf = {}
+    if args.get("configfile"):
+        with open(args["configfile"], encoding="utf-8") as f:
+            conf = json.load(f)
+    # les arguments DIR_* surchargent la configuration, comme pour le vrai décodeur
+    conf.update({k: v for k, v in args.items() if k.startswith("DIR_")})
+    wmonum = args.get("floatwmo")
+    if not wmonum:
+        print("ERROR: the fake decoder only decodes one float (floatwmo)")
+        return 1
+    report_name = args.get("xmlreport") or f"co041404_{time.strftime('%Y%m%dT%H%M%SZ', time.gmtime(start))}.xml"
+    float_directory = Path(conf.get("DIR_OUTPUT_NETCDF_FILE") or ".") / wmonum
+    ptt = _float_ptt(conf, wmonum)
+    history = RsyncLogHistory(conf["IRIDIUM_DATA_DIRECTORY"]) if ptt and conf.get("IRIDIUM_DATA_DIRECTORY") else None
+    lists = _rsync_lists(conf, args.get("rsynclog", "all"), history.consumed(wmonum, ptt) if history else set())
+    inputs = _input_files(conf, lists, ptt)
+    known = _existing_cycles(float_directory, wmonum)
+    first = known[-1] + 1 if known else 1
+    new_cycles = list(range(first, first + (settings.cycles if settings.cycles is not None else len(inputs))))
+    failure = settings.fail if settings.fails(wmonum) else None
+
+    log = [f"INFO: Float #{wmonum}: {len(new_cycles)} new cycle(s) from {len(inputs)} input file(s)"]
+    log += [f"WARNING: Float #{wmonum} Cycle #{c}: fake warning" for c in new_cycles[: settings.warnings]]
+    for line in log:
+        print(line, flush=True)
+    while failure == "hang":
+        time.sleep(3600)
+    _hold(settings, len(new_cycles))
+    if failure == "exit":
+        print(f"Fake decoder failure for float {wmonum}", file=sys.stderr)
+        return 1
+
+    files = {"cycles": new_cycles, "input_file": inputs, "output_meta_file": [], "output_mono-profile_file": []}
+    files["output_trajectory_file"], files["output_technical_file"] = [], []
+    for cycle in new_cycles:
+        path = float_directory / "profiles" / f"R{wmonum}_{cycle:03d}.nc"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        _write_profile(path, wmonum, cycle, settings.levels)
+        files["output_mono-profile_file"].append(path)
+        if failure == "crash":
+            # fichier à moitié écrit, comme un décodeur tué en pleine écriture
+            with open(path, "r+b") as f:
+                f.truncate(path.stat().st_size // 2)
+            os.kill(os.getpid(), signal.SIGSEGV)
+    float_directory.mkdir(parents=True, exist_ok=True)
+    all_cycles = known + new_cycles
+    for tag, suffix, title in (
+        ("output_meta_file", "meta", "Argo float metadata file"),
+        ("output_trajectory_file", "Rtraj", "Argo float trajectory file"),
+        ("output_technical_file", "tech", "Argo float technical data file"),
+    ):
+        path = float_directory / f"{wmonum}_{suffix}.nc"
+        _write_float_file(path, title, wmonum, all_cycles)
+        files[tag].append(path)
+
+    log_directory = Path(conf.get("DIR_OUTPUT_LOG_FILE") or "/tmp")
+    log_directory.mkdir(parents=True, exist_ok=True)
+    (log_directory / f"decode_argo_2_nc_rt_{report_name[9:-4]}.log").write_text("\n".join(log) + "\n", encoding="utf-8")
+    error = f"Fake MATLAB error while decoding float {wmonum}" if failure == "matlab_error" else None
+    if history is not None and error is None:
+        _record_processed_lists(history.history_file(wmonum, ptt), lists)
+    _write_report(Path(conf.get("DIR_OUTPUT_XML_FILE") or "/tmp") / report_name, wmonum, log, files, error, start)
+    return 0
+
+
+if __name__ == "__main__":  # pragma: no cover
+    sys.exit(main())
@@ -0,0 +1,151 @@
+"""Decode job queue that merges duplicate requests for the same float.
+
+A surfacing float sends several messages minutes apart and each of them asks for
+a decoding. The queue keeps at most one pending job per WMO:
+
+* a request for a WMO already waiting in the queue is merged into that job;
+* a request for a WMO being decoded schedules exactly one follow-up job, started
+  when the current run ends (further requests are merged into the follow-up).
+
+Merged requests share the same :class:`~concurrent.futures.Future`.
+"""
+
+import threading
+from collections import deque
+from collections.abc import Callable
+from concurrent.futures import Future
+from typing import Any
+
+# Gestionnaire d'un job : (wmo, force) -> résultat
+JobHandler = Callable[[str, bool], Any]
+
+
+class _Job:
+    """One pending decoding of a float."""
+
+    __slots__ = ("wmo", "force", "future", "requests")
+
+    def __init__(self, wmo: str, force: bool):
+        self.wmo = wmo
+        self.force = force
+        self.future: Future = Future()
+        self.requests = 1
+
+
+class CoalescingQueue:
+    """FIFO of per-WMO jobs run by ``workers`` threads, with duplicate requests merged.
+
+    Args:
+        handler: Called as ``handler(wmo, force)`` to run one job.
+        workers: Number of jobs running at the same time (never two for one WMO).
+        name: Prefix of the worker thread names.
+    """
+
+    def __init__(self, handler: JobHandler, workers: int = 1, name: str = "decode-queue"):
+        """Start the worker threads."""
+        if workers < 1:
+            raise ValueError("A job queue needs at least one worker.")
+        self._handler = handler
+        self._cond = threading.Condition()
+        self._order: deque[str] = deque()
+        self._queued: dict[str, _Job] = {}
+        self._running: dict[str, _Job] = {}
+        # relances demandées pendant un run, mises en file à la fin de celui-ci
+        self._follow_ups: dict[str, _Job] = {}
+        self._closed = False
+        self.stats = {"requests": 0, "merged": 0, "follow_ups": 0, "runs": 0}
+        self._threads = [threading.Thread(target=self._work, name=f"{name}-{i}", daemon=True) for i in range(workers)]
+        for thread in self._threads:
+            thread.start()
+
+    # -- soumission -----------------------------------------------------------
+    def submit(self, wmo: str, force: bool = False) -> Future:
+        """Request a decoding of ``wmo``; returns the future of the (possibly merged) job."""
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("job queue is closed")
+            self.stats["requests"] += 1
+            job = self._queued.get(wmo) or self._follow_ups.get(wmo)
+            if job is not None:
+                job.force |= force
+                job.requests += 1
+                self.stats["merged"] += 1
+                return job.future
+            job = _Job(wmo, force)
+            if wmo in self._running:
+                self._follow_ups[wmo] = job
+                self.stats["follow_ups"] += 1
+            else:
+                self._enqueue(job)
+            return job.future
+
+    def _enqueue(self, job: _Job) -> None:
+        self._queued[job.wmo] = job
+        self._order.append(job.wmo)
+        self._cond.notify()
+
+    # -- exécution ------------------------------------------------------------
+    def _next_job(self) -> _Job | None:
+        with self._cond:
+            while not self._order and not self._closed:
+                self._cond.wait()
+            if not self._order:
+                return None
+            job = self._queued.pop(self._order.popleft())
+            self._running[job.wmo] = job
+            return job
+
+    def _work(self) -> None:
+        while (job := self._next_job()) is not None:
+            if job.future.set_running_or_notify_cancel():
+                try:
+                    job.future.set_result(self._handler(job.wmo, job.force))
+                except BaseException as e:  # remonté à l'appelant par la future
+                    job.future.set_exception(e)
+            with self._cond:
+                self.stats["runs"] += 1
+                del self._running[job.wmo]
+                follow_up = self._follow_ups.pop(job.wmo, None)
+                if follow_up is not None:
+                    self._enqueue(follow_up)
+                self._cond.notify_all()
+
+    # -- état / arrêt ---------------------------------------------------------
+    def pending(self) -> list[str]:
+        """WMOs waiting in the queue, in order (follow-ups excluded until their run is due)."""
+        with self._cond:
+            return list(self._order)
+
+    def running(self) -> list[str]:
+        """WMOs being decoded."""
+        with self._cond:
+            return list(self._running)
+
+    def join(self, timeout: float | None = None) -> bool:
+        """Wait until every queued job, follow-ups included, is done; False on timeout."""
+        with self._cond:
+            return self._cond.wait_for(lambda: not (self._order or self._running or self._follow_ups), timeout=timeout)
+
+    def close(self, wait: bool = True) -> None:
+        """Stop accepting jobs; with ``wait``, finish the queued ones first, otherwise cancel them."""
+        with self._cond:
+            self._closed = True
+            if not wait:
+                for job in [*self._queued.values(), *self._follow_ups.values()]:
+                    job.future.cancel()
+                self._queued.clear()
+                self._follow_ups.clear()
+                self._order.clear()
+            self._cond.notify_all()
+        if wait:
+            self.join()
+        for thread in self._threads:
+            thread.join()
+
+    def __enter__(self) -> "CoalescingQueue":
+        """Use the queue as a context manager."""
+        return self
+
+    def __exit__(self, *exc) -> None:
+        """Finish the queued jobs and stop the workers."""
+        self.close()
@@ -0,0 +1,103 @@
+"""Per-float advisory locks shared by every decoder run of a node.
+
+A decoder run of a float writes its NetCDF tree (``DIR_OUTPUT_NETCDF_FILE/<wmo>``)
+and its buffer state (``IRIDIUM_DATA_DIRECTORY/<imei>_<wmo>``). Two runs of the
+same float must never overlap, whether they come from the same process, another
+thread or another process: each WMO gets a lock file taken with ``flock``.
+"""
+
+import asyncio
+import fcntl
+import os
+import time
+from collections.abc import AsyncIterator, Iterable, Iterator
+from contextlib import asynccontextmanager, contextmanager
+from pathlib import Path
+
+# Période de réessai quand un verrou est déjà pris
+_RETRY_INTERVAL = 0.1
+
+
+class FloatLockTimeout(TimeoutError):
+    """Raised when a float lock could not be taken in time."""
+
+
+class FloatLocks:
+    """``flock`` based locks, one lock file per WMO in ``directory``."""
+
+    def __init__(self, directory: str | Path):
+        """Use (and create if needed) ``directory``."""
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def _open(self, wmonum: str) -> int:
+        return os.open(self.directory / f"{wmonum}.lock", os.O_RDWR | os.O_CREAT, 0o666)
+
+    @staticmethod
+    def _try_lock(fd: int) -> bool:
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            return False
+        return True
+
+    @staticmethod
+    def _release(fds: list[int]) -> None:
+        for fd in reversed(fds):
+            fcntl.flock(fd, fcntl.LOCK_UN)
+            os.close(fd)
+
+    def _acquire_step(self, wmos: list[str], fds: list[int]) -> bool:
+        """Take the next locks (in ``wmos`` order); False if one is busy."""
+        while len(fds) < len(wmos):
+            fd = self._open(wmos[len(fds)])
+            if not self._try_lock(fd):
+                os.close(fd)
+                return False
+            fds.append(fd)
+        return True
+
+    @contextmanager
+    def hold(self, wmos: Iterable[str], timeout: float | None = None) -> Iterator[None]:
+        """Hold the locks of ``wmos`` (taken in sorted order, so batches cannot deadlock).
+
+        Raises:
+            FloatLockTimeout: If the locks are still busy after ``timeout`` seconds.
+        """
+        ordered = sorted(set(wmos))
+        fds: list[int] = []
+        deadline = None if timeout is None else time.monotonic() + timeout
+        try:
+            while not self._acquire_step(ordered, fds):
+                if deadline is not None and time.monotonic() > deadline:
+                    raise FloatLockTimeout(f"float {ordered[len(fds)]} is locked by another decoder run")
+                time.sleep(_RETRY_INTERVAL)
+            yield
+        finally:
+            self._release(fds)
+
+    @asynccontextmanager
+    async def ahold(self, wmos: Iterable[str], timeout: float | None = None) -> AsyncIterator[None]:
+        """Asyncio counterpart of :meth:`hold` (waits without blocking the event loop)."""
+        ordered = sorted(set(wmos))
+        fds: list[int] = []
+        deadline = None if timeout is None else time.monotonic() + timeout
+        try:
+            while not self._acquire_step(ordered, fds):
+                if deadline is not None and time.monotonic() > deadline:
+                    raise FloatLockTimeout(f"float {ordered[len(fds)]} is locked by another decoder run")
+                await asyncio.sleep(_RETRY_INTERVAL)
+            yield
+        finally:
+            self._release(fds)
+
+    def locked(self, wmonum: str) -> bool:
+        """True if a decoder run currently holds the lock of ``wmonum``."""
+        fd = self._open(wmonum)
+        try:
+            if self._try_lock(fd):
+                fcntl.flock(fd, fcntl.LOCK_UN)
+                return False
+            return True
+        finally:
+            os.close(fd)
@@ -0,0 +1,152 @@
+"""Manifest of the NetCDF files of a float, and publishing of the changed ones only.
+
+Every run rewrites all the NetCDF files of a float, while only those of the new
+cycles actually change. After a run, :class:`OutputPublisher` hashes the files
+of ``<output>/<wmo>/`` with :func:`~.netcdf.content_hash` (dates and history left
+out), compares them with the manifest of the previous publishing and copies (or
+hardlinks) only the new and changed files into ``<destination>/<wmo>/``. Each
+file is written under a temporary name and renamed, so the destination never
+holds a partial file. A file whose size and mtime did not change keeps its
+recorded hash without being read again.
+"""
+
+import os
+import shutil
+from pathlib import Path
+
+from pydantic import BaseModel, Field
+
+from .netcdf import VOLATILE_GLOBALS, VOLATILE_VARIABLES, content_hash
+from .state import atomic_write_text
+
+
+class ManifestEntry(BaseModel):
+    """Content hash of a NetCDF file, with the size and mtime it was computed for."""
+
+    hash: str
+    size: int
+    mtime_ns: int
+
+
+class Manifest(BaseModel):
+    """Published NetCDF files of a float, by path relative to its directory."""
+
+    wmo: str
+    files: dict[str, ManifestEntry] = Field(default_factory=dict)
+
+
+class PublishReport(BaseModel):
+    """Outcome of the publishing of a float."""
+
+    wmo: str
+    new: list[str] = Field(default_factory=list)
+    changed: list[str] = Field(default_factory=list)
+    unchanged: int = 0
+    # Fichiers du manifeste précédent que le run n'a plus produits
+    removed: list[str] = Field(default_factory=list)
+
+    @property
+    def published(self) -> list[str]:
+        """Files copied into the destination."""
+        return self.new + self.changed
+
+
+def publish_file(source: Path, destination: Path, hardlink: bool = False) -> None:
+    """Put ``source`` at ``destination`` through a temporary name and an atomic rename.
+
+    With ``hardlink``, the file is linked instead of copied when both are on the
+    same file system; the source must then be replaced, not rewritten in place,
+    by later runs.
+    """
+    destination.parent.mkdir(parents=True, exist_ok=True)
+    tmp = destination.parent / f".{destination.name}.{os.getpid()}.tmp"
+    tmp.unlink(missing_ok=True)
+    try:
+        if hardlink:
+            try:
+                os.link(source, tmp)
+            except OSError:
+                shutil.copy2(source, tmp)
+        else:
+            shutil.copy2(source, tmp)
+        os.replace(tmp, destination)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+
+
+class OutputPublisher:
+    """Publish the new and changed NetCDF files of a float into a destination tree.
+
+    Args:
+        destination: Root of the published tree (one sub-directory per WMO).
+        manifest_directory: Where the ``<wmo>_manifest.json`` files are kept;
+            ``<destination>/.manifests`` by default (to exclude from transfers).
+        hardlink: Link the files instead of copying them when possible.
+        delete_removed: Also delete from the destination the files a run no longer produces.
+    """
+
+    def __init__(
+        self,
+        destination: str | Path,
+        manifest_directory: str | Path | None = None,
+        hardlink: bool = False,
+        delete_removed: bool = False,
+    ):
+        """Use (and create if needed) the destination and manifest directories."""
+        self.destination = Path(destination)
+        self.manifest_directory = (
+            Path(manifest_directory) if manifest_directory is not None else self.destination / ".manifests"
+        )
+        self.manifest_directory.mkdir(parents=True, exist_ok=True)
+        self.hardlink = hardlink
+        self.delete_removed = delete_removed
+        self.volatile_globals = VOLATILE_GLOBALS
+        self.volatile_variables = VOLATILE_VARIABLES
+
+    def _path(self, wmonum: str) -> Path:
+        return self.manifest_directory / f"{wmonum}_manifest.json"
+
+    def load(self, wmonum: str) -> Manifest:
+        """Manifest of the last publishing of ``wmonum`` (empty if none)."""
+        try:
+            return Manifest.model_validate_json(self._path(wmonum).read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return Manifest(wmo=wmonum)
+
+    def build(self, wmonum: str, source: Path, previous: Manifest | None = None) -> Manifest:
+        """Manifest of the NetCDF files under ``source``, reusing the hashes of ``previous`` for untouched files."""
+        manifest = Manifest(wmo=wmonum)
+        known = previous.files if previous is not None else {}
+        for path in sorted(source.rglob("*.nc")):
+            if not path.is_file():
+                continue
+            name = path.relative_to(source).as_posix()
+            st = path.stat()
+            entry = known.get(name)
+            if entry is None or (entry.size, entry.mtime_ns) != (st.st_size, st.st_mtime_ns):
+                digest = content_hash(path, self.volatile_globals, self.volatile_variables)
+                entry = ManifestEntry(hash=digest, size=st.st_size, mtime_ns=st.st_mtime_ns)
+            manifest.files[name] = entry
+        return manifest
+
+    def publish(self, wmonum: str, source: str | Path) -> PublishReport:
+        """Copy the new and changed NetCDF files of ``source`` (``<output>/<wmo>``) to ``<destination>/<wmo>``."""
+        source = Path(source)
+        previous = self.load(wmonum)
+        current = self.build(wmonum, source, previous)
+        target = self.destination / wmonum
+        report = PublishReport(wmo=wmonum)
+        for name, entry in current.files.items():
+            before = previous.files.get(name)
+            if before is not None and before.hash == entry.hash and (target / name).is_file():
+                report.unchanged += 1
+                continue
+            publish_file(source / name, target / name, self.hardlink)
+            (report.changed if before is not None else report.new).append(name)
+        report.removed = sorted(previous.files.keys() - current.files.keys())
+        if self.delete_removed:
+            for name in report.removed:
+                (target / name).unlink(missing_ok=True)
+        atomic_write_text(self._path(wmonum), current.model_dump_json())
+        return report
@@ -0,0 +1,404 @@
+"""Reading of NetCDF classic files without the NetCDF library.
+
+The decoder writes its outputs in the classic formats (CDF-1, and the CDF-2
+64-bit offset and CDF-5 64-bit data variants). Their header is small and fully
+documented, so it is read here with :mod:`struct`; the data of a variable is
+then read by chunks straight from the file. :func:`content_hash` uses it to
+fingerprint a file without the attributes and variables that change at every run
+(creation and update dates, history...). Files of another format (NetCDF-4/HDF5)
+are read with ``netCDF4`` when it is installed, and hashed byte for byte otherwise.
+
+:func:`write_classic` writes small classic files (fixed dimensions only), e.g. for
+tests.
+"""
+
+import hashlib
+import json
+import math
+import struct
+from collections.abc import Iterable, Iterator
+from pathlib import Path
+from typing import Any, BinaryIO
+
+from pydantic import BaseModel, Field
+
+from .state import file_sha256
+
+# Attributs globaux réécrits à chaque génération du fichier (cf. tests d'intégration)
+VOLATILE_GLOBALS = frozenset(
+    {
+        "history",
+        "date_created",
+        "creation_date",
+        "last_update",
+        "date_update",
+        "uuid",
+        "checksum",
+        "processing_history",
+        "file_generation_time",
+    }
+)
+# Variables Argo horodatant la génération du fichier (HISTORY_DATE : date des tests temps réel)
+VOLATILE_VARIABLES = frozenset({"DATE_CREATION", "DATE_UPDATE", "HISTORY_DATE"})
+
+# nc_type -> (code struct, taille)
+NC_TYPES = {
+    1: ("b", 1),
+    2: ("c", 1),
+    3: ("h", 2),
+    4: ("i", 4),
+    5: ("f", 4),
+    6: ("d", 8),
+    7: ("B", 1),
+    8: ("H", 2),
+    9: ("I", 4),
+    10: ("q", 8),
+    11: ("Q", 8),
+}
+NC_CHAR, NC_INT, NC_DOUBLE = 2, 4, 6
+_DIMENSION, _VARIABLE, _ATTRIBUTE = 10, 11, 12
+_STREAMING = 0xFFFFFFFF
+
+
+class NetcdfFormatError(ValueError):
+    """Raised when a file is not a (well-formed) NetCDF classic file."""
+
+
+class NcVariable(BaseModel):
+    """Declaration of a variable and location of its data."""
+
+    name: str
+    dimensions: list[str]
+    shape: list[int]
+    nc_type: int
+    attributes: dict[str, Any] = Field(default_factory=dict)
+    begin: int
+    # Variable à dimension illimitée : ses données sont entrelacées enregistrement par enregistrement
+    record: bool = False
+
+    @property
+    def item_size(self) -> int:
+        """Size of one value in bytes."""
+        return NC_TYPES[self.nc_type][1]
+
+    @property
+    def slab_size(self) -> int:
+        """Bytes of the variable (of one record, for a record variable), without padding."""
+        shape = self.shape[1:] if self.record else self.shape
+        return math.prod(shape) * self.item_size
+
+
+class NcHeader(BaseModel):
+    """Header of a NetCDF classic file."""
+
+    version: int
+    numrecs: int
+    dimensions: dict[str, int]
+    unlimited: str | None = None
+    attributes: dict[str, Any] = Field(default_factory=dict)
+    variables: list[NcVariable] = Field(default_factory=list)
+
+    @property
+    def record_size(self) -> int:
+        """Bytes of one record (all record variables); a single record variable is not padded."""
+        records = [v for v in self.variables if v.record]
+        if len(records) == 1:
+            return records[0].slab_size
+        return sum(_padded(v.slab_size) for v in records)
+
+    def variable(self, name: str) -> NcVariable:
+        """Variable called ``name``.
+
+        Raises:
+            KeyError: If the file has no such variable.
+        """
+        for variable in self.variables:
+            if variable.name == name:
+                return variable
+        raise KeyError(name)
+
+
+def _padded(size: int) -> int:
+    return (size + 3) // 4 * 4
+
+
+class _HeaderReader:
+    """Big-endian reader of the header fields, whose widths depend on the format version."""
+
+    __slots__ = ("f", "version")
+
+    def __init__(self, f: BinaryIO, version: int):
+        """Read from ``f``, positioned after the magic number."""
+        self.f = f
+        self.version = version
+
+    def _unpack(self, code: str, size: int) -> Any:
+        data = self.f.read(size)
+        if len(data) < size:
+            raise NetcdfFormatError("truncated header")
+        return struct.unpack(f">{code}", data)[0]
+
+    def tag(self) -> int:
+        return self._unpack("i", 4)
+
+    def count(self) -> int:
+        return self._unpack("q", 8) if self.version == 5 else self._unpack("I", 4)
+
+    def offset(self) -> int:
+        return self._unpack("q", 8) if self.version in (2, 5) else self._unpack("I", 4)
+
+    def name(self) -> str:
+        size = self.count()
+        return self.f.read(_padded(size))[:size].decode("utf-8", errors="replace")
+
+    def values(self, nc_type: int, count: int) -> Any:
+        if nc_type not in NC_TYPES:
+            raise NetcdfFormatError(f"unknown type {nc_type}")
+        code, size = NC_TYPES[nc_type]
+        raw = self.f.read(_padded(count * size))[: count * size]
+        if nc_type == NC_CHAR:
+            return raw.rstrip(b"\0").decode("utf-8", errors="replace")
+        return list(struct.unpack(f">{count}{code}", raw))
+
+    def elements(self, expected: int) -> int:
+        """Number of elements of a dimension/attribute/variable list (0 when ABSENT)."""
+        tag, count = self.tag(), self.count()
+        if tag not in (0, expected):
+            raise NetcdfFormatError(f"unexpected list tag {tag}")
+        return count
+
+    def attributes(self) -> dict[str, Any]:
+        attributes = {}
+        for _ in range(self.elements(_ATTRIBUTE)):
+            name = self.name()
+            nc_type = self.tag()
+            attributes[name] = self.values(nc_type, self.count())
+        return attributes
+
+
+def _read_variables(reader: _HeaderReader, dimensions: list[tuple[str, int]], unlimited: str | None, numrecs: int):
+    variables = []
+    for _ in range(reader.elements(_VARIABLE)):
+        name = reader.name()
+        dimids = [reader.count() for _ in range(reader.count())]
+        attributes = reader.attributes()
+        nc_type = reader.tag()
+        reader.count()  # vsize : recalculé (il sature à 2^32-1 pour les grosses variables)
+        begin = reader.offset()
+        names = [dimensions[i][0] for i in dimids]
+        record = bool(names) and names[0] == unlimited
+        shape = [numrecs if record and i == 0 else dimensions[d][1] for i, d in enumerate(dimids)]
+        variables.append(
+            NcVariable(
+                name=name,
+                dimensions=names,
+                shape=shape,
+                nc_type=nc_type,
+                attributes=attributes,
+                begin=begin,
+                record=record,
+            )
+        )
+    return variables
+
+
+def read_header(path: str | Path) -> NcHeader:
+    """Header of a NetCDF classic file.
+
+    Raises:
+        NetcdfFormatError: If the file is not in a classic format (e.g. NetCDF-4).
+    """
+    with open(path, "rb") as f:
+        magic = f.read(4)
+        if magic[:3] != b"CDF" or magic[3:] not in (b"\x01", b"\x02", b"\x05"):
+            raise NetcdfFormatError(f"{path} is not a NetCDF classic file")
+        reader = _HeaderReader(f, magic[3])
+        numrecs = reader.count()
+        dimensions = [(reader.name(), reader.count()) for _ in range(reader.elements(_DIMENSION))]
+        unlimited = next((name for name, length in dimensions if length == 0), None)
+        attributes = reader.attributes()
+        variables = _read_variables(reader, dimensions, unlimited, 0 if numrecs == _STREAMING else numrecs)
+    header = NcHeader(
+        version=magic[3],
+        numrecs=numrecs,
+        dimensions={name: numrecs if name == unlimited else length for name, length in dimensions},
+        unlimited=unlimited,
+        attributes=attributes,
+        variables=variables,
+    )
+    if numrecs == _STREAMING:
+        _count_streamed_records(path, header)
+    return header
+
+
+def _count_streamed_records(path: str | Path, header: NcHeader) -> None:
+    records = [v for v in header.variables if v.record]
+    size = header.record_size
+    numrecs = (Path(path).stat().st_size - min(v.begin for v in records)) // size if records and size else 0
+    header.numrecs = numrecs
+    if header.unlimited is not None:
+        header.dimensions[header.unlimited] = numrecs
+    for variable in records:
+        variable.shape[0] = numrecs
+
+
+def iter_variable_data(
+    f: BinaryIO, header: NcHeader, variable: NcVariable, chunk_size: int = 1024 * 1024
+) -> Iterator[bytes]:
+    """Raw (big-endian) data of ``variable``, by chunks of at most ``chunk_size`` bytes.
+
+    Record variables are read record by record, in record order.
+    """
+    if variable.record:
+        starts = [variable.begin + r * header.record_size for r in range(header.numrecs)]
+    else:
+        starts = [variable.begin]
+    for start in starts:
+        f.seek(start)
+        left = variable.slab_size
+        while left > 0:
+            data = f.read(min(chunk_size, left))
+            if not data:
+                raise NetcdfFormatError(f"truncated data for variable {variable.name}")
+            left -= len(data)
+            yield data
+
+
+def _header_description(header: NcHeader, volatile_globals: Iterable[str], volatile_variables: Iterable[str]) -> dict:
+    return {
+        "dimensions": header.dimensions,
+        "unlimited": header.unlimited,
+        "attributes": {k: v for k, v in header.attributes.items() if k not in volatile_globals},
+        "variables": [
+            [v.name, v.nc_type, v.dimensions, v.attributes]
+            for v in header.variables
+            if v.name not in volatile_variables
+        ],
+    }
+
+
+def _netcdf4_hash(path: Path, volatile_globals: frozenset[str], volatile_variables: frozenset[str]) -> str:
+    from netCDF4 import Dataset  # dépendance optionnelle, pour les fichiers NetCDF-4
+
+    digest = hashlib.sha256()
+    with Dataset(path, "r") as ds:
+        ds.set_auto_maskandscale(False)
+        attributes = {k: str(ds.getncattr(k)) for k in ds.ncattrs() if k not in volatile_globals}
+        digest.update(json.dumps(attributes, sort_keys=True).encode())
+        for name, variable in ds.variables.items():
+            if name in volatile_variables:
+                continue
+            described = [
+                name,
+                str(variable.dtype),
+                variable.dimensions,
+                {k: str(variable.getncattr(k)) for k in variable.ncattrs()},
+            ]
+            digest.update(json.dumps(described, sort_keys=True).encode())
+            digest.update(variable[:].tobytes())
+    return digest.hexdigest()
+
+
+def content_hash(
+    path: str | Path,
+    volatile_globals: Iterable[str] = VOLATILE_GLOBALS,
+    volatile_variables: Iterable[str] = VOLATILE_VARIABLES,
+) -> str:
+    """SHA-256 of a NetCDF file, leaving out the volatile global attributes and variables.
+
+    Two runs decoding the same data give the same hash even though their files
+    differ by their dates and history.
+    """
+    volatile_globals, volatile_variables = frozenset(volatile_globals), frozenset(volatile_variables)
+    try:
+        header = read_header(path)
+    except NetcdfFormatError:
+        try:
+            return _netcdf4_hash(Path(path), volatile_globals, volatile_variables)
+        except ImportError:
+            return file_sha256(path)
+    digest = hashlib.sha256()
+    digest.update(
+        json.dumps(_header_description(header, volatile_globals, volatile_variables), sort_keys=True).encode()
+    )
+    with open(path, "rb") as f:
+        for variable in header.variables:
+            if variable.name in volatile_variables:
+                continue
+            digest.update(f"\0{variable.name}\0".encode())
+            for chunk in iter_variable_data(f, header, variable):
+                digest.update(chunk)
+    return digest.hexdigest()
+
+
+# -- écriture -----------------------------------------------------------------
+
+
+def _name(name: str) -> bytes:
+    raw = name.encode("utf-8")
+    return struct.pack(">I", len(raw)) + raw.ljust(_padded(len(raw)), b"\0")
+
+
+def _typed(values: Any) -> tuple[int, bytes, int]:
+    """nc_type, big-endian bytes and number of values of an attribute or variable value."""
+    if isinstance(values, (str, bytes)):
+        raw = values.encode("utf-8") if isinstance(values, str) else values
+        return NC_CHAR, raw, len(raw)
+    values = list(values) if isinstance(values, (list, tuple)) else [values]
+    if all(isinstance(v, int) for v in values):
+        return NC_INT, struct.pack(f">{len(values)}i", *values), len(values)
+    return NC_DOUBLE, struct.pack(f">{len(values)}d", *values), len(values)
+
+
+def _attributes(attributes: dict[str, Any]) -> bytes:
+    if not attributes:
+        return b"\0" * 8
+    out = struct.pack(">iI", _ATTRIBUTE, len(attributes))
+    for name, value in attributes.items():
+        nc_type, raw, count = _typed(value)
+        out += _name(name) + struct.pack(">iI", nc_type, count) + raw.ljust(_padded(len(raw)), b"\0")
+    return out
+
+
+def write_classic(
+    path: str | Path,
+    dimensions: dict[str, int],
+    variables: dict[str, tuple[list[str], Any, dict[str, Any]]],
+    attributes: dict[str, Any] | None = None,
+) -> None:
+    """Write a NetCDF classic (CDF-1) file with fixed dimensions.
+
+    Args:
+        path: File to write.
+        dimensions: Dimension lengths, in order.
+        variables: ``name -> (dimension names, values, attributes)``; values are a
+            string (``char``), or a flat sequence of ints (``int``) or floats (``double``)
+            whose length must match the dimensions.
+        attributes: Global attributes.
+    """
+    dimids = {name: i for i, name in enumerate(dimensions)}
+    typed = {name: _typed(values) for name, (_, values, _) in variables.items()}
+    head = b"CDF\x01" + struct.pack(">I", 0)
+    head += struct.pack(">iI", _DIMENSION, len(dimensions)) if dimensions else b"\0" * 8
+    head += b"".join(_name(name) + struct.pack(">I", length) for name, length in dimensions.items())
+    head += _attributes(attributes or {})
+    head += struct.pack(">iI", _VARIABLE, len(variables)) if variables else b"\0" * 8
+
+    def declarations(begins: list[int]) -> bytes:
+        out = b""
+        for (name, (dims, _, var_attributes)), begin in zip(variables.items(), begins, strict=True):
+            nc_type, raw, count = typed[name]
+            if count != math.prod(dimensions[d] for d in dims):
+                raise ValueError(f"{name}: {count} values for dimensions {dims}")
+            out += _name(name) + struct.pack(">I", len(dims)) + b"".join(struct.pack(">I", dimids[d]) for d in dims)
+            out += _attributes(var_attributes) + struct.pack(">iII", nc_type, _padded(len(raw)), begin)
+        return out
+
+    # les offsets ont une taille fixe : la taille de l'en-tête ne dépend pas de leur valeur
+    begin = len(head) + len(declarations([0] * len(variables)))
+    begins = []
+    for _, raw, _ in typed.values():
+        begins.append(begin)
+        begin += _padded(len(raw))
+    data = b"".join(raw.ljust(_padded(len(raw)), b"\0") for _, raw, _ in typed.values())
+    Path(path).write_bytes(head + declarations(begins) + data)
@@ -0,0 +1,295 @@
+"""Run the decoder image for many floats at once through the Docker SDK.
+
+Each float gets its own container, started with the volume mounts of the
+``decode-float`` service of ``compose.yml`` and the command line of
+``docker-decoder-linux.sh``. Unlike the shell script, every container has a unique
+name (``argo-decoder-<wmo>-<id>``) and its own XML report name, so runs of several
+floats never clash. Containers carry CPU/memory limits, their logs are streamed
+while they run, and they are removed when they end, fail or time out.
+"""
+
+import os
+import threading
+import time
+import uuid
+from collections.abc import Callable, Iterable, Iterator
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import suppress
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any
+
+from pydantic import Field
+
+from .process import BoundedOutput, ProcessRun
+from .xml_report import report_file_name
+
+try:
+    import docker
+    from docker.errors import DockerException
+except ImportError:  # pragma: no cover - le SDK n'est nécessaire que pour lancer des conteneurs
+    docker = None
+
+    class DockerException(Exception):  # noqa: N818 - même nom que dans le SDK
+        """Stand-in for ``docker.errors.DockerException`` when the SDK is not installed."""
+
+
+DEFAULT_IMAGE = "ghcr.io/euroargodev/coriolis-data-processing-chain-for-argo-floats-container:066a"
+# Volume nommé du runtime MATLAB (cf. compose.yml)
+DEFAULT_RUNTIME_VOLUME = "runtime-matlab-volume"
+
+# Points de montage du service decode-float
+RUNTIME_MOUNT = "/mnt/runtime"
+INPUT_MOUNT = "/mnt/data/rsync"
+CONF_MOUNT = "/mnt/data/config"
+OUTPUT_MOUNT = "/mnt/data/output"
+GREYLIST_MOUNT = "/tmp/ar_greylist.txt"
+
+# Label posé sur les conteneurs lancés par l'orchestrateur (nettoyage)
+MANAGED_LABEL = "argo-decoder.managed"
+WMO_LABEL = "argo-decoder.wmo"
+
+# Attente maximale de l'arrêt d'un conteneur après un kill (secondes)
+_KILL_WAIT = 10.0
+
+# Callback de log : (wmo, ligne)
+LogCallback = Callable[[str, str], None]
+
+
+class ContainerRun(ProcessRun):
+    """Outcome of one containerised decoder run."""
+
+    wmo: str
+    container_name: str
+    command: list[str] = Field(default_factory=list)
+    # Erreur Docker (image absente, démon injoignable...)
+    error: str | None = None
+
+    @property
+    def status(self) -> str:
+        """``ok``, ``failed`` (non-zero exit), ``timeout``, ``memory_exceeded`` (OOM kill) or ``error``."""
+        if self.error is not None:
+            return "error"
+        if self.memory_exceeded:
+            return "memory_exceeded"
+        if self.timed_out:
+            return "timeout"
+        return "ok" if self.returncode == 0 else "failed"
+
+    @property
+    def ok(self) -> bool:
+        """True when the decoder exited with code 0."""
+        return self.status == "ok"
+
+
+def _print_line(wmo: str, line: str) -> None:
+    print(f"[{wmo}] {line}", flush=True)
+
+
+def _bind_source(source: str | Path) -> str:
+    """Host path (made absolute, as Docker requires) or named volume."""
+    text = str(source)
+    if os.sep in text or text.startswith("."):
+        return str(Path(text).resolve())
+    return text
+
+
+class ContainerOrchestrator:
+    """Launch one decoder container per float, ``max_parallel`` at a time.
+
+    Args:
+        input_directory: Host rsync directory, mounted on ``/mnt/data/rsync``.
+        conf_directory: Host configuration directory (holding ``decoder_conf.json``), mounted read-only.
+        output_directory: Host output directory, mounted on ``/mnt/data/output``.
+        runtime: MATLAB Runtime host directory or docker volume name.
+        greylist_file: Optional greylist file, mounted on ``/tmp/ar_greylist.txt``.
+        image: Decoder image.
+        conf_file_name: Decoder configuration file name inside ``conf_directory``.
+        user: ``uid:gid`` of the containers (the image refuses root); the current user by default.
+        group_add: Extra groups of the containers.
+        cpus: CPU limit of one container.
+        mem_limit: Memory limit of one container (e.g. ``"4g"``).
+        max_parallel: Containers running at the same time; by default as many as the CPU limit lets fit on the node.
+        timeout: Wall time limit of one container (seconds); it is killed and removed beyond.
+        on_log: Called with ``(wmo, line)`` for every log line; printed with a ``[wmo]`` prefix by default.
+        max_captured_output: Bytes of log kept in the result of each run.
+        client: Docker client; ``docker.from_env()`` by default.
+        poll_interval: Period of the container state checks (seconds).
+    """
+
+    def __init__(
+        self,
+        input_directory: str | Path,
+        conf_directory: str | Path,
+        output_directory: str | Path,
+        runtime: str | Path = DEFAULT_RUNTIME_VOLUME,
+        greylist_file: str | Path | None = None,
+        image: str = DEFAULT_IMAGE,
+        conf_file_name: str = "decoder_conf.json",
+        user: str | None = None,
+        group_add: Iterable[str] = ("gbatch",),
+        cpus: float | None = 1.0,
+        mem_limit: str | int | None = None,
+        max_parallel: int | None = None,
+        timeout: float | None = 3600,
+        on_log: LogCallback | None = _print_line,
+        max_captured_output: int = 64 * 1024,
+        client: Any = None,
+        poll_interval: float = 1.0,
+    ):
+        """Check the Docker SDK is available and store the run settings."""
+        if client is None:
+            if docker is None:
+                raise ImportError("The docker package is required to run decoder containers (pip install docker).")
+            client = docker.from_env()
+        self.client = client
+        self.input_directory = input_directory
+        self.conf_directory = conf_directory
+        self.output_directory = output_directory
+        self.runtime = runtime
+        self.greylist_file = greylist_file
+        self.image = image
+        self.conf_file_name = conf_file_name
+        self.user = user or f"{os.getuid()}:{os.getgid()}"
+        self.group_add = list(group_add)
+        self.cpus = cpus
+        self.mem_limit = mem_limit
+        if max_parallel is None:
+            max_parallel = max(1, int((os.cpu_count() or 1) / cpus)) if cpus else os.cpu_count() or 1
+        self.max_parallel = max_parallel
+        self.timeout = timeout
+        self.on_log = on_log
+        self.max_captured_output = max_captured_output
+        self.poll_interval = poll_interval
+
+    # -- configuration des conteneurs -------------------------------------------
+    def volumes(self) -> dict[str, dict[str, str]]:
+        """Mounts of the ``decode-float`` service of ``compose.yml``."""
+        volumes = {
+            _bind_source(self.runtime): {"bind": RUNTIME_MOUNT, "mode": "ro"},
+            _bind_source(self.input_directory): {"bind": INPUT_MOUNT, "mode": "rw"},
+            _bind_source(self.conf_directory): {"bind": CONF_MOUNT, "mode": "ro"},
+            _bind_source(self.output_directory): {"bind": OUTPUT_MOUNT, "mode": "rw"},
+        }
+        if self.greylist_file is not None:
+            volumes[_bind_source(self.greylist_file)] = {"bind": GREYLIST_MOUNT, "mode": "ro"}
+        return volumes
+
+    def command(self, wmonum: str, run_id: str) -> list[str]:
+        """Decoder arguments of ``docker-decoder-linux.sh``, with a report name unique to the run."""
+        timestamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+        return [
+            RUNTIME_MOUNT,
+            "rsynclog",
+            "all",
+            "configfile",
+            f"{CONF_MOUNT}/{self.conf_file_name}",
+            "xmlreport",
+            report_file_name(timestamp, f"{wmonum}_{run_id}"),
+            "floatwmo",
+            wmonum,
+            "PROCESS_REMAINING_BUFFERS",
+            "1",
+        ]
+
+    def _run_options(self, wmonum: str, name: str, command: list[str]) -> dict[str, Any]:
+        options: dict[str, Any] = {
+            "command": command,
+            "name": name,
+            "detach": True,
+            "user": self.user,
+            "group_add": self.group_add,
+            "volumes": self.volumes(),
+            "labels": {MANAGED_LABEL: "1", WMO_LABEL: wmonum},
+        }
+        if self.cpus:
+            options["nano_cpus"] = int(self.cpus * 1e9)
+        if self.mem_limit is not None:
+            # sans swap supplémentaire : un dépassement se termine en OOM kill
+            options["mem_limit"] = options["memswap_limit"] = self.mem_limit
+        return options
+
+    # -- exécution ------------------------------------------------------------
+    def _stream_logs(self, container: Any, wmonum: str, output: BoundedOutput) -> None:
+        pending = b""
+        with suppress(DockerException):
+            for chunk in container.logs(stream=True, follow=True):
+                output.write(chunk)
+                if self.on_log is None:
+                    continue
+                *lines, pending = (pending + chunk).split(b"\n")
+                for line in lines:
+                    self.on_log(wmonum, line.decode(errors="replace").rstrip("\r"))
+        if pending and self.on_log is not None:
+            self.on_log(wmonum, pending.decode(errors="replace"))
+
+    def _wait(self, container: Any, start: float, timeout: float | None) -> bool:
+        """Wait for ``container`` to exit; False if it hit ``timeout`` (seconds after ``start``)."""
+        while True:
+            container.reload()
+            if container.status in ("exited", "dead"):
+                return True
+            if timeout is not None and time.monotonic() - start > timeout:
+                return False
+            time.sleep(self.poll_interval)
+
+    def run(self, wmonum: str) -> ContainerRun:
+        """Decode ``wmonum`` in a new container and remove the container afterwards."""
+        run_id = uuid.uuid4().hex[:8]
+        result = ContainerRun(wmo=wmonum, container_name=f"argo-decoder-{wmonum}-{run_id}")
+        result.command = self.command(wmonum, run_id)
+        output = BoundedOutput(self.max_captured_output)
+        start = time.monotonic()
+        container = None
+        streamer = None
+        try:
+            container = self.client.containers.run(
+                self.image, **self._run_options(wmonum, result.container_name, result.command)
+            )
+            streamer = threading.Thread(
+                target=self._stream_logs, args=(container, wmonum, output), name=f"logs-{wmonum}", daemon=True
+            )
+            streamer.start()
+            if not self._wait(container, start, self.timeout):
+                result.timed_out = True
+                print(f"Container {result.container_name} timed out after {self.timeout}s, killing it.")
+                with suppress(DockerException):
+                    container.kill()
+                # attrs date du dernier reload : code de sortie et OOM relus une fois le conteneur arrêté
+                with suppress(DockerException):
+                    self._wait(container, time.monotonic(), _KILL_WAIT)
+            state = container.attrs.get("State", {})
+            result.returncode = state.get("ExitCode")
+            result.memory_exceeded = bool(state.get("OOMKilled"))
+        except DockerException as e:
+            result.error = str(e)
+        finally:
+            if container is not None:
+                # suppression déjà en cours (409), démon indisponible... : le résultat du run prime
+                with suppress(DockerException):
+                    container.remove(force=True)
+            if streamer is not None:
+                streamer.join(timeout=5)
+            result.wall_time = time.monotonic() - start
+            result.stdout = output.text()
+            result.output_truncated = output.truncated
+        return result
+
+    def run_many(self, wmonums: Iterable[str]) -> Iterator[tuple[str, ContainerRun]]:
+        """Decode every float of ``wmonums``, ``max_parallel`` containers at a time.
+
+        Yields ``(wmo, result)`` pairs as the runs finish.
+        """
+        with ThreadPoolExecutor(max_workers=self.max_parallel, thread_name_prefix="container") as pool:
+            futures = {pool.submit(self.run, wmonum): wmonum for wmonum in dict.fromkeys(wmonums)}
+            for future in as_completed(futures):
+                yield futures[future], future.result()
+
+    def cleanup(self) -> list[str]:
+        """Remove the containers left by an interrupted orchestrator; returns their names."""
+        removed = []
+        for container in self.client.containers.list(all=True, filters={"label": MANAGED_LABEL}):
+            with suppress(DockerException):
+                container.remove(force=True)
+                removed.append(container.name)
+        return removed
@@ -0,0 +1,365 @@
+"""Process helpers shared by the synchronous and asynchronous decoder runs."""
+
+import os
+import signal
+import subprocess
+import threading
+import time
+from collections import deque
+from collections.abc import Callable
+from pathlib import Path
+
+from pydantic import BaseModel, Field
+
+# Taille d'un bloc des compteurs ru_inblock / ru_oublock
+_RUSAGE_BLOCK_SIZE = 512
+_PAGE_SIZE_KB = os.sysconf("SC_PAGE_SIZE") // 1024
+_PROC = Path("/proc")
+_HAS_CHILDREN_FILES = (_PROC / str(os.getpid()) / "task" / str(os.getpid()) / "children").exists()
+
+
+class ProcessRun(BaseModel):
+    """Exit status, timing and resource usage of one process tree.
+
+    Resource fields are ``None`` when they could not be measured (e.g. asyncio runs,
+    whose children are reaped by the event loop). CPU time, peak RSS and block I/O
+    come from ``wait4`` and cover the launched process and the descendants it waited
+    for. ``read_bytes``/``written_bytes`` are the bytes read and written by the tree
+    (``rchar``/``wchar`` of ``/proc/<pid>/io``, page-cache hits included), sampled like
+    the RSS. ``memory_samples`` holds ``(elapsed seconds, RSS of the whole tree in kB)``
+    pairs read from ``/proc`` while the process ran.
+    """
+
+    returncode: int | None = None
+    timed_out: bool = False
+    memory_exceeded: bool = False
+    memory_samples: list[tuple[float, int]] = Field(default_factory=list)
+    wall_time: float = 0.0
+    cpu_user_seconds: float | None = None
+    cpu_system_seconds: float | None = None
+    peak_rss_kb: int | None = None
+    read_bytes: int | None = None
+    written_bytes: int | None = None
+    # lectures/écritures qui ont atteint le disque (ru_inblock / ru_oublock)
+    block_read_bytes: int | None = None
+    block_written_bytes: int | None = None
+    stdout: str = ""
+    stderr: str = ""
+    output_truncated: bool = False
+
+    @property
+    def peak_tree_rss_kb(self) -> int | None:
+        """Highest sampled RSS of the whole process tree."""
+        return max((rss for _, rss in self.memory_samples), default=None)
+
+    @property
+    def cpu_seconds(self) -> float | None:
+        """User + system CPU time of the process tree."""
+        if self.cpu_user_seconds is None or self.cpu_system_seconds is None:
+            return None
+        return self.cpu_user_seconds + self.cpu_system_seconds
+
+
+class BoundedOutput:
+    """Keep the last ``limit`` bytes written to it."""
+
+    def __init__(self, limit: int):
+        """Create an empty buffer."""
+        self.limit = limit
+        self.truncated = False
+        self._chunks: deque[bytes] = deque()
+        self._size = 0
+
+    def write(self, data: bytes) -> None:
+        """Append ``data``, dropping the oldest bytes beyond the limit."""
+        self._chunks.append(data)
+        self._size += len(data)
+        while self._size > self.limit and self._chunks:
+            excess = self._size - self.limit
+            head = self._chunks.popleft()
+            self.truncated = True
+            if len(head) > excess:
+                self._chunks.appendleft(head[excess:])
+                self._size -= excess
+            else:
+                self._size -= len(head)
+
+    def text(self) -> str:
+        """Buffered bytes decoded as text."""
+        return b"".join(self._chunks).decode(errors="replace")
+
+
+def signal_process_group(pid: int, sig: int = signal.SIGTERM) -> bool:
+    """Send ``sig`` to the process group led by ``pid``; returns False if it is already gone.
+
+    Decoder runs are started in their own session, so the group covers the shell
+    wrapper, the MATLAB binary and anything they spawned.
+    """
+    try:
+        os.killpg(pid, sig)
+    except (ProcessLookupError, PermissionError):
+        return False
+    return True
+
+
+class ProcessControl:
+    """Pause/resume handle on a process group started by :func:`run_monitored`.
+
+    A pause (SIGSTOP of the whole group) requested before the process is started
+    is applied as soon as it is. Time spent paused is not charged to the run timeout.
+    """
+
+    def __init__(self):
+        """Create a handle not attached to any process yet."""
+        self._lock = threading.Lock()
+        self.pid: int | None = None
+        self.paused = False
+        self._paused_at: float | None = None
+        self._paused_total = 0.0
+
+    def attach(self, pid: int) -> None:
+        """Bind the handle to the leader of a freshly started process group."""
+        with self._lock:
+            self.pid = pid
+            if self.paused:
+                signal_process_group(pid, signal.SIGSTOP)
+
+    def detach(self) -> None:
+        """Forget the process (it has ended)."""
+        with self._lock:
+            self.pid = None
+
+    def pause(self) -> bool:
+        """Stop the process group (SIGSTOP); True if this call stopped a running group.
+
+        False when already paused, when the process is not started yet (the pause
+        is then applied by :meth:`attach`) or when its group is gone.
+        """
+        with self._lock:
+            if self.paused:
+                return False
+            self.paused = True
+            self._paused_at = time.monotonic()
+            return self.pid is not None and signal_process_group(self.pid, signal.SIGSTOP)
+
+    def resume(self) -> None:
+        """Let the process group run again (SIGCONT)."""
+        with self._lock:
+            if not self.paused:
+                return
+            self.paused = False
+            self._paused_total += time.monotonic() - self._paused_at
+            if self.pid is not None:
+                signal_process_group(self.pid, signal.SIGCONT)
+
+    @property
+    def paused_seconds(self) -> float:
+        """Total time spent paused."""
+        with self._lock:
+            current = time.monotonic() - self._paused_at if self.paused else 0.0
+            return self._paused_total + current
+
+
+def _children_map() -> dict[int, list[int]]:
+    """Parent pid -> child pids, for the live processes visible in /proc."""
+    if _HAS_CHILDREN_FILES:
+        return {}
+    # noyau sans /proc/<pid>/task/<tid>/children : on parcourt toute la table des process
+    parents: dict[int, list[int]] = {}
+    for entry in _PROC.iterdir():
+        if entry.name.isdigit():
+            try:
+                ppid = int((entry / "stat").read_text().rsplit(")", 1)[1].split()[1])
+            except (OSError, IndexError, ValueError):
+                continue
+            parents.setdefault(ppid, []).append(int(entry.name))
+    return parents
+
+
+def _children(pid: int, parents: dict[int, list[int]]) -> list[int]:
+    if not _HAS_CHILDREN_FILES:
+        return parents.get(pid, [])
+    children: list[int] = []
+    try:
+        for task in (_PROC / str(pid) / "task").iterdir():
+            children.extend(int(c) for c in (task / "children").read_text().split())
+    except OSError:
+        pass  # process terminé entre-temps
+    return children
+
+
+def process_tree_pids(pid: int) -> list[int]:
+    """``pid`` and all its live descendants."""
+    parents = _children_map()
+    tree, pending = [], [pid]
+    while pending:
+        current = pending.pop()
+        tree.append(current)
+        pending.extend(_children(current, parents))
+    return tree
+
+
+def process_tree_rss_kb(pid: int) -> int:
+    """Resident memory of ``pid`` and its descendants, in kB (0 once they are gone)."""
+    total = 0
+    for member in process_tree_pids(pid):
+        try:
+            total += int((_PROC / str(member) / "statm").read_text().split()[1]) * _PAGE_SIZE_KB
+        except (OSError, IndexError, ValueError):
+            continue
+    return total
+
+
+def _process_io(pid: int) -> tuple[int, int]:
+    """``(rchar, wchar)`` of ``pid``, its reaped children included; ``(0, 0)`` once it is gone."""
+    counters = {}
+    try:
+        for line in (_PROC / str(pid) / "io").read_text().splitlines():
+            name, _, value = line.partition(":")
+            counters[name] = int(value)
+    except (OSError, ValueError):
+        return 0, 0
+    return counters.get("rchar", 0), counters.get("wchar", 0)
+
+
+def process_tree_io(pid: int) -> tuple[int, int]:
+    """Bytes read and written (``rchar``, ``wchar``) by ``pid`` and its live descendants."""
+    read = written = 0
+    for member in process_tree_pids(pid):
+        member_read, member_written = _process_io(member)
+        read += member_read
+        written += member_written
+    return read, written
+
+
+def _drain(stream, buffer: BoundedOutput) -> None:
+    for chunk in iter(lambda: stream.read1(65536), b""):
+        buffer.write(chunk)
+    stream.close()
+
+
+def _start_readers(
+    process: subprocess.Popen, limit: int
+) -> tuple[BoundedOutput, BoundedOutput, list[threading.Thread]]:
+    stdout, stderr = BoundedOutput(limit), BoundedOutput(limit)
+    readers = [
+        threading.Thread(target=_drain, args=(process.stdout, stdout), daemon=True),
+        threading.Thread(target=_drain, args=(process.stderr, stderr), daemon=True),
+    ]
+    for reader in readers:
+        reader.start()
+    return stdout, stderr, readers
+
+
+def _start_reaper(process: subprocess.Popen) -> tuple[threading.Event, dict]:
+    # wait4 dans un thread dédié : fin détectée immédiatement, rusage propre à ce process
+    reaped = threading.Event()
+    outcome: dict = {}
+
+    def reap() -> None:
+        # le zombie garde ses compteurs d'I/O (enfants récoltés compris) jusqu'au wait4
+        os.waitid(os.P_PID, process.pid, os.WEXITED | os.WNOWAIT)
+        outcome["io"] = _process_io(process.pid)
+        _, outcome["status"], outcome["rusage"] = os.wait4(process.pid, 0)
+        reaped.set()
+
+    threading.Thread(target=reap, daemon=True).start()
+    return reaped, outcome
+
+
+def run_monitored(
+    cmd: list[str],
+    *,
+    env: dict[str, str] | None = None,
+    timeout: float | None = None,
+    max_output_bytes: int = 64 * 1024,
+    kill_grace: float = 5.0,
+    poll_interval: float = 0.5,
+    memory_budget_kb: int | None = None,
+    on_poll: Callable[[subprocess.Popen], None] | None = None,
+    control: ProcessControl | None = None,
+) -> ProcessRun:
+    """Run ``cmd`` in its own session and measure it.
+
+    The RSS and the I/O counters of the process tree are sampled at every
+    supervision tick; when the RSS goes over ``memory_budget_kb`` the group is
+    stopped like on a timeout, before the kernel OOM killer gets involved.
+
+    Args:
+        cmd: Command line.
+        env: Environment of the process.
+        timeout: Seconds before the process group is terminated (SIGTERM, then SIGKILL).
+        max_output_bytes: Bytes of stdout and of stderr kept (the tail of each stream).
+        kill_grace: Seconds between SIGTERM and SIGKILL.
+        poll_interval: Period of the supervision loop (and of the memory samples).
+        memory_budget_kb: RSS of the whole tree above which the run is stopped.
+        on_poll: Called with the running process at every supervision tick.
+        control: Pause/resume handle attached to the process group; paused time
+            does not count towards ``timeout``.
+
+    Returns:
+        The measured :class:`ProcessRun`.
+
+    Raises:
+        FileNotFoundError: If the executable does not exist.
+    """
+    start = time.monotonic()
+    process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, env=env, start_new_session=True)
+    stdout, stderr, readers = _start_readers(process, max_output_bytes)
+    reaped, outcome = _start_reaper(process)
+    control = control or ProcessControl()
+    control.attach(process.pid)
+
+    def stop_group() -> None:
+        signal_process_group(process.pid, signal.SIGTERM)
+        # un groupe suspendu ne traiterait pas le SIGTERM
+        control.resume()
+        if not reaped.wait(kill_grace):
+            signal_process_group(process.pid, signal.SIGKILL)
+            reaped.wait()
+
+    timed_out = memory_exceeded = False
+    samples: list[tuple[float, int]] = []
+    read = written = 0
+    while not reaped.wait(poll_interval):
+        elapsed = time.monotonic() - start
+        rss = process_tree_rss_kb(process.pid)
+        if rss:
+            samples.append((round(elapsed, 3), rss))
+        # un processus qui se termine sort de l'arbre : on garde le plus haut total vu
+        tree_read, tree_written = process_tree_io(process.pid)
+        read, written = max(read, tree_read), max(written, tree_written)
+        memory_exceeded = memory_budget_kb is not None and rss > memory_budget_kb
+        # le temps passé suspendu n'est pas décompté du timeout
+        timed_out = timeout is not None and elapsed - control.paused_seconds > timeout
+        if memory_exceeded or timed_out:
+            stop_group()
+            break
+        if on_poll is not None:
+            on_poll(process)
+    wall_time = time.monotonic() - start
+    control.detach()
+
+    for reader in readers:
+        # un petit-enfant sorti du groupe peut garder le pipe ouvert : on ne l'attend pas
+        reader.join(timeout=kill_grace)
+    process.returncode = os.waitstatus_to_exitcode(outcome["status"])
+    usage = outcome["rusage"]
+    final_read, final_written = outcome["io"]
+    return ProcessRun(
+        returncode=process.returncode,
+        timed_out=timed_out,
+        memory_exceeded=memory_exceeded,
+        memory_samples=samples,
+        wall_time=wall_time,
+        cpu_user_seconds=usage.ru_utime,
+        cpu_system_seconds=usage.ru_stime,
+        peak_rss_kb=usage.ru_maxrss,
+        read_bytes=max(read, final_read),
+        written_bytes=max(written, final_written),
+        block_read_bytes=usage.ru_inblock * _RUSAGE_BLOCK_SIZE,
+        block_written_bytes=usage.ru_oublock * _RUSAGE_BLOCK_SIZE,
+        stdout=stdout.text(),
+        stderr=stderr.text(),
+        output_truncated=stdout.truncated or stderr.truncated,
+    )
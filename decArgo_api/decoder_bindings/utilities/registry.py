@@ -0,0 +1,238 @@
+"""In-memory registry of the floats known to the decoder.
+
+Two sources describe the floats:
+
+* ``argo_floats_information_co.txt`` (``argoFloatInfo``), tab-separated: WMO, decoder
+  ID, PTT/IMEI, frame length, cycle time, drift sampling, delay, launch date, launch
+  lon, launch lat, reference day, end decoding date, DM flag;
+* ``json_float_info/<WMO>_<PTT>_info.json``, one file per float, read by the real
+  time decoder.
+
+Both are loaded into ``__slots__`` records indexed by WMO and by PTT. The json
+values win when a float appears in both. A refresh reloads the text file when its
+mtime changes and only the json files whose mtime changed.
+"""
+
+import json
+import os
+import threading
+import time
+from pathlib import Path
+
+# Colonnes de argo_floats_information_co.txt
+_TXT_COLUMNS = (
+    "wmo",
+    "decoder_id",
+    "ptt",
+    "frame_length",
+    "cycle_length",
+    "drift_sampling_period",
+    "delay",
+    "launch_date",
+    "launch_lon",
+    "launch_lat",
+    "reference_day",
+    "end_decoding_date",
+    "dm_flag",
+)
+# Clés json_float_info -> attributs
+_JSON_KEYS = {
+    "WMO": "wmo",
+    "PTT": "ptt",
+    "DECODER_ID": "decoder_id",
+    "FLOAT_TYPE": "float_type",
+    "FRAME_LENGTH": "frame_length",
+    "CYCLE_LENGTH": "cycle_length",
+    "DRIFT_SAMPLING_PERIOD": "drift_sampling_period",
+    "DELAI": "delay",
+    "LAUNCH_DATE": "launch_date",
+    "LAUNCH_LON": "launch_lon",
+    "LAUNCH_LAT": "launch_lat",
+    "REFERENCE_DAY": "reference_day",
+    "END_DECODING_DATE": "end_decoding_date",
+    "DM_FLAG": "dm_flag",
+}
+# PTT inconnu dans argo_floats_information_co.txt et json_float_info (ex. 3901850)
+_UNKNOWN_PTT = "xxxxxxxxxxxxxxx"
+
+
+class FloatRecord:
+    """Static description of one float (values kept as the strings found in the sources)."""
+
+    __slots__ = (*_TXT_COLUMNS, "float_type", "info_file")
+
+    def __init__(self, **values: str | Path | None):
+        """Set the given attributes, the others to None."""
+        for name in self.__slots__:
+            setattr(self, name, values.get(name))
+
+    def merged(self, other: "FloatRecord") -> "FloatRecord":
+        """Copy of this record overridden by the attributes ``other`` defines."""
+        return FloatRecord(
+            **{
+                name: getattr(other, name) if getattr(other, name) is not None else getattr(self, name)
+                for name in self.__slots__
+            }
+        )
+
+    def as_dict(self) -> dict[str, str | Path | None]:
+        """Attributes as a dictionary."""
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def __repr__(self) -> str:
+        """Short representation."""
+        return f"FloatRecord(wmo={self.wmo!r}, ptt={self.ptt!r}, decoder_id={self.decoder_id!r})"
+
+
+def _read_info_txt(path: Path) -> dict[str, FloatRecord]:
+    records: dict[str, FloatRecord] = {}
+    with open(path, encoding="utf-8", errors="replace") as f:
+        for line in f:
+            fields = line.rstrip("\r\n").split("\t")
+            if len(fields) < len(_TXT_COLUMNS) or not fields[0].strip().isdigit():
+                continue
+            values = {name: value.strip() for name, value in zip(_TXT_COLUMNS, fields, strict=False)}
+            if values["ptt"] == _UNKNOWN_PTT:
+                values["ptt"] = None
+            records[values["wmo"]] = FloatRecord(**values)
+    return records
+
+
+def _read_info_json(path: Path) -> FloatRecord | None:
+    try:
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return None
+    values = {attr: str(data[key]).strip() for key, attr in _JSON_KEYS.items() if data.get(key) not in (None, "")}
+    # le nom du fichier fait foi pour WMO/PTT (c'est lui que le décodeur cherche)
+    wmo, _, ptt = path.name[: -len("_info.json")].partition("_")
+    values.setdefault("wmo", wmo)
+    if values.get("ptt", _UNKNOWN_PTT) == _UNKNOWN_PTT:
+        # PTT inconnu : None, pour ne pas masquer celui du fichier texte lors de la fusion
+        values["ptt"] = ptt if ptt and ptt != _UNKNOWN_PTT else None
+    return FloatRecord(info_file=path, **values)
+
+
+class FloatRegistry:
+    """WMO/PTT lookups over ``argo_floats_information_co.txt`` and ``json_float_info``.
+
+    Args:
+        info_directory: ``json_float_info`` directory (``DIR_INPUT_JSON_FLOAT_DECODING_PARAMETERS_FILE``).
+        info_file: ``argo_floats_information_co.txt`` file.
+        refresh_interval: Lookups refresh the registry when it is older than this (seconds);
+            None to only refresh on explicit :meth:`refresh` calls.
+    """
+
+    def __init__(
+        self,
+        info_directory: str | Path | None = None,
+        info_file: str | Path | None = None,
+        refresh_interval: float | None = 5.0,
+    ):
+        """Load both sources."""
+        self.info_directory = Path(info_directory) if info_directory is not None else None
+        self.info_file = Path(info_file) if info_file is not None else None
+        self.refresh_interval = refresh_interval
+        self._lock = threading.Lock()
+        self._txt_mtime: int | None = None
+        self._txt_records: dict[str, FloatRecord] = {}
+        # fichier json -> (mtime_ns, record)
+        self._json_records: dict[str, tuple[int, FloatRecord | None]] = {}
+        self._by_wmo: dict[str, FloatRecord] = {}
+        self._by_ptt: dict[str, FloatRecord] = {}
+        self._refreshed_at = 0.0
+        self.refresh()
+
+    # -- chargement -----------------------------------------------------------
+    def refresh(self) -> bool:
+        """Reload the sources that changed on disk; returns True if the registry changed."""
+        with self._lock:
+            changed = self._refresh_txt() | self._refresh_json()
+            if changed:
+                self._rebuild()
+            self._refreshed_at = time.monotonic()
+            return changed
+
+    def _refresh_txt(self) -> bool:
+        if self.info_file is None:
+            return False
+        try:
+            mtime = self.info_file.stat().st_mtime_ns
+        except FileNotFoundError:
+            mtime = None
+        if mtime == self._txt_mtime:
+            return False
+        self._txt_records = _read_info_txt(self.info_file) if mtime is not None else {}
+        self._txt_mtime = mtime
+        return True
+
+    def _refresh_json(self) -> bool:
+        if self.info_directory is None:
+            return False
+        try:
+            with os.scandir(self.info_directory) as entries:
+                current = {e.name: e for e in entries if e.name.endswith("_info.json")}
+        except FileNotFoundError:
+            current = {}
+        changed = bool(self._json_records.keys() - current.keys())
+        for name in self._json_records.keys() - current.keys():
+            del self._json_records[name]
+        for name, entry in current.items():
+            try:
+                mtime = entry.stat().st_mtime_ns
+            except FileNotFoundError:
+                continue
+            known = self._json_records.get(name)
+            if known is None or known[0] != mtime:
+                self._json_records[name] = (mtime, _read_info_json(Path(entry.path)))
+                changed = True
+        return changed
+
+    def _rebuild(self) -> None:
+        by_wmo = dict(self._txt_records)
+        for _, record in self._json_records.values():
+            if record is None:
+                continue
+            base = by_wmo.get(record.wmo)
+            by_wmo[record.wmo] = base.merged(record) if base is not None else record
+        self._by_wmo = by_wmo
+        self._by_ptt = {r.ptt: r for r in by_wmo.values() if r.ptt}
+
+    def _maybe_refresh(self) -> None:
+        if self.refresh_interval is not None and time.monotonic() - self._refreshed_at > self.refresh_interval:
+            self.refresh()
+
+    # -- recherches -----------------------------------------------------------
+    def get(self, wmonum: str) -> FloatRecord | None:
+        """Record of ``wmonum``, if known."""
+        self._maybe_refresh()
+        return self._by_wmo.get(wmonum)
+
+    def by_ptt(self, ptt: str) -> FloatRecord | None:
+        """Record of the float transmitting with ``ptt`` (IMEI), if known."""
+        self._maybe_refresh()
+        return self._by_ptt.get(ptt)
+
+    def ptt(self, wmonum: str) -> str | None:
+        """PTT (IMEI) of ``wmonum``."""
+        record = self.get(wmonum)
+        return record.ptt if record is not None else None
+
+    def wmo(self, ptt: str) -> str | None:
+        """WMO number of the float transmitting with ``ptt``."""
+        record = self.by_ptt(ptt)
+        return record.wmo if record is not None else None
+
+    def wmos(self) -> list[str]:
+        """Every known WMO number."""
+        self._maybe_refresh()
+        return list(self._by_wmo)
+
+    def __contains__(self, wmonum: object) -> bool:
+        """True if ``wmonum`` is a known WMO number."""
+        return self.get(wmonum) is not None if isinstance(wmonum, str) else False
+
+    def __len__(self) -> int:
+        """Number of known floats."""
+        return len(self._by_wmo)
@@ -0,0 +1,173 @@
+"""Resumable fleet-wide reprocessing: work plan, durable ledger and progress reporting.
+
+Every finished float is appended to a JSON-lines ledger and fsynced before the next
+one is reported, so a node restart loses at most the runs in flight. A new run with
+the same ledger skips the floats already done (and, unless asked otherwise, the
+ones that failed).
+"""
+
+import os
+import threading
+import time
+from collections.abc import Callable, Iterable, Iterator
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any
+
+from pydantic import BaseModel
+
+# Statuts considérés comme terminés (pas relancés à la reprise)
+DONE_STATUSES = ("ok", "skipped")
+
+# Exécution d'un lot : WMOs -> paires (wmo, résultat) au fil des fins de run
+BatchRunner = Callable[[list[str]], Iterator[tuple[str, Any]]]
+
+
+class LedgerEntry(BaseModel):
+    """Outcome of one float in the ledger."""
+
+    wmo: str
+    status: str
+    returncode: int | None = None
+    wall_time: float | None = None
+    error: str | None = None
+    # Rapport XML du run, pour le bilan de la campagne (decoder report --ledger)
+    report_file: str | None = None
+    finished_at: str
+
+
+class Ledger:
+    """Append-only JSON-lines checkpoint file (the last entry of a WMO wins)."""
+
+    def __init__(self, path: str | Path):
+        """Open (and create if needed) the ledger file."""
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+
+    def entries(self) -> dict[str, LedgerEntry]:
+        """Latest entry of every WMO; a truncated last line (crash while writing) is ignored."""
+        latest: dict[str, LedgerEntry] = {}
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = LedgerEntry.model_validate_json(line)
+                    except ValueError:
+                        continue
+                    latest[entry.wmo] = entry
+        except FileNotFoundError:
+            pass
+        return latest
+
+    def record(self, wmo: str, result: Any) -> LedgerEntry:
+        """Append the outcome of ``wmo`` (any object with ``status``, ``returncode``, ``wall_time``, ``error``)."""
+        report_file = getattr(result, "report_file", None)
+        entry = LedgerEntry(
+            wmo=wmo,
+            status=result.status,
+            returncode=getattr(result, "returncode", None),
+            wall_time=getattr(result, "wall_time", None),
+            error=getattr(result, "error", None),
+            report_file=str(report_file) if report_file is not None else None,
+            finished_at=datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        )
+        with self._lock, open(self.path, "a", encoding="utf-8") as f:
+            f.write(entry.model_dump_json() + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        return entry
+
+
+class ReprocessProgress(BaseModel):
+    """Progress of a reprocessing campaign."""
+
+    total: int
+    already_done: int = 0
+    done: int = 0
+    ok: int = 0
+    failed: int = 0
+    elapsed_seconds: float = 0.0
+
+    @property
+    def remaining(self) -> int:
+        """Floats still to decode in this run."""
+        return self.total - self.already_done - self.done
+
+    @property
+    def throughput_per_hour(self) -> float | None:
+        """Floats decoded per hour in this run."""
+        if not self.done or self.elapsed_seconds <= 0:
+            return None
+        return self.done * 3600 / self.elapsed_seconds
+
+    @property
+    def eta_seconds(self) -> float | None:
+        """Estimated time left, at the current throughput."""
+        rate = self.throughput_per_hour
+        return None if rate is None else self.remaining * 3600 / rate
+
+    def summary(self) -> str:
+        """One-line progress report."""
+        rate = self.throughput_per_hour
+        return (
+            f"{self.already_done + self.done}/{self.total} floats ({self.ok} ok, {self.failed} failed this run), "
+            f"{'-' if rate is None else f'{rate:.1f}'} floats/h, ETA {_duration(self.eta_seconds)}"
+        )
+
+
+def _duration(seconds: float | None) -> str:
+    if seconds is None:
+        return "-"
+    days, rest = divmod(int(seconds), 86400)
+    return (f"{days}d " if days else "") + time.strftime("%H:%M:%S", time.gmtime(rest))
+
+
+def plan(wmonums: Iterable[str], ledger: Ledger, retry_failed: bool = False) -> tuple[list[str], int]:
+    """Floats still to decode (in the given order, without duplicates) and the number already done."""
+    entries = ledger.entries()
+    todo, done = [], 0
+    for wmo in dict.fromkeys(wmonums):
+        entry = entries.get(wmo)
+        if entry is not None and (entry.status in DONE_STATUSES or not retry_failed):
+            done += 1
+        else:
+            todo.append(wmo)
+    return todo, done
+
+
+def reprocess(
+    wmonums: Iterable[str],
+    ledger: Ledger,
+    run_batch: BatchRunner,
+    retry_failed: bool = False,
+    on_progress: Callable[[ReprocessProgress], None] | None = None,
+) -> ReprocessProgress:
+    """Decode every float of ``wmonums`` not already in the ledger, checkpointing each outcome.
+
+    Args:
+        wmonums: Work plan, e.g. every WMO of the float registry.
+        ledger: Checkpoint file, shared by successive runs of the same campaign.
+        run_batch: Runs a list of floats and yields ``(wmo, result)`` pairs as they finish.
+        retry_failed: Also decode the floats that failed in a previous run.
+        on_progress: Called after every finished float.
+
+    Returns:
+        The final progress.
+    """
+    todo, already_done = plan(wmonums, ledger, retry_failed)
+    progress = ReprocessProgress(total=len(todo) + already_done, already_done=already_done)
+    start = time.monotonic()
+    if todo:
+        for wmo, result in run_batch(todo):
+            entry = ledger.record(wmo, result)
+            progress.done += 1
+            if entry.status in DONE_STATUSES:
+                progress.ok += 1
+            else:
+                progress.failed += 1
+            progress.elapsed_seconds = time.monotonic() - start
+            if on_progress is not None:
+                on_progress(progress)
+    progress.elapsed_seconds = time.monotonic() - start
+    return progress
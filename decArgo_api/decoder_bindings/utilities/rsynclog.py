@@ -0,0 +1,84 @@
+"""rsync lists of the Iridium floats (``DIR_INPUT_RSYNC_LOG/<imei>/rsync_<timestamp>.txt``).
+
+Each rsync session writes one list of the files it transferred, in one of two
+formats:
+
+* plain relative paths (SBD floats), e.g.
+  ``300234065895840/co_20200629T083042Z_300234065895840_000004_000000_20420.txt``;
+* itemized changes (RUDICS floats), e.g. ``f+++++++++ 250912_205203_nocbio002b_00137.bin``.
+
+:class:`RsyncLogHistory` reads, per float, the lists the decoder already
+processed, so that a run only gets the new ones.
+"""
+
+import os
+import re
+from pathlib import Path
+
+_LOG_RE = re.compile(r"^rsync_\d{8}T\d{6}Z?\.txt$")
+# --itemize-changes : [type de mise à jour] type de fichier + attributs, puis le nom
+_ITEMIZED_RE = re.compile(r"^[<>ch.*]?([fdLDS])[.+?a-zA-Z]{8,9}\s+(.+)$")
+
+
+def parse_rsync_log(path: str | Path) -> list[str]:
+    """Regular files listed in an rsync list, plain or itemized (directories and deletions are left out)."""
+    names = []
+    with open(path, encoding="utf-8", errors="replace") as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith("*deleting"):
+                continue
+            itemized = _ITEMIZED_RE.match(line)
+            if itemized is None:
+                names.append(line)
+            elif itemized.group(1) == "f":
+                names.append(itemized.group(2))
+    return names
+
+
+def rsync_logs(directory: str | Path) -> list[str]:
+    """Names of the rsync lists of ``directory``, oldest first."""
+    try:
+        with os.scandir(directory) as entries:
+            return sorted(e.name for e in entries if e.is_file() and _LOG_RE.match(e.name))
+    except FileNotFoundError:
+        return []
+
+
+class RsyncLogHistory:
+    """Rsync lists already processed by the decoder, read from its own history.
+
+    The decoder appends the full path of every list it processed to
+    ``IRIDIUM_DATA_DIRECTORY/<imei>_<wmo>/history_of_processed_data/processed_rsync_log_<wmo>.txt``
+    and leaves those lists out of the next ``rsynclog`` runs. Lists are matched by
+    name, since the paths are written as the decoder saw them.
+
+    Args:
+        iridium_data_directory: ``IRIDIUM_DATA_DIRECTORY`` of the decoder configuration.
+    """
+
+    def __init__(self, iridium_data_directory: str | Path):
+        """Read the history files under ``iridium_data_directory``."""
+        self.iridium_data_directory = Path(iridium_data_directory)
+
+    def history_file(self, wmonum: str, imei: str) -> Path:
+        """``processed_rsync_log_<wmo>.txt`` of the float."""
+        return (
+            self.iridium_data_directory
+            / f"{imei}_{wmonum}"
+            / "history_of_processed_data"
+            / f"processed_rsync_log_{wmonum}.txt"
+        )
+
+    def consumed(self, wmonum: str, imei: str) -> set[str]:
+        """Names of the rsync lists of ``wmonum`` already processed by the decoder."""
+        try:
+            with open(self.history_file(wmonum, imei), encoding="utf-8", errors="replace") as f:
+                return {os.path.basename(line.strip()) for line in f if line.strip()}
+        except FileNotFoundError:
+            return set()
+
+    def new_logs(self, wmonum: str, imei: str, log_directory: str | Path) -> list[str]:
+        """Lists of ``log_directory`` not processed yet, oldest first."""
+        consumed = self.consumed(wmonum, imei)
+        return [name for name in rsync_logs(log_directory) if name not in consumed]
@@ -0,0 +1,281 @@
+"""Two-lane scheduling of decoder runs: real-time surfacings first, bulk reprocessing behind.
+
+* ``realtime`` jobs may use every slot;
+* ``bulk`` jobs never use more than ``bulk_slots``, so real-time floats always find a
+  free slot unless ``bulk_slots`` equals ``slots``;
+* when a real-time job is waiting and every slot is busy, a running bulk job is
+  paused (SIGSTOP of its process group) to make room, then resumed (SIGCONT) once
+  the real-time load goes down. A paused run keeps its memory but uses no CPU, and
+  its paused time is not charged to its timeout. Only a job whose decoder process
+  is running can be paused; a job still before or already after it keeps its slot;
+* a float has one running job at most: a run holds its float lock, so a second
+  job of the same float stays queued until the first one ends. A real-time
+  request for a float whose bulk run is paused resumes that run and moves it to
+  the real-time lane.
+"""
+
+import threading
+import time
+from collections import deque
+from collections.abc import Callable
+from concurrent.futures import Future
+from typing import Any
+
+from pydantic import BaseModel
+
+from .process import ProcessControl
+
+REALTIME = "realtime"
+BULK = "bulk"
+LANES = (REALTIME, BULK)
+
+# Exécution d'un job : (wmo, force, contrôle du process) -> résultat
+LaneHandler = Callable[[str, bool, ProcessControl], Any]
+
+# Nombre de mesures conservées par file pour les statistiques
+_SAMPLES = 1000
+
+
+class LaneMetrics(BaseModel):
+    """Counters and recent queue-wait / run-time statistics of one lane (seconds)."""
+
+    lane: str
+    submitted: int = 0
+    completed: int = 0
+    queued: int = 0
+    running: int = 0
+    paused: int = 0
+    preemptions: int = 0
+    wait_p50: float | None = None
+    wait_p95: float | None = None
+    wait_max: float | None = None
+    run_p50: float | None = None
+    run_p95: float | None = None
+    run_max: float | None = None
+
+
+def _percentile(values: list[float], fraction: float) -> float | None:
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+class _LaneControl(ProcessControl):
+    """Process control that lets the scheduler preempt a job as soon as its process starts."""
+
+    def __init__(self, on_attach: Callable[[], None]):
+        """Create a handle calling ``on_attach`` once a process is bound to it."""
+        super().__init__()
+        self._on_attach = on_attach
+
+    def attach(self, pid: int) -> None:
+        """Bind the handle, then give the scheduler a chance to pause the job."""
+        super().attach(pid)
+        self._on_attach()
+
+
+class _LaneJob:
+    """One queued or running job."""
+
+    __slots__ = ("wmo", "lane", "force", "future", "control", "submitted_at", "started_at")
+
+    def __init__(self, wmo: str, lane: str, force: bool, on_attach: Callable[[], None]):
+        self.wmo = wmo
+        self.lane = lane
+        self.force = force
+        self.future: Future = Future()
+        self.control = _LaneControl(on_attach)
+        self.submitted_at = time.monotonic()
+        self.started_at: float | None = None
+
+
+class LaneScheduler:
+    """Run decoder jobs in a real-time lane and a bulk lane with separate concurrency shares.
+
+    Args:
+        handler: Called as ``handler(wmo, force, control)`` in a dedicated thread.
+        slots: Maximum number of jobs running (not paused) at the same time.
+        bulk_slots: Share of the slots bulk jobs may use (``slots - 1`` by default).
+        preempt: Pause bulk jobs when real-time jobs are waiting for a slot.
+    """
+
+    def __init__(self, handler: LaneHandler, slots: int = 4, bulk_slots: int | None = None, preempt: bool = True):
+        """Create an idle scheduler."""
+        if slots < 1:
+            raise ValueError("A scheduler needs at least one slot.")
+        self._handler = handler
+        self.slots = slots
+        self.bulk_slots = max(1, slots - 1) if bulk_slots is None else min(bulk_slots, slots)
+        self.preempt = preempt
+        self._cond = threading.Condition()
+        self._queues: dict[str, deque[_LaneJob]] = {lane: deque() for lane in LANES}
+        self._queued: dict[str, _LaneJob] = {}
+        self._running: dict[str, list[_LaneJob]] = {lane: [] for lane in LANES}
+        self._paused: list[_LaneJob] = []
+        self._closed = False
+        self._counters = {lane: {"submitted": 0, "completed": 0, "preemptions": 0} for lane in LANES}
+        self._waits: dict[str, deque[float]] = {lane: deque(maxlen=_SAMPLES) for lane in LANES}
+        self._runs: dict[str, deque[float]] = {lane: deque(maxlen=_SAMPLES) for lane in LANES}
+
+    # -- soumission -----------------------------------------------------------
+    def submit(self, wmo: str, lane: str = REALTIME, force: bool = False) -> Future:
+        """Queue a job for ``wmo`` in ``lane``.
+
+        A request for a float already waiting is merged with it; a real-time request
+        promotes a waiting bulk job of the same float to the real-time lane, and
+        resumes and promotes a paused bulk run of that float (the request then
+        runs after it).
+        """
+        if lane not in LANES:
+            raise ValueError(f"Unknown lane '{lane}', expected one of {LANES}.")
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("scheduler is closed")
+            self._counters[lane]["submitted"] += 1
+            if lane == REALTIME:
+                self._promote_paused(wmo)
+            job = self._queued.get(wmo)
+            if job is not None:
+                job.force |= force
+                if lane == REALTIME and job.lane == BULK:
+                    self._queues[BULK].remove(job)
+                    job.lane = REALTIME
+                    self._queues[REALTIME].append(job)
+                    self._dispatch()
+                return job.future
+            job = _LaneJob(wmo, lane, force, self._redispatch)
+            self._queued[wmo] = job
+            self._queues[lane].append(job)
+            self._dispatch()
+            return job.future
+
+    # -- ordonnancement -------------------------------------------------------
+    def _active(self) -> int:
+        return len(self._running[REALTIME]) + len(self._running[BULK]) - len(self._paused)
+
+    def _busy(self, wmo: str) -> bool:
+        return any(job.wmo == wmo for lane in LANES for job in self._running[lane])
+
+    def _ready(self, lane: str) -> list[_LaneJob]:
+        # un job dont le flotteur a déjà un run attendrait son verrou en occupant un slot
+        return [job for job in self._queues[lane] if not self._busy(job.wmo)]
+
+    def _dispatch(self) -> None:
+        """Start, pause or resume jobs (called with the lock held)."""
+        realtime = self._ready(REALTIME)
+        while realtime:
+            if self._active() >= self.slots and self._preempt_for(realtime[0].wmo) is None:
+                break
+            self._start(realtime.pop(0))
+        # la charge temps réel a baissé : on relance d'abord les jobs suspendus
+        while self._paused and not realtime and self._active() < self.slots:
+            self._paused.pop().control.resume()
+        bulk = self._ready(BULK)
+        while bulk and not self._paused and self._active() < self.slots and len(self._running[BULK]) < self.bulk_slots:
+            self._start(bulk.pop(0))
+
+    def _promote_paused(self, wmo: str) -> None:
+        """Resume a paused bulk run of ``wmo`` and move it to the real-time lane."""
+        for job in self._paused:
+            if job.wmo == wmo:
+                self._paused.remove(job)
+                self._running[BULK].remove(job)
+                job.lane = REALTIME
+                self._running[REALTIME].append(job)
+                job.control.resume()
+                return
+
+    def _preempt_for(self, wmo: str) -> _LaneJob | None:
+        """Pause a running bulk job to free a slot for ``wmo``; returns it, or None if none could be paused."""
+        if not self.preempt:
+            return None
+        # un run du même flotteur tient son verrou : le suspendre bloquerait le job temps réel
+        candidates = [job for job in self._running[BULK] if job not in self._paused and job.wmo != wmo]
+        # on suspend le dernier démarré, le moins avancé
+        for job in sorted(candidates, key=lambda job: job.started_at, reverse=True):
+            if job.control.pause():
+                self._paused.append(job)
+                self._counters[BULK]["preemptions"] += 1
+                return job
+            # pas de process en cours (avant ou après le décodeur) : la pause ne libère rien
+            job.control.resume()
+        return None
+
+    def _redispatch(self) -> None:
+        # un process vient de démarrer : il peut maintenant être suspendu
+        with self._cond:
+            if self._queues[REALTIME]:
+                self._dispatch()
+
+    def _start(self, job: _LaneJob) -> None:
+        self._queues[job.lane].remove(job)
+        del self._queued[job.wmo]
+        job.started_at = time.monotonic()
+        self._waits[job.lane].append(job.started_at - job.submitted_at)
+        self._running[job.lane].append(job)
+        threading.Thread(target=self._execute, args=(job,), name=f"{job.lane}-{job.wmo}", daemon=True).start()
+
+    def _execute(self, job: _LaneJob) -> None:
+        if job.future.set_running_or_notify_cancel():
+            try:
+                job.future.set_result(self._handler(job.wmo, job.force, job.control))
+            except BaseException as e:  # remonté à l'appelant par la future
+                job.future.set_exception(e)
+        with self._cond:
+            self._running[job.lane].remove(job)
+            if job in self._paused:
+                self._paused.remove(job)
+            self._counters[job.lane]["completed"] += 1
+            self._runs[job.lane].append(time.monotonic() - job.started_at)
+            self._dispatch()
+            self._cond.notify_all()
+
+    # -- métriques / arrêt ----------------------------------------------------
+    def metrics(self) -> dict[str, LaneMetrics]:
+        """Per-lane counters and queue-wait / run-time percentiles."""
+        with self._cond:
+            result = {}
+            for lane in LANES:
+                waits, runs = list(self._waits[lane]), list(self._runs[lane])
+                result[lane] = LaneMetrics(
+                    lane=lane,
+                    **self._counters[lane],
+                    queued=len(self._queues[lane]),
+                    running=len(self._running[lane]),
+                    paused=sum(1 for job in self._paused if job.lane == lane),
+                    wait_p50=_percentile(waits, 0.5),
+                    wait_p95=_percentile(waits, 0.95),
+                    wait_max=max(waits, default=None),
+                    run_p50=_percentile(runs, 0.5),
+                    run_p95=_percentile(runs, 0.95),
+                    run_max=max(runs, default=None),
+                )
+            return result
+
+    def join(self, timeout: float | None = None) -> bool:
+        """Wait until both lanes are empty and idle; False on timeout."""
+        with self._cond:
+            return self._cond.wait_for(
+                lambda: not any(self._queues.values()) and not any(self._running.values()), timeout=timeout
+            )
+
+    def close(self, wait: bool = True) -> None:
+        """Stop accepting jobs; with ``wait``, run the queued ones first, otherwise cancel them."""
+        with self._cond:
+            self._closed = True
+            if not wait:
+                for queue in self._queues.values():
+                    for job in queue:
+                        job.future.cancel()
+                    queue.clear()
+                self._queued.clear()
+        self.join()
+
+    def __enter__(self) -> "LaneScheduler":
+        """Use the scheduler as a context manager."""
+        return self
+
+    def __exit__(self, *exc) -> None:
+        """Run the queued jobs and wait for them."""
+        self.close()
@@ -0,0 +1,225 @@
+"""Incremental output mode: decode into a staged copy of a float's NetCDF files.
+
+``docker-decoder-linux.sh`` deletes ``nc/<wmo>`` and the Iridium buffers of the
+float before every run, so the decoder rebuilds its whole history. Keeping them
+lets the decoder only process the new transmissions, but it then updates the
+outputs in place, and a failed or killed run can leave them half written.
+
+An :class:`OutputStage` clones ``<root>/<wmo>`` into ``<root>/.staging/`` (same
+file system, so the final renames are atomic) with copy-on-write clones
+(``FICLONE``): the cost is one clone per file, whatever their size. The decoder
+writes into the clone. After a successful run, :meth:`OutputStage.commit`
+renames the new and changed files over the live ones and deletes the files the
+decoder removed. Untouched clones are recognised by their unchanged size and
+mtime; rewritten files with the same content (dates aside) are left alone.
+A failed run just discards the stage.
+
+The decoder also keeps state out of ``nc/<wmo>``: the Iridium buffers and the
+history of processed rsync lists (``IRIDIUM_DATA_DIRECTORY/<imei>_<wmo>``),
+written before the NetCDF files. With ``state_root``, a snapshot of those
+directories (reflinks, or a plain copy) is taken with the stage and put back
+when the stage is discarded, so that the lists of a failed or killed run are
+processed again by the next one.
+
+Where the file system has no reflinks, a copy would cost the size of the whole
+float tree on every run, so the stage falls back to the live tree: only the size
+and mtime of the live files are recorded, the decoder writes in place and
+:meth:`OutputStage.commit` only reports what changed. A failed run is then not
+isolated from the live outputs, but the Iridium state is still rolled back.
+"""
+
+import fcntl
+import os
+import shutil
+import tempfile
+from pathlib import Path
+
+from .manifest import PublishReport
+from .netcdf import content_hash
+from .state import file_sha256
+
+# ioctl(FICLONE) de <linux/fs.h> : clone copy-on-write (btrfs, XFS, bcachefs...)
+_FICLONE = 0x40049409
+
+STAGING_DIRECTORY = ".staging"
+
+
+def reflink_file(source: Path, destination: Path) -> bool:
+    """Clone ``source`` to ``destination`` (with its mtime) copy-on-write; False, and no file, if not supported."""
+    with open(source, "rb") as src, open(destination, "wb") as dst:
+        try:
+            fcntl.ioctl(dst.fileno(), _FICLONE, src.fileno())
+            cloned = True
+        except OSError:
+            cloned = False
+    if not cloned:
+        destination.unlink()
+        return False
+    shutil.copystat(source, destination)
+    return True
+
+
+def _snapshot_file(source: str, destination: str) -> None:
+    # copy_function de shutil.copytree : clone si possible, copie sinon
+    if not reflink_file(Path(source), Path(destination)):
+        shutil.copy2(source, destination)
+
+
+def _same_content(staged: Path, live: Path) -> bool:
+    if not live.is_file():
+        return False
+    if staged.suffix == ".nc":
+        return content_hash(staged) == content_hash(live)
+    return staged.stat().st_size == live.stat().st_size and file_sha256(staged) == file_sha256(live)
+
+
+def _signature(path: Path) -> tuple[int, int]:
+    st = path.stat()
+    return st.st_size, st.st_mtime_ns
+
+
+class OutputStage:
+    """Staged copy of ``<root>/<wmo>``, swapped file by file into the live tree.
+
+    Args:
+        root: NetCDF output root (``DIR_OUTPUT_NETCDF_FILE``).
+        wmonum: Float whose outputs are staged.
+        state_root: ``IRIDIUM_DATA_DIRECTORY``, whose float directories are rolled back on discard.
+    """
+
+    def __init__(self, root: str | Path, wmonum: str, state_root: str | Path | None = None):
+        """Create an empty stage under ``<root>/.staging``."""
+        self.root = Path(root)
+        self.wmonum = wmonum
+        self.state_root = Path(state_root) if state_root is not None else None
+        self.live = self.root / wmonum
+        (self.root / STAGING_DIRECTORY).mkdir(parents=True, exist_ok=True)
+        # le décodeur écrit dans <directory>/<wmo>/ : directory remplace DIR_OUTPUT_NETCDF_FILE
+        self.directory = Path(tempfile.mkdtemp(prefix=f"{wmonum}_", dir=self.root / STAGING_DIRECTORY))
+        self.staged = self.directory / wmonum
+        # True : pas de reflink, le décodeur écrit directement dans les sorties
+        self.in_place = False
+        # fichier (relatif à <wmo>/) -> (taille, mtime_ns) avant le run
+        self._cloned: dict[str, tuple[int, int]] = {}
+        # copie des répertoires Iridium du flotteur avant le run, None une fois validée ou restaurée
+        self._state_snapshot: Path | None = None
+
+    def prepare(self) -> Path:
+        """Clone the live outputs into the stage and snapshot the Iridium state; returns the directory to decode into.
+
+        Without reflinks, the stage is dropped and the live root is returned.
+        """
+        self._snapshot_state()
+        self.staged.mkdir()
+        files = sorted(p for p in self.live.rglob("*") if p.is_file()) if self.live.is_dir() else []
+        for path in files:
+            name = path.relative_to(self.live).as_posix()
+            target = self.staged / name
+            target.parent.mkdir(parents=True, exist_ok=True)
+            if not reflink_file(path, target):
+                return self._fall_back_to_live(files)
+            self._cloned[name] = _signature(target)
+        return self.directory
+
+    def _fall_back_to_live(self, files: list[Path]) -> Path:
+        shutil.rmtree(self.directory, ignore_errors=True)
+        self.in_place = True
+        self.directory, self.staged = self.root, self.live
+        self._cloned = {path.relative_to(self.live).as_posix(): _signature(path) for path in files}
+        return self.directory
+
+    def _snapshot_state(self) -> None:
+        if self.state_root is None:
+            return
+        self._state_snapshot = Path(tempfile.mkdtemp(prefix=f"{self.wmonum}_state_", dir=self.root / STAGING_DIRECTORY))
+        try:
+            for directory in float_state_directories(self.state_root, self.wmonum):
+                shutil.copytree(directory, self._state_snapshot / directory.name, copy_function=_snapshot_file)
+        except OSError:
+            # copie partielle : rien à restaurer
+            self._drop_state_snapshot()
+            raise
+
+    def _restore_state(self) -> None:
+        # répertoires créés par le run supprimés, ceux d'avant remis tels quels
+        saved = {path.name for path in self._state_snapshot.iterdir()}
+        for directory in float_state_directories(self.state_root, self.wmonum):
+            if directory.name not in saved:
+                shutil.rmtree(directory)
+        for name in saved:
+            shutil.rmtree(self.state_root / name, ignore_errors=True)
+            shutil.move(self._state_snapshot / name, self.state_root / name)
+        self._drop_state_snapshot()
+
+    def _drop_state_snapshot(self) -> None:
+        if self._state_snapshot is not None:
+            shutil.rmtree(self._state_snapshot, ignore_errors=True)
+            self._state_snapshot = None
+
+    def _untouched(self, name: str, path: Path) -> bool:
+        return self._cloned.get(name) == _signature(path)
+
+    def commit(self) -> PublishReport:
+        """Rename the new and changed files over the live ones, delete the removed ones, then discard the stage.
+
+        The Iridium state written by the run is kept.
+        """
+        report = PublishReport(wmo=self.wmonum)
+        staged_names = set()
+        files = sorted(p for p in self.staged.rglob("*") if p.is_file()) if self.staged.is_dir() else []
+        for path in files:
+            name = path.relative_to(self.staged).as_posix()
+            staged_names.add(name)
+            if self.in_place:
+                # déjà en place : on ne fait que constater
+                if self._untouched(name, path):
+                    report.unchanged += 1
+                else:
+                    (report.changed if name in self._cloned else report.new).append(name)
+                continue
+            live = self.live / name
+            if self._untouched(name, path) or _same_content(path, live):
+                report.unchanged += 1
+                continue
+            (report.changed if live.exists() else report.new).append(name)
+            live.parent.mkdir(parents=True, exist_ok=True)
+            os.replace(path, live)
+        report.removed = sorted(self._cloned.keys() - staged_names)
+        if not self.in_place:
+            for name in report.removed:
+                (self.live / name).unlink(missing_ok=True)
+        self._drop_state_snapshot()
+        self.discard()
+        return report
+
+    def discard(self) -> None:
+        """Delete the stage and put the Iridium state back as it was before the run.
+
+        The live outputs are left as they are. After :meth:`commit`, only the stage is deleted.
+        """
+        if self._state_snapshot is not None:
+            self._restore_state()
+        if not self.in_place:
+            shutil.rmtree(self.directory, ignore_errors=True)
+
+
+def float_state_directories(iridium_root: Path, wmonum: str) -> list[Path]:
+    """Iridium directories ``iridium/*<wmo>`` of a float (buffers, processed-data history)."""
+    if not iridium_root.is_dir():
+        return []
+    return sorted(path for path in iridium_root.glob(f"*{wmonum}") if path.is_dir())
+
+
+def wipe_float_outputs(netcdf_root: Path | None, iridium_root: Path | None, wmonum: str) -> list[Path]:
+    """Delete ``nc/<wmo>`` and the Iridium buffers ``iridium/*<wmo>`` of a float, like ``docker-decoder-linux.sh``.
+
+    Returns:
+        The deleted directories.
+    """
+    targets = [netcdf_root / wmonum] if netcdf_root is not None else []
+    if iridium_root is not None:
+        targets += float_state_directories(iridium_root, wmonum)
+    deleted = [path for path in targets if path.is_dir()]
+    for path in deleted:
+        shutil.rmtree(path)
+    return deleted
@@ -0,0 +1,125 @@
+"""Per-float record of the input files already handed to the decoder."""
+
+import fcntl
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from collections.abc import Iterator
+from contextlib import contextmanager
+from pathlib import Path
+
+from .catalog import ArchiveCatalog
+
+# Empreinte d'un fichier : [taille, mtime_ns] ou [taille, mtime_ns, sha256]
+Snapshot = dict[str, list]
+
+
+def file_sha256(path: str | Path, block_size: int = 1024 * 1024) -> str:
+    """SHA-256 of a file, read by blocks."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+@contextmanager
+def file_lock(path: Path, shared: bool = False) -> Iterator[None]:
+    """Exclusive (or ``shared``) lock on ``path``, seen by threads and processes (hidden ``.<name>.lock`` file)."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path.parent / f".{path.name}.lock", "a") as lock:
+        fcntl.flock(lock, fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+def atomic_write_text(path: Path, text: str) -> None:
+    """Write ``text`` to ``path`` through a temporary file and an atomic rename."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(text)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        Path(tmp).unlink(missing_ok=True)
+        raise
+
+
+class InputState:
+    """Remember, per WMO, the input file set of the last successful decoding.
+
+    Each float has a ``<wmo>.json`` file in ``state_directory`` mapping input file
+    names to their size and mtime (and SHA-256 when ``use_content_hash`` is set,
+    for file systems where mtimes are not reliable).
+
+    With ``use_catalog`` (and no content hash), the size and mtime come from an
+    :class:`~.catalog.ArchiveCatalog` of the archive kept in ``state_directory``:
+    a float directory is only listed again when its mtime changed.
+    """
+
+    def __init__(self, state_directory: str | Path, use_content_hash: bool = False, use_catalog: bool = False):
+        """Use (and create if needed) ``state_directory``."""
+        self.state_directory = Path(state_directory)
+        self.state_directory.mkdir(parents=True, exist_ok=True)
+        self.use_content_hash = use_content_hash
+        self.use_catalog = use_catalog
+        # un catalogue par racine d'archive
+        self._catalogs: dict[Path, ArchiveCatalog] = {}
+        self._catalogs_lock = threading.Lock()
+
+    def _catalog(self, archive_directory: Path) -> ArchiveCatalog:
+        with self._catalogs_lock:
+            catalog = self._catalogs.get(archive_directory)
+            if catalog is None:
+                key = hashlib.sha256(str(archive_directory.resolve()).encode()).hexdigest()[:16]
+                catalog = ArchiveCatalog(archive_directory, self.state_directory / f"catalog_{key}.sqlite")
+                self._catalogs[archive_directory] = catalog
+            return catalog
+
+    def snapshot(self, input_directory: Path) -> Snapshot:
+        """Fingerprint of the regular files of ``input_directory`` (``<archive>/<imei>``)."""
+        if self.use_catalog and not self.use_content_hash:
+            catalog = self._catalog(input_directory.parent)
+            catalog.refresh(input_directory.name)
+            return catalog.snapshot(input_directory.name)
+        snapshot: Snapshot = {}
+        with os.scandir(input_directory) as entries:
+            for entry in entries:
+                if not entry.is_file():
+                    continue
+                st = entry.stat()
+                fingerprint = [st.st_size, st.st_mtime_ns]
+                if self.use_content_hash:
+                    fingerprint.append(file_sha256(entry.path))
+                snapshot[entry.name] = fingerprint
+        return snapshot
+
+    def _path(self, wmonum: str) -> Path:
+        return self.state_directory / f"{wmonum}.json"
+
+    def load(self, wmonum: str) -> Snapshot | None:
+        """Last recorded snapshot of ``wmonum``, if any."""
+        try:
+            return json.loads(self._path(wmonum).read_text(encoding="utf-8"))["files"]
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def save(self, wmonum: str, snapshot: Snapshot) -> None:
+        """Record ``snapshot`` as the processed input set of ``wmonum``."""
+        atomic_write_text(self._path(wmonum), json.dumps({"wmo": wmonum, "files": snapshot}, sort_keys=True))
+
+    def unchanged(self, wmonum: str, snapshot: Snapshot) -> bool:
+        """True when ``snapshot`` matches the recorded input set of ``wmonum``."""
+        return self.load(wmonum) == snapshot
+
+    def new_files(self, wmonum: str, snapshot: Snapshot) -> list[str]:
+        """Names of files that are new or modified since the recorded snapshot."""
+        previous = self.load(wmonum) or {}
+        return sorted(name for name, fingerprint in snapshot.items() if previous.get(name) != fingerprint)
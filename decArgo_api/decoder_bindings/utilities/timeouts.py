@@ -0,0 +1,50 @@
+"""Per-float timeouts derived from the recorded durations of earlier runs.
+
+A flat timeout has to fit the slowest float of the fleet, so a hung run of a
+two-minute float blocks its worker for the whole of it. Here the timeout of a
+float is a high percentile of its own durations times a safety margin, bounded
+by a floor and by the flat timeout. A run that goes over it is a straggler: its
+process group is stopped (SIGTERM, then SIGKILL) and it can be relaunched once
+with the flat timeout, in case the float really got slower (e.g. many new cycles).
+"""
+
+import math
+
+from pydantic import BaseModel, Field
+
+
+def percentile(values: list[float], fraction: float) -> float | None:
+    """Nearest-rank percentile of ``values`` (None when empty)."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(fraction * len(ordered)) - 1)]
+
+
+class TimeoutPolicy(BaseModel):
+    """How the timeout of a float follows its duration history.
+
+    Attributes:
+        percentile: Percentile of the recorded durations the timeout is based on.
+        margin: Factor applied to that percentile.
+        minimum: Lowest timeout (seconds), whatever the history.
+        min_runs: Recorded runs needed before the flat timeout is replaced.
+        relaunch: Relaunch a run stopped by its adaptive timeout once, with the flat timeout.
+    """
+
+    percentile: float = Field(default=0.95, gt=0, le=1)
+    margin: float = Field(default=3.0, ge=1)
+    minimum: float = Field(default=120.0, gt=0)
+    min_runs: int = Field(default=3, ge=1)
+    relaunch: bool = False
+
+    def timeout_for(self, durations: list[float], ceiling: float | None) -> float | None:
+        """Timeout of a float whose previous runs lasted ``durations`` seconds.
+
+        ``ceiling`` (the flat timeout) is returned as is when the history is too
+        short, and bounds the adaptive value otherwise.
+        """
+        if len(durations) < self.min_runs:
+            return ceiling
+        timeout = max(self.minimum, percentile(durations, self.percentile) * self.margin)
+        return timeout if ceiling is None else min(timeout, ceiling)
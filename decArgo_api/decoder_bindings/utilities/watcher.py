@@ -0,0 +1,271 @@
+"""Trigger decoder runs from the files rsync drops, instead of polling on a timer.
+
+rsync writes the files of a float into ``DIR_INPUT_RSYNC_DATA/<imei>/`` and then a
+``DIR_INPUT_RSYNC_LOG/<imei>/rsync_<timestamp>.txt`` list. :class:`DropWatcher`
+watches both trees with inotify (through ``ctypes``, no extra dependency), or by
+scanning them periodically where inotify is not available (non-Linux systems,
+some network file systems). Events of a float are merged until it stays quiet
+for ``debounce`` seconds, then its IMEI/PTT directory is mapped to its WMO and
+``on_float(wmo)`` is called.
+"""
+
+import ctypes
+import ctypes.util
+import errno
+import os
+import select
+import struct
+import threading
+import time
+from collections.abc import Callable, Iterable
+from pathlib import Path
+from typing import Any
+
+# Constantes de <sys/inotify.h>
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_TO = 0x00000080
+_IN_CREATE = 0x00000100
+_IN_Q_OVERFLOW = 0x00004000
+_IN_IGNORED = 0x00008000
+_IN_ISDIR = 0x40000000
+_IN_NONBLOCK = os.O_NONBLOCK
+_IN_CLOEXEC = os.O_CLOEXEC
+_WATCH_MASK = _IN_CLOSE_WRITE | _IN_MOVED_TO | _IN_CREATE
+# struct inotify_event : wd, mask, cookie, len (+ nom)
+_EVENT = struct.Struct("iIII")
+
+
+def _ignored(name: str) -> bool:
+    # rsync écrit dans un fichier caché temporaire puis le renomme
+    return name.startswith(".")
+
+
+def _subdirectories(root: Path) -> list[Path]:
+    try:
+        with os.scandir(root) as entries:
+            return [Path(e.path) for e in entries if e.is_dir() and not _ignored(e.name)]
+    except FileNotFoundError:
+        return []
+
+
+class InotifySource:
+    """Float directories that received files, from inotify events (Linux only)."""
+
+    def __init__(self, roots: list[Path]):
+        """Watch every root and its float sub-directories.
+
+        Raises:
+            OSError: If inotify is not available.
+        """
+        libc_name = ctypes.util.find_library("c")
+        libc = ctypes.CDLL(libc_name, use_errno=True) if libc_name else None
+        if libc is None or not hasattr(libc, "inotify_init1"):
+            raise OSError(errno.ENOSYS, "inotify is not available")
+        self._libc = libc
+        self._fd = libc.inotify_init1(_IN_NONBLOCK | _IN_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.roots = roots
+        self._directories: dict[int, Path] = {}
+        for root in roots:
+            self._watch(root)
+            for directory in _subdirectories(root):
+                self._watch(directory)
+
+    def _watch(self, directory: Path) -> None:
+        wd = self._libc.inotify_add_watch(self._fd, os.fsencode(directory), _WATCH_MASK)
+        if wd < 0:
+            print(f"Cannot watch {directory}: {os.strerror(ctypes.get_errno())}")
+            return
+        self._directories[wd] = directory
+
+    def changes(self, timeout: float) -> set[Path]:
+        """Float directories that received files, waiting up to ``timeout`` seconds for events."""
+        ready, _, _ = select.select([self._fd], [], [], timeout)
+        if not ready:
+            return set()
+        try:
+            data = os.read(self._fd, 64 * 1024)
+        except BlockingIOError:
+            return set()
+        changed: set[Path] = set()
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, length = _EVENT.unpack_from(data, offset)
+            name = data[offset + _EVENT.size : offset + _EVENT.size + length].rstrip(b"\0").decode(errors="replace")
+            offset += _EVENT.size + length
+            changed |= self._handle(wd, mask, name)
+        return changed
+
+    def _handle(self, wd: int, mask: int, name: str) -> set[Path]:
+        if mask & _IN_Q_OVERFLOW:
+            # événements perdus : on considère que tous les flotteurs ont pu recevoir des fichiers
+            return {directory for root in self.roots for directory in _subdirectories(root)}
+        if mask & _IN_IGNORED:
+            self._directories.pop(wd, None)
+            return set()
+        directory = self._directories.get(wd)
+        if directory is None or _ignored(name):
+            return set()
+        if mask & _IN_ISDIR:
+            if directory not in self.roots:
+                return set()
+            # nouveau flotteur : ses premiers fichiers ont pu arriver avant le watch
+            self._watch(directory / name)
+            return {directory / name}
+        return {directory} if directory not in self.roots else set()
+
+    def close(self) -> None:
+        """Release the inotify descriptor."""
+        os.close(self._fd)
+
+
+class PollingSource:
+    """Float directories that received files, found by comparing periodic scans."""
+
+    def __init__(self, roots: list[Path], interval: float = 5.0):
+        """Take the initial scan of every root."""
+        self.roots = roots
+        self.interval = interval
+        self._state = self._scan()
+        self._scanned_at = time.monotonic()
+
+    def _scan(self) -> dict[Path, dict[str, tuple[int, int]]]:
+        state: dict[Path, dict[str, tuple[int, int]]] = {}
+        for root in self.roots:
+            for directory in _subdirectories(root):
+                files = {}
+                try:
+                    with os.scandir(directory) as entries:
+                        for entry in entries:
+                            if entry.is_file() and not _ignored(entry.name):
+                                st = entry.stat()
+                                files[entry.name] = (st.st_size, st.st_mtime_ns)
+                except FileNotFoundError:
+                    continue
+                state[directory] = files
+        return state
+
+    def changes(self, timeout: float) -> set[Path]:
+        """Float directories whose files changed since the previous scan (one scan every ``interval``)."""
+        wait = self.interval - (time.monotonic() - self._scanned_at)
+        if wait > 0:
+            time.sleep(min(wait, timeout))
+            if wait > timeout:
+                return set()
+        state = self._scan()
+        self._scanned_at = time.monotonic()
+        changed = {d for d, files in state.items() if files and files != self._state.get(d)}
+        self._state = state
+        return changed
+
+    def close(self) -> None:
+        """Nothing to release."""
+
+
+class DropWatcher:
+    """Call ``on_float(wmo)`` shortly after rsync drops files for a float.
+
+    Args:
+        roots: Directories holding one sub-directory per float (IMEI/PTT), e.g.
+            ``DIR_INPUT_RSYNC_LOG`` and ``DIR_INPUT_RSYNC_DATA``.
+        resolve: Maps a float directory name (IMEI/PTT) to its WMO, or None if unknown.
+        on_float: Called with the WMO of a float that received files.
+        debounce: Quiet time (seconds) after the last event of a float before it is triggered.
+        poll_interval: Scan period when falling back to polling.
+        use_inotify: Use inotify when available; False forces polling.
+    """
+
+    # Période de la boucle de surveillance (réactivité de stop())
+    _TICK = 0.25
+
+    def __init__(
+        self,
+        roots: Iterable[str | Path],
+        resolve: Callable[[str], str | None],
+        on_float: Callable[[str], Any],
+        debounce: float = 2.0,
+        poll_interval: float = 5.0,
+        use_inotify: bool = True,
+    ):
+        """Create a stopped watcher."""
+        self.roots = [Path(root) for root in dict.fromkeys(str(r) for r in roots)]
+        self.resolve = resolve
+        self.on_float = on_float
+        self.debounce = debounce
+        self.poll_interval = poll_interval
+        self.use_inotify = use_inotify
+        self.backend: str | None = None
+        self.stats = {"events": 0, "triggered": 0, "unknown": 0}
+        self._source: InotifySource | PollingSource | None = None
+        self._pending: dict[str, float] = {}
+        self._unknown: set[str] = set()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def _open_source(self) -> InotifySource | PollingSource:
+        roots = [root for root in self.roots if root.is_dir()]
+        for root in set(self.roots) - set(roots):
+            print(f"Watched directory {root} does not exist, ignored")
+        if self.use_inotify:
+            try:
+                self.backend = "inotify"
+                return InotifySource(roots)
+            except OSError as e:
+                print(f"inotify unavailable ({e}), polling every {self.poll_interval}s")
+        self.backend = "polling"
+        return PollingSource(roots, self.poll_interval)
+
+    def start(self) -> "DropWatcher":
+        """Start watching in a background thread."""
+        if self._thread is not None:
+            return self
+        self._stop.clear()
+        self._source = self._open_source()
+        self._thread = threading.Thread(target=self._loop, name="drop-watcher", daemon=True)
+        self._thread.start()
+        return self
+
+    def _loop(self) -> None:
+        try:
+            while not self._stop.is_set():
+                now = time.monotonic()
+                for directory in self._source.changes(self._TICK):
+                    self.stats["events"] += 1
+                    self._pending[directory.name] = now
+                self._dispatch(now)
+        finally:
+            self._source.close()
+
+    def _dispatch(self, now: float) -> None:
+        for name, last_event in list(self._pending.items()):
+            if now - last_event < self.debounce:
+                continue
+            del self._pending[name]
+            wmonum = self.resolve(name)
+            if wmonum is None:
+                self.stats["unknown"] += 1
+                if name not in self._unknown:
+                    self._unknown.add(name)
+                    print(f"Files received for unknown float '{name}' (not in json_float_info)")
+                continue
+            self.stats["triggered"] += 1
+            try:
+                self.on_float(wmonum)
+            except Exception as e:  # une erreur de déclenchement ne doit pas arrêter la surveillance
+                print(f"Cannot queue a decoding of {wmonum}: {e}")
+
+    def stop(self) -> None:
+        """Stop watching (floats still in their debounce delay are not triggered)."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def __enter__(self) -> "DropWatcher":
+        """Start the watcher."""
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        """Stop the watcher."""
+        self.stop()
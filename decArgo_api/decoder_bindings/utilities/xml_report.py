@@ -0,0 +1,312 @@
+"""Reading of the XML report written by the decoder (``xmlreport`` argument).
+
+A report (``finalize_xml_report.m``) holds one ``float_N`` element per decoded
+float (cycles, input and output files), the ``INFO:``/``WARNING:``/``ERROR:``
+lines of the run log (``decoding_*``, ``rt_qc_*`` and ``rt_adj_*`` elements),
+the MATLAB exception if any (``matlab_error``), the run ``duration`` and its
+``status``. :func:`parse_report` reads it element by element, so the memory used
+does not grow with the size of the report, and :func:`summarize_reports` merges
+the reports of a batch into one :class:`BatchSummary`.
+"""
+
+import re
+import statistics
+import xml.etree.ElementTree as ET
+from collections.abc import Iterable, Iterator
+from pathlib import Path
+
+from pydantic import BaseModel, Field
+
+from .state import atomic_write_text
+
+# Le décodeur attend un nom de la forme co041404_yyyymmddTHHMMSSZ[_PID].xml
+REPORT_PREFIX = "co041404_"
+
+# Éléments des messages du log : étape et niveau
+MESSAGE_TAGS = {
+    f"{stage}_{level}": (stage, level)
+    for stage in ("decoding", "rt_qc", "rt_adj")
+    for level in ("info", "warning", "error")
+}
+# Champs simples de la racine du rapport
+_RUN_FIELDS = ("function", "decoder_version", "date", "status")
+
+_FLOAT_RE = re.compile(r"Float #\s*(\d+)")
+_NUMBER_RE = re.compile(r"\d+")
+
+
+class FloatReport(BaseModel):
+    """Part of a decoder run concerning one float."""
+
+    wmo: str
+    status: str = "nok"
+    returncode: int | None = None
+    cycles: list[int] = Field(default_factory=list)
+    input_files: list[str] = Field(default_factory=list)
+    output_files: list[str] = Field(default_factory=list)
+    warnings: list[str] = Field(default_factory=list)
+    errors: list[str] = Field(default_factory=list)
+    # Durée du run, quand il n'a décodé que ce flotteur
+    duration: float | None = None
+    report_file: Path | None = None
+
+
+class ReportMessage(BaseModel):
+    """One message of a report.
+
+    Attributes:
+        stage: ``decoding``, ``rt_qc``, ``rt_adj`` or ``matlab``.
+        level: ``info``, ``warning`` or ``error``.
+        text: Message, without its ``WARNING:``-like prefix.
+        wmo: Float the message is about, when known.
+    """
+
+    stage: str
+    level: str
+    text: str
+    wmo: str | None = None
+
+    @property
+    def signature(self) -> str:
+        """Text with its numbers masked, to group the same message across floats and cycles."""
+        return _NUMBER_RE.sub("N", self.text)
+
+
+class RunReport(BaseModel):
+    """Structured content of one XML report."""
+
+    report_file: Path | None = None
+    function: str | None = None
+    decoder_version: str | None = None
+    date: str | None = None
+    status: str = "nok"
+    # Durée du run en secondes
+    duration: float | None = None
+    floats: list[FloatReport] = Field(default_factory=list)
+    messages: list[ReportMessage] = Field(default_factory=list)
+
+    def messages_at(self, level: str) -> list[ReportMessage]:
+        """Messages of ``level`` (``info``, ``warning`` or ``error``)."""
+        return [message for message in self.messages if message.level == level]
+
+
+def report_file_name(timestamp: str, suffix: str) -> str:
+    """Build a report name the decoder accepts, e.g. ``co041404_20250101T000000Z_6902892.xml``."""
+    return f"{REPORT_PREFIX}{timestamp}_{suffix}.xml"
+
+
+def parse_duration(text: str | None) -> float | None:
+    """Seconds of a ``HH:MM:SS`` duration (``format_time_dec_argo``), None when unreadable."""
+    parts = (text or "").replace(" ", "").lstrip("-").split(":")
+    if len(parts) != 3 or not all(part.isdigit() for part in parts):
+        return None
+    hours, minutes, seconds = (int(part) for part in parts)
+    return float(hours * 3600 + minutes * 60 + seconds)
+
+
+def _text(element: ET.Element | None) -> str:
+    return "" if element is None or element.text is None else element.text.strip()
+
+
+def _float_report(element: ET.Element, report_file: Path) -> FloatReport | None:
+    wmo = _text(element.find("float_wmo"))
+    if not wmo:
+        return None
+    return FloatReport(
+        wmo=wmo,
+        cycles=[int(c) for c in _text(element.find("cycle_list")).split()],
+        input_files=[_text(e) for e in element.iter("input_file")],
+        output_files=[_text(e) for e in element if e.tag.startswith("output_") and _text(e)],
+        report_file=report_file,
+    )
+
+
+def _message(element: ET.Element) -> ReportMessage:
+    if element.tag == "matlab_error":
+        return ReportMessage(
+            stage="matlab",
+            level="error",
+            text=_text(element.find("error_message")),
+            wmo=_text(element.find("float_wmo")) or None,
+        )
+    stage, level = MESSAGE_TAGS[element.tag]
+    text = _text(element)
+    found = _FLOAT_RE.search(text)
+    return ReportMessage(stage=stage, level=level, text=text, wmo=found.group(1) if found else None)
+
+
+def _read_element(report: RunReport, element: ET.Element) -> None:
+    if element.tag.startswith("float_"):
+        float_report = _float_report(element, report.report_file)
+        if float_report is not None:
+            report.floats.append(float_report)
+    elif element.tag in MESSAGE_TAGS or element.tag == "matlab_error":
+        report.messages.append(_message(element))
+    elif element.tag == "duration":
+        report.duration = parse_duration(element.text)
+    elif element.tag in _RUN_FIELDS:
+        setattr(report, element.tag, _text(element) or getattr(report, element.tag))
+
+
+def _attach_messages(report: RunReport) -> None:
+    """Give every float its status, duration, warnings and errors."""
+    single = report.floats[0].wmo if len(report.floats) == 1 else None
+    failed = {m.wmo for m in report.messages if m.stage == "matlab"}
+    for float_report in report.floats:
+        # le statut du run est commun à tous ses flotteurs, sauf exception MATLAB sur l'un d'eux
+        float_report.status = "nok" if float_report.wmo in failed else report.status
+        float_report.duration = report.duration if single else None
+        for message in report.messages:
+            if (message.wmo or single) != float_report.wmo:
+                continue
+            if message.level == "warning":
+                float_report.warnings.append(message.text)
+            elif message.level == "error":
+                float_report.errors.append(message.text)
+
+
+def parse_report(report_file: str | Path) -> RunReport:
+    """Read an XML report incrementally (each top-level element is dropped once read).
+
+    Raises:
+        xml.etree.ElementTree.ParseError: If the report is not well-formed XML.
+    """
+    report = RunReport(report_file=Path(report_file))
+    depth = 0
+    root = None
+    for event, element in ET.iterparse(report_file, events=("start", "end")):
+        if event == "start":
+            depth += 1
+            root = element if root is None else root
+            continue
+        depth -= 1
+        if depth == 1:
+            _read_element(report, element)
+            root.clear()
+    _attach_messages(report)
+    return report
+
+
+def split_report_by_float(report_file: str | Path) -> dict[str, FloatReport]:
+    """Split a (possibly multi-float) XML report into one :class:`FloatReport` per WMO.
+
+    The run status is shared by every float of the report; a float that appears in
+    a ``matlab_error`` element is marked ``nok`` on its own.
+    """
+    return {float_report.wmo: float_report for float_report in parse_report(report_file).floats}
+
+
+def report_files(paths: Iterable[str | Path]) -> Iterator[Path]:
+    """XML reports named by ``paths``: files as given, directories searched recursively."""
+    for path in map(Path, paths):
+        if path.is_dir():
+            yield from sorted(path.rglob(f"{REPORT_PREFIX}*.xml"))
+        else:
+            yield path
+
+
+class MessageGroup(BaseModel):
+    """Occurrences of the same message (numbers masked) across a batch."""
+
+    stage: str
+    level: str
+    signature: str
+    example: str
+    count: int = 0
+    wmos: list[str] = Field(default_factory=list)
+
+
+class BatchSummary(BaseModel):
+    """Merged outcome of the reports of a batch, e.g. a fleet reprocessing."""
+
+    reports: int = 0
+    unreadable: list[str] = Field(default_factory=list)
+    statuses: dict[str, int] = Field(default_factory=dict)
+    failed: list[str] = Field(default_factory=list)
+    output_files: int = 0
+    total_duration: float = 0.0
+    median_duration: float | None = None
+    # (wmo, durée) des runs les plus longs
+    slowest: list[tuple[str, float]] = Field(default_factory=list)
+    errors: list[MessageGroup] = Field(default_factory=list)
+    warnings: list[MessageGroup] = Field(default_factory=list)
+    floats: dict[str, FloatReport] = Field(default_factory=dict)
+
+    def summary(self) -> str:
+        """One-line report of the batch."""
+        statuses = ", ".join(f"{count} {status}" for status, count in sorted(self.statuses.items()))
+        return (
+            f"{len(self.floats)} floats in {self.reports} reports ({statuses or 'none'}), "
+            f"{self.output_files} output files, {len(self.errors)} kinds of errors, "
+            f"{len(self.warnings)} kinds of warnings, {len(self.unreadable)} unreadable reports"
+        )
+
+    def write(self, path: str | Path) -> None:
+        """Save the summary as JSON (atomic replacement)."""
+        atomic_write_text(Path(path), self.model_dump_json(indent=2))
+
+
+def _group(groups: dict[tuple[str, str, str], MessageGroup], message: ReportMessage, wmos: list[str]) -> None:
+    key = (message.stage, message.level, message.signature)
+    group = groups.get(key)
+    if group is None:
+        group = groups[key] = MessageGroup(
+            stage=message.stage, level=message.level, signature=message.signature, example=message.text
+        )
+    group.count += 1
+    group.wmos.extend(wmo for wmo in wmos if wmo not in group.wmos)
+
+
+def _ranked(groups: dict[tuple[str, str, str], MessageGroup], level: str) -> list[MessageGroup]:
+    return sorted((g for g in groups.values() if g.level == level), key=lambda g: (-g.count, g.signature))
+
+
+def summarize_reports(reports: Iterable[RunReport], slowest: int = 10) -> BatchSummary:
+    """Merge run reports into one summary.
+
+    Warnings and errors are grouped by :attr:`ReportMessage.signature`, most frequent
+    first, with the floats they concern; a float decoded several times keeps its
+    last report.
+    """
+    summary = BatchSummary()
+    groups: dict[tuple[str, str, str], MessageGroup] = {}
+    durations: list[tuple[str, float]] = []
+    for report in reports:
+        summary.reports += 1
+        for float_report in report.floats:
+            summary.floats[float_report.wmo] = float_report
+        run_wmos = [float_report.wmo for float_report in report.floats]
+        for message in report.messages:
+            if message.level != "info":
+                _group(groups, message, [message.wmo] if message.wmo else run_wmos)
+        if report.duration is not None:
+            durations.append((",".join(run_wmos) or str(report.report_file), report.duration))
+
+    for float_report in summary.floats.values():
+        summary.statuses[float_report.status] = summary.statuses.get(float_report.status, 0) + 1
+        summary.output_files += len(float_report.output_files)
+    summary.failed = sorted(wmo for wmo, f in summary.floats.items() if f.status not in ("ok", "skipped"))
+    summary.errors = _ranked(groups, "error")
+    summary.warnings = _ranked(groups, "warning")
+    if durations:
+        summary.total_duration = sum(duration for _, duration in durations)
+        summary.median_duration = statistics.median(duration for _, duration in durations)
+        summary.slowest = sorted(durations, key=lambda item: -item[1])[:slowest]
+    return summary
+
+
+def summarize_report_files(paths: Iterable[str | Path], slowest: int = 10) -> BatchSummary:
+    """Parse the reports named by ``paths`` (see :func:`report_files`) one at a time and merge them."""
+    unreadable: list[str] = []
+
+    def reports() -> Iterator[RunReport]:
+        for path in report_files(paths):
+            try:
+                yield parse_report(path)
+            except (ET.ParseError, OSError) as e:
+                print(f"Unreadable XML report {path}: {e}")
+                unreadable.append(str(path))
+
+    summary = summarize_reports(reports(), slowest)
+    summary.unreadable = unreadable
+    return summary
@@ -0,0 +1,113 @@
+"""Tests de l'admission des runs selon les ressources (utilities/admission.py)."""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from decoder_bindings.utilities.admission import AdmissionController, CostHistory, FloatCost, detect_limits
+
+
+def _write(path: Path, text: str) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text, encoding="utf-8")
+
+
+def test_detect_limits_cgroup_v2_takes_the_tightest_ancestor(tmp_path: Path):
+    cgroup, proc = tmp_path / "cgroup", tmp_path / "proc"
+    _write(cgroup / "cgroup.controllers", "cpu memory")
+    _write(cgroup / "batch" / "cpu.max", "200000 100000")
+    _write(cgroup / "batch" / "memory.max", str(8 * 1024**3))
+    _write(cgroup / "batch" / "decoder" / "cpu.max", "max 100000")
+    _write(cgroup / "batch" / "decoder" / "memory.max", "max")
+    _write(proc / "self" / "cgroup", "0::/batch/decoder\n")
+    _write(proc / "meminfo", "MemTotal: 67108864 kB\nMemAvailable: 33554432 kB\n")
+
+    limits = detect_limits(cgroup, proc)
+
+    assert limits.source == "cgroup2"
+    assert limits.cpus <= 2 and limits.cpu_slots <= 2
+    assert limits.memory_kb == 8 * 1024 * 1024
+    assert limits.memory_budget_kb(0.5) == 4 * 1024 * 1024
+
+
+def test_detect_limits_cgroup_v1_and_host_fallback(tmp_path: Path):
+    cgroup, proc = tmp_path / "cgroup", tmp_path / "proc"
+    _write(cgroup / "cpu" / "cpu.cfs_quota_us", "-1")
+    _write(cgroup / "cpu" / "cpu.cfs_period_us", "100000")
+    _write(cgroup / "memory" / "docker" / "memory.limit_in_bytes", str(4 * 1024**3))
+    _write(cgroup / "memory" / "memory.limit_in_bytes", "9223372036854771712")
+    _write(proc / "self" / "cgroup", "4:memory:/docker\n1:cpu,cpuacct:/docker\n")
+    _write(proc / "meminfo", "MemAvailable: 33554432 kB\n")
+
+    limits = detect_limits(cgroup, proc)
+    assert limits.source == "cgroup1"
+    assert limits.memory_kb == 4 * 1024 * 1024
+
+    host = detect_limits(tmp_path / "missing", proc)
+    assert host.source == "host" and host.memory_kb == 33554432
+
+
+def test_cost_history_estimates_and_persists(tmp_path: Path):
+    history = CostHistory(tmp_path / "costs.json", keep=3)
+    for peak, duration in ((100, 10.0), (300, 30.0), (200, 20.0), (150, 15.0)):
+        history.record("6902892", peak, duration)
+    history.record("6903014", 1000, None)
+
+    reloaded = CostHistory(tmp_path / "costs.json")
+    assert reloaded.peak_rss("6902892") == [300, 200, 150]
+    cost = reloaded.estimate("6902892")
+    assert (cost.peak_rss_kb, cost.duration, cost.runs) == (300, 20.0, 3)
+    # flotteur jamais mesuré : médiane de la flotte
+    unknown = reloaded.estimate("1000000")
+    assert unknown.runs == 0 and unknown.peak_rss_kb == 650 and unknown.duration == 20.0
+    assert CostHistory(tmp_path / "none.json", default_rss_kb=42).estimate("1000000").peak_rss_kb == 42
+
+
+def test_cost_histories_sharing_a_file_keep_each_other_records(tmp_path: Path):
+    # deux process (ici deux instances) chargés avant que l'autre n'écrive
+    first, second = CostHistory(tmp_path / "costs.json"), CostHistory(tmp_path / "costs.json")
+    first.record("6902892", 100, 10.0)
+    second.record("6903014", 200, 20.0)
+    first.record("6902892", 150, 15.0)
+
+    reloaded = CostHistory(tmp_path / "costs.json")
+    assert reloaded.peak_rss("6902892") == [100, 150]
+    assert reloaded.peak_rss("6903014") == [200]
+
+
+def test_admission_packs_small_floats_around_large_ones():
+    controller = AdmissionController(memory_budget_kb=10, slots=4)
+    costs = [FloatCost(wmo=w, peak_rss_kb=kb, duration=1.0) for w, kb in (("L", 7), ("M", 5), ("S1", 2), ("S2", 1))]
+    usage = []
+    lock = threading.Lock()
+    release = threading.Event()
+
+    def run(wmo):
+        with lock:
+            usage.append(controller.used_kb)
+        release.wait(1)
+        return wmo
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        runs = controller.run(pool, costs, run)
+        time.sleep(0.1)
+        release.set()
+        finished = [wmo for wmo, _ in runs]
+
+    assert sorted(finished) == ["L", "M", "S1", "S2"]
+    assert max(usage) <= 10
+    # le gros flotteur d'abord, puis les petits qui tiennent à côté
+    assert finished.index("M") == 3
+
+
+def test_admission_runs_an_oversized_float_alone():
+    controller = AdmissionController(memory_budget_kb=10, slots=2)
+    big = FloatCost(wmo="B", peak_rss_kb=50, duration=1.0)
+    small = FloatCost(wmo="S", peak_rss_kb=1, duration=1.0)
+
+    assert controller.select([big, small]) is big
+    controller.admit(big)
+    assert controller.select([small]) is None
+    controller.release("B")
+    assert controller.select([small]) is small
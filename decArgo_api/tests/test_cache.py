@@ -0,0 +1,102 @@
+"""Tests du cache de résultats adressé par contenu (utilities/cache.py)."""
+
+import fcntl
+import os
+import threading
+import time
+from pathlib import Path
+
+from decoder_bindings.utilities.cache import ResultCache
+
+
+def _outputs(root: Path, wmo: str, size: int = 10) -> list[Path]:
+    files = [root / wmo / "profiles" / f"R{wmo}_00{i}.nc" for i in (1, 2)]
+    for i, path in enumerate(files):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(f"{wmo}_{i}".encode().ljust(size, b"."))
+    return files
+
+
+def test_key_changes_with_inputs_conf_and_executable(tmp_path: Path):
+    cache = ResultCache(tmp_path / "cache")
+    data = tmp_path / "co_a.txt"
+    data.write_text("a", encoding="utf-8")
+    exe = tmp_path / "run.sh"
+    exe.write_text("#!/bin/sh\n", encoding="utf-8")
+    key = cache.key("6902892", {"data/co_a.txt": data}, {"A": 1}, [exe])
+
+    assert cache.key("6902892", {"data/co_a.txt": data}, {"A": 1}, [exe]) == key
+    assert cache.key("6902892", {"data/co_a.txt": data}, {"A": 2}, [exe]) != key
+    assert cache.key("6903014", {"data/co_a.txt": data}, {"A": 1}, [exe]) != key
+    data.write_text("b", encoding="utf-8")
+    assert cache.key("6902892", {"data/co_a.txt": data}, {"A": 1}, [exe]) != key
+    exe.write_text("#!/bin/sh\n# v2\n", encoding="utf-8")
+    os.utime(exe, ns=(time.time_ns(), time.time_ns() + 10**9))  # mtime différent malgré la résolution
+    assert cache.key("6902892", {"data/co_a.txt": data}, {"A": 1}, [exe]) != key
+
+
+def test_store_then_restore_outputs_and_report(tmp_path: Path):
+    cache = ResultCache(tmp_path / "cache")
+    out = tmp_path / "nc"
+    files = _outputs(out, "6902892")
+    report = tmp_path / "co041404_run.xml"
+    report.write_text("<coriolis_function_report/>", encoding="utf-8")
+    iridium = tmp_path / "iridium"
+    history = iridium / "300234065895840_6902892" / "history_of_processed_data" / "processed_rsync_log_6902892.txt"
+    history.parent.mkdir(parents=True)
+    history.write_text("rsync_20200629T092506Z.txt\n", encoding="utf-8")
+    cache.store("k1", "6902892", out, files, report, iridium, [history])
+
+    for path in [*files, history]:
+        path.unlink()
+    entry = cache.lookup("k1")
+    restored = cache.restore(entry, out, tmp_path / "xml" / "co041404_again.xml", iridium)
+
+    assert restored == files and files[1].read_bytes() == b"6902892_1."
+    assert history.read_text(encoding="utf-8") == "rsync_20200629T092506Z.txt\n"
+    assert (tmp_path / "xml" / "co041404_again.xml").read_text(encoding="utf-8") == "<coriolis_function_report/>"
+    assert cache.lookup("missing") is None
+
+
+def test_eviction_by_size_keeps_recently_used_entries(tmp_path: Path):
+    cache = ResultCache(tmp_path / "cache", max_bytes=50)
+    out = tmp_path / "nc"
+    cache.store("old", "6902892", out, _outputs(out, "6902892", size=20), None)
+    cache.store("new", "6903014", out, _outputs(out, "6903014", size=20), None)
+
+    assert cache.lookup("old") is None and cache.lookup("new") is not None
+    assert cache.size() == 40
+
+
+def test_eviction_by_age(tmp_path: Path):
+    cache = ResultCache(tmp_path / "cache", max_age=3600)
+    out = tmp_path / "nc"
+    cache.store("k1", "6902892", out, _outputs(out, "6902892"), None)
+    entry = cache.lookup("k1")
+    entry.created -= 7200
+    (tmp_path / "cache" / "entries" / "k1.json").write_text(entry.model_dump_json(), encoding="utf-8")
+
+    assert cache.lookup("k1") is None
+    assert cache.evict() == 1 and cache.size() == 0
+
+
+def test_eviction_waits_for_a_restore_of_another_process(tmp_path: Path):
+    cache = ResultCache(tmp_path / "cache", max_age=3600)
+    out = tmp_path / "nc"
+    cache.store("k1", "6902892", out, _outputs(out, "6902892"), None)
+    entry = cache.lookup("k1")
+    entry.created -= 7200
+    (tmp_path / "cache" / "entries" / "k1.json").write_text(entry.model_dump_json(), encoding="utf-8")
+
+    # verrou partagé pris par un autre processus en train de restaurer l'entrée
+    with open(tmp_path / "cache" / ".entries.lock", "a") as lock:
+        fcntl.flock(lock, fcntl.LOCK_SH)
+        evicted = []
+        evictor = threading.Thread(target=lambda: evicted.append(cache.evict()))
+        evictor.start()
+        evictor.join(0.3)
+        assert evictor.is_alive() and cache.size() > 0
+        fcntl.flock(lock, fcntl.LOCK_UN)
+    evictor.join(5)
+
+    assert evicted == [1] and cache.size() == 0
@@ -0,0 +1,76 @@
+"""Tests du catalogue SQLite de l'archive rsync (utilities/catalog.py)."""
+
+import os
+from datetime import datetime, timezone
+from pathlib import Path
+
+from decoder_bindings.utilities.catalog import ArchiveCatalog, parse_archive_name
+
+IMEI = "300234065895840"
+
+
+def _archive(tmp_path: Path) -> Path:
+    root = tmp_path / "archive"
+    (root / IMEI).mkdir(parents=True)
+    (root / "nocbio002b").mkdir()
+    for name in (
+        f"co_20200629T083042Z_{IMEI}_000004_000000_20420.txt",
+        f"co_20200629T084534Z_{IMEI}_000007_000000_32201.txt",
+        f"co_20200629T084606Z_{IMEI}_000007_000001_32255.txt",
+        "ignored.log",
+    ):
+        (root / IMEI / name).write_text("x", encoding="utf-8")
+    (root / "nocbio002b" / "250912_205203_nocbio002b_00137.bin").write_bytes(b"x")
+    return root
+
+
+def test_parse_both_name_formats():
+    assert parse_archive_name(f"co_20200629T084534Z_{IMEI}_000007_000000_32201.txt") == (
+        "20200629T084534Z",
+        IMEI,
+        7,
+        32201,
+    )
+    assert parse_archive_name("250912_205203_nocbio002b_00137.bin") == ("20250912T205203Z", "nocbio002b", 137, None)
+    assert parse_archive_name("ignored.log") is None
+
+
+def test_queries(tmp_path: Path):
+    with ArchiveCatalog(_archive(tmp_path), tmp_path / "catalog.sqlite") as catalog:
+        # ignored.log est suivi (taille, mtime) sans être un fichier d'archive
+        assert catalog.refresh() == 5
+        assert "ignored.log" in catalog.snapshot(IMEI) and len(catalog.files(IMEI)) == 3
+        assert catalog.imeis() == [IMEI, "nocbio002b"]
+        assert catalog.cycles(IMEI) == [4, 7]
+        assert [f.cycle for f in catalog.new_files(IMEI, "20200629T084000Z")] == [7, 7]
+        since = datetime(2020, 6, 29, 8, 45, 40, tzinfo=timezone.utc)
+        assert [f.name[:19] for f in catalog.new_files(IMEI, since)] == ["co_20200629T084606Z"]
+        assert len(catalog.cycle_files(IMEI, 7)) == 2
+        assert catalog.last_timestamp("nocbio002b") == "20250912T205203Z"
+
+
+def test_refresh_only_rescans_changed_directories(tmp_path: Path):
+    root = _archive(tmp_path)
+    database = tmp_path / "catalog.sqlite"
+    with ArchiveCatalog(root, database) as catalog:
+        catalog.refresh()
+    # catalogue persistant : rien à refaire à la réouverture
+    with ArchiveCatalog(root, database) as catalog:
+        assert catalog.refresh() == 0
+        (root / IMEI / f"co_20200629T090000Z_{IMEI}_000008_000000_100.txt").write_text("x", encoding="utf-8")
+        os.remove(root / IMEI / f"co_20200629T083042Z_{IMEI}_000004_000000_20420.txt")
+        assert catalog.refresh(IMEI) == 2
+        assert catalog.cycles(IMEI) == [7, 8]
+
+
+def test_replaced_file_is_updated(tmp_path: Path):
+    root = _archive(tmp_path)
+    name = f"co_20200629T084534Z_{IMEI}_000007_000000_32201.txt"
+    with ArchiveCatalog(root, tmp_path / "catalog.sqlite") as catalog:
+        catalog.refresh()
+        # rsync : fichier temporaire puis renommage
+        (root / IMEI / f".{name}.tmp").write_text("new content", encoding="utf-8")
+        os.replace(root / IMEI / f".{name}.tmp", root / IMEI / name)
+        assert catalog.refresh(IMEI) == 1
+        st = (root / IMEI / name).stat()
+        assert catalog.snapshot(IMEI)[name] == [st.st_size, st.st_mtime_ns]
@@ -0,0 +1,93 @@
+"""Tests de la comparaison de deux arborescences de fichiers NetCDF (utilities/compare.py)."""
+
+import json
+import math
+from pathlib import Path
+
+import pytest
+
+from decoder_bindings.utilities import compare
+from decoder_bindings.utilities.compare import compare_files, compare_trees
+from decoder_bindings.utilities.netcdf import write_classic
+
+
+def _profile(path: Path, pres=(5.0, 10.0, 15.0), station="AOML", history="2025-01-01", date_update="20250101000000"):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    write_classic(
+        path,
+        {"N_PROF": 1, "N_LEVELS": len(pres), "STRING4": 4, "DATE_TIME": 14},
+        {
+            "DATE_UPDATE": (["DATE_TIME"], date_update, {}),
+            "DATA_CENTRE": (["N_PROF", "STRING4"], station, {}),
+            "CYCLE_NUMBER": (["N_PROF"], [12], {}),
+            "PRES": (["N_PROF", "N_LEVELS"], list(pres), {"units": "decibar"}),
+        },
+        {"title": "Argo float vertical profile", "history": history},
+    )
+    return path
+
+
+def test_identical_and_volatile_differences(tmp_path: Path):
+    ref = _profile(tmp_path / "ref.nc")
+    assert compare_files(_profile(tmp_path / "same.nc"), ref).status == "identical"
+
+    redecoded = _profile(tmp_path / "redecoded.nc", history="2025-06-01", date_update="20250601000000")
+    assert compare_files(redecoded, ref).status == "equal"
+    strict = compare_files(redecoded, ref, ignore_variables=frozenset())
+    assert strict.status == "different" and [v.name for v in strict.variables] == ["DATE_UPDATE"]
+
+
+@pytest.mark.parametrize("use_numpy", [True, False])
+def test_values_are_compared_by_chunks_with_tolerances(tmp_path: Path, monkeypatch, use_numpy: bool):
+    if not use_numpy:
+        monkeypatch.setattr(compare, "np", None)
+    ref = _profile(tmp_path / "ref.nc", pres=[float(i) for i in range(100)] + [math.nan])
+    test = _profile(tmp_path / "test.nc", pres=[float(i) for i in range(99)] + [99.5, math.nan], station="BODC")
+
+    diff = compare_files(test, ref, chunk_size=24)
+    assert diff.status == "different" and not diff.differences
+    by_name = {v.name: v for v in diff.variables}
+    assert by_name["PRES"].model_dump() == {"name": "PRES", "mismatches": 1, "first_index": 99, "max_abs_diff": 0.5}
+    assert by_name["DATA_CENTRE"].mismatches == 3 and by_name["DATA_CENTRE"].max_abs_diff is None
+
+    assert [v.name for v in compare_files(test, ref, atol=0.5, chunk_size=24).variables] == ["DATA_CENTRE"]
+
+
+def test_structure_differences(tmp_path: Path):
+    diff = compare_files(_profile(tmp_path / "test.nc", pres=(5.0, 10.0)), _profile(tmp_path / "ref.nc"))
+
+    assert diff.status == "different" and not diff.variables
+    assert diff.differences[0].startswith("dimensions:")
+    assert "variable PRES: type or shape differs" in diff.differences
+
+
+def test_not_netcdf_files_are_errors(tmp_path: Path):
+    (tmp_path / "a.nc").write_bytes(b"HDF\x89 not classic")
+    (tmp_path / "b.nc").write_bytes(b"HDF\x89 not classic either")
+
+    diff = compare_files(tmp_path / "a.nc", tmp_path / "b.nc")
+    assert diff.status in ("error", "different") and not diff.equal
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_compare_trees_report(tmp_path: Path, workers: int):
+    for root in ("test", "ref"):
+        _profile(tmp_path / root / "6902892" / "profiles" / "R6902892_001.nc")
+        _profile(tmp_path / root / "6902892" / "profiles" / "R6902892_002.nc", history=root)
+    _profile(tmp_path / "test" / "6902892" / "profiles" / "R6902892_003.nc", pres=(5.0, 10.0, 16.0))
+    _profile(tmp_path / "ref" / "6902892" / "profiles" / "R6902892_003.nc")
+    _profile(tmp_path / "test" / "6902892" / "6902892_meta.nc")
+    _profile(tmp_path / "ref" / "6902892" / "6902892_Rtraj.nc")
+
+    report = compare_trees(tmp_path / "test", tmp_path / "ref", workers=workers)
+
+    assert not report.equal
+    assert report.only_in_test == ["6902892/6902892_meta.nc"]
+    assert report.only_in_reference == ["6902892/6902892_Rtraj.nc"]
+    assert report.counts == {"identical": 1, "equal": 1, "different": 1}
+    assert [f.path for f in report.files] == ["6902892/profiles/R6902892_003.nc"]
+    assert compare_trees(tmp_path / "test", tmp_path / "ref", workers=workers, rtol=0.1).counts["equal"] == 2
+
+    report.write(tmp_path / "diff.json")
+    saved = json.loads((tmp_path / "diff.json").read_text())
+    assert saved["files"][0]["variables"][0]["name"] == "PRES"
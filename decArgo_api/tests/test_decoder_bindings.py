@@ -6,8 +6,12 @@ Tests pour la version finale du Decoder :
 - commande construite correctement (avec/ sans I/O)
 """
 
+import re
 import sys
+import json
+import shutil
 import stat
+import time
 import types
 import importlib
 from pathlib import Path
@@ -21,6 +25,8 @@ import pytest
 def _inject_stubs_for_top_level_imports():
     if "utilities.dict2json" not in sys.modules:
         utilities = types.ModuleType("utilities")
+        # seul dict2json est remplacé : les autres modules de utilities restent importables
+        utilities.__path__ = [str(Path(__file__).resolve().parents[1] / "decoder_bindings" / "utilities")]
         dict2json = types.ModuleType("utilities.dict2json")
 
         def save_info_meta_conf(*args, **kwargs):
@@ -61,6 +67,11 @@ m = importlib.import_module(MODULE_NAME)
 # -----------------------------------------------------------------------------
 # Fixtures utilitaires
 # -----------------------------------------------------------------------------
+def _run_conf(cmd: list[str]) -> dict:
+    """Conf dérivée passée au décodeur avec 'configfile'."""
+    return json.loads(Path(cmd[cmd.index("configfile") + 1]).read_text(encoding="utf-8"))
+
+
 @pytest.fixture
 def tmp_conf_file(tmp_path: Path) -> Path:
     p = tmp_path / "decoder_conf.json"
@@ -127,8 +138,8 @@ def test_decode_builds_cmd_with_exec_and_runtime_and_io(
         hold_after_run=None,
     )
 
-    with patch.object(m.subprocess, "run") as mock_run:
-        mock_run.return_value = types.SimpleNamespace(returncode=0)
+    with patch.object(m, "run_monitored") as mock_run:
+        mock_run.return_value = m.ProcessRun(returncode=0)
         dec.decode(wmo)
 
         (args, kwargs) = mock_run.call_args
@@ -139,13 +150,13 @@ def test_decode_builds_cmd_with_exec_and_runtime_and_io(
         assert cmd[1] == str(tmp_runtime_dir.resolve())
 
         # arguments invariants
-        assert cmd[2:6] == [
-            "rsynclog",
-            "all",
-            "configfile",
-            str(tmp_conf_file.resolve()),
-        ]
-        assert "xmlreport" in cmd and "logfilexml.xml" in cmd
+        assert cmd[2:5] == ["rsynclog", "all", "configfile"]
+        # conf privée dérivée de la conf utilisateur, rapport XML au nom unique
+        run_conf = _run_conf(cmd)
+        assert run_conf["some"] == "config"
+        assert Path(run_conf["DIR_OUTPUT_XML_FILE"]).is_dir()
+        report_name = cmd[cmd.index("xmlreport") + 1]
+        assert re.match(rf"^co041404_\d{{8}}T\d{{6}}Z_{wmo}_\w+\.xml$", report_name)
         # WMO
         assert "floatwmo" in cmd and wmo in cmd
         assert "PROCESS_REMAINING_BUFFERS" in cmd and "1" in cmd
@@ -158,8 +169,6 @@ def test_decode_builds_cmd_with_exec_and_runtime_and_io(
 
         # options d'exec
         assert kwargs["timeout"] == 123
-        assert kwargs["text"] is True
-        assert kwargs["check"] is True
         assert isinstance(kwargs["env"], dict)
 
 
@@ -172,8 +181,8 @@ def test_decode_without_io_does_not_add_dirs(tmp_conf_file, tmp_runtime_dir, tmp
         matlab_runtime=str(tmp_runtime_dir),
     )
 
-    with patch.object(m.subprocess, "run") as mock_run:
-        mock_run.return_value = types.SimpleNamespace(returncode=0)
+    with patch.object(m, "run_monitored") as mock_run:
+        mock_run.return_value = m.ProcessRun(returncode=0)
         dec.decode("6902892")
         cmd = mock_run.call_args[0][0]
         assert "DIR_INPUT_RSYNC_DATA" not in cmd
@@ -242,7 +251,7 @@ def test_runtime_must_be_dir(tmp_conf_file, tmp_exec_file, tmp_path: Path):
         )
 
 
-def test_calledprocesserror_is_caught_and_hold_runs(
+def test_failed_run_is_reported_and_hold_runs(
     tmp_conf_file, tmp_runtime_dir, tmp_exec_file, tmp_input_dir, tmp_output_dir
 ):
     dec = m.Decoder(
@@ -254,10 +263,12 @@ def test_calledprocesserror_is_caught_and_hold_runs(
         hold_after_run=2,
     )
 
-    with patch.object(m.subprocess, "run") as mock_run, patch.object(m.time, "sleep") as mock_sleep:
-        mock_run.side_effect = m.subprocess.CalledProcessError(returncode=42, cmd=["x"])
-        dec.decode("6902892")  # ne doit pas lever
+    with patch.object(m, "run_monitored") as mock_run, patch.object(m.time, "sleep") as mock_sleep:
+        mock_run.return_value = m.ProcessRun(returncode=42, stderr="boom")
+        result = dec.decode("6902892")  # ne doit pas lever
         mock_sleep.assert_called_once_with(2)
+    assert result.status == "failed"
+    assert result.returncode == 42 and result.stderr == "boom"
 
 
 def test_hold_after_run_none_no_sleep(tmp_conf_file, tmp_runtime_dir, tmp_exec_file):
@@ -269,8 +280,8 @@ def test_hold_after_run_none_no_sleep(tmp_conf_file, tmp_runtime_dir, tmp_exec_f
         matlab_runtime=str(tmp_runtime_dir),
         hold_after_run=None,
     )
-    with patch.object(m.subprocess, "run") as mock_run, patch.object(m.time, "sleep") as mock_sleep:
-        mock_run.return_value = types.SimpleNamespace(returncode=0)
+    with patch.object(m, "run_monitored") as mock_run, patch.object(m.time, "sleep") as mock_sleep:
+        mock_run.return_value = m.ProcessRun(returncode=0)
         dec.decode("6902892")
         mock_sleep.assert_not_called()
 
@@ -294,8 +305,8 @@ def test_hold_after_run_forever_loops_but_is_mocked(tmp_conf_file, tmp_runtime_d
         if call_count["n"] >= 3:
             raise StopIteration  # on coupe le test ici
 
-    with patch.object(m.subprocess, "run") as mock_run, patch.object(m.time, "sleep", side_effect=fake_sleep):
-        mock_run.return_value = types.SimpleNamespace(returncode=0)
+    with patch.object(m, "run_monitored") as mock_run, patch.object(m.time, "sleep", side_effect=fake_sleep):
+        mock_run.return_value = m.ProcessRun(returncode=0)
         with pytest.raises(StopIteration):
             dec.decode("6902892")
         assert call_count["n"] >= 3
@@ -388,9 +399,9 @@ def test_subprocess_call(monkeypatch, tmp_input_dir, tmp_output_dir, tmp_conf_fi
     def fake_run(cmd, **kwargs):
         called["n"] += 1
         called["cmd"] = cmd
-        return types.SimpleNamespace(returncode=0)
+        return m.ProcessRun(returncode=0)
 
-    monkeypatch.setattr(m.subprocess, "run", fake_run)
+    monkeypatch.setattr(m, "run_monitored", fake_run)
 
     dec.decode("6902892")
 
@@ -399,3 +410,865 @@ def test_subprocess_call(monkeypatch, tmp_input_dir, tmp_output_dir, tmp_conf_fi
     # si matlab_runtime=None, ton code passe "None" en 2e arg → on l'accepte ici
     # et on vérifie le reste de la commande
     assert "floatwmo" in called["cmd"] and "6902892" in called["cmd"]
+
+
+def test_decode_many_runs_concurrently_with_private_scratch(
+    tmp_path: Path, tmp_conf_file, tmp_runtime_dir, tmp_exec_file
+):
+    """decode_many lance les runs en parallèle, chacun avec son propre répertoire de travail."""
+    import threading
+
+    dec = m.Decoder(
+        decoder_conf_file=str(tmp_conf_file),
+        decoder_executable=str(tmp_exec_file),
+        matlab_runtime=str(tmp_runtime_dir),
+        input_files_directory=None,
+        output_files_directory=None,
+    )
+    wmos = ["6902892", "6903014", "6904182"]
+    # tous les runs doivent être actifs en même temps pour franchir la barrière
+    barrier = threading.Barrier(len(wmos), timeout=5)
+    cmds = {}
+
+    def fake_run(cmd, **kwargs):
+        barrier.wait()
+        cmds[cmd[cmd.index("floatwmo") + 1]] = cmd
+        return m.ProcessRun(returncode=0)
+
+    with patch.object(m, "run_monitored", side_effect=fake_run):
+        results = dict(dec.decode_many(wmos + ["6902892"], max_workers=3, scratch_directory=tmp_path / "scratch"))
+
+    assert sorted(results) == sorted(wmos)
+    log_dirs = set()
+    for wmo, cmd in cmds.items():
+        log_dir = Path(_run_conf(cmd)["DIR_OUTPUT_LOG_FILE"])
+        assert log_dir.parent.parent == tmp_path / "scratch" and log_dir.parent.name.startswith(wmo)
+        assert log_dir.is_dir()
+        log_dirs.add(log_dir)
+    assert len(log_dirs) == len(wmos)
+
+
+def test_decode_many_admits_floats_by_recorded_memory(tmp_path: Path, tmp_conf_file, tmp_runtime_dir, tmp_exec_file):
+    """Avec un historique de coûts, deux gros flotteurs ne tournent jamais ensemble."""
+    import threading
+
+    dec = m.Decoder(
+        decoder_conf_file=str(tmp_conf_file),
+        decoder_executable=str(tmp_exec_file),
+        matlab_runtime=str(tmp_runtime_dir),
+        cost_history_file=tmp_path / "costs.json",
+    )
+    for wmo, peak in (("6902892", 600), ("6903014", 600), ("6904182", 300)):
+        dec.cost_history.record(wmo, peak, 1.0)
+    running, peaks = set(), []
+    lock = threading.Lock()
+
+    def fake_run(cmd, **kwargs):
+        wmo = cmd[cmd.index("floatwmo") + 1]
+        with lock:
+            running.add(wmo)
+            peaks.append(set(running))
+        time.sleep(0.05)
+        with lock:
+            running.discard(wmo)
+        return m.ProcessRun(returncode=0, peak_rss_kb=700, wall_time=2.0)
+
+    with patch.object(m, "run_monitored", side_effect=fake_run):
+        results = dict(dec.decode_many(["6902892", "6903014", "6904182"], max_workers=3, batch_memory_mb=1))
+
+    assert all(r.ok for r in results.values())
+    assert not any({"6902892", "6903014"} <= active for active in peaks)
+    assert dec.cost_history.peak_rss("6902892") == [600, 700]
+    assert dec.cost_history.durations("6902892") == [1.0, 2.0]
+
+
+def test_adaptive_timeout_and_straggler_relaunch(tmp_path: Path, tmp_conf_file, tmp_runtime_dir, tmp_exec_file):
+    dec = m.Decoder(
+        decoder_conf_file=str(tmp_conf_file),
+        decoder_executable=str(tmp_exec_file),
+        matlab_runtime=str(tmp_runtime_dir),
+        timeout_seconds=3600,
+        cost_history_file=tmp_path / "costs.json",
+        timeout_policy=m.TimeoutPolicy(margin=2.0, minimum=10.0, relaunch=True),
+    )
+    for duration in (40.0, 50.0, 60.0):
+        dec.cost_history.record("6902892", 100, duration)
+    timeouts = []
+
+    def fake_run(cmd, timeout, **kwargs):
+        timeouts.append(timeout)
+        # premier run bloqué : arrêté par son timeout adaptatif
+        return m.ProcessRun(returncode=-15, timed_out=True) if len(timeouts) == 1 else m.ProcessRun(returncode=0)
+
+    with patch.object(m, "run_monitored", side_effect=fake_run):
+        result = dec.decode("6902892", force=True)
+
+    assert timeouts == [120.0, 3600]
+    assert result.ok and result.relaunched and result.timeout_seconds == 3600
+
+    # sans historique, le timeout fixe s'applique et il n'y a pas de relance
+    timeouts.clear()
+    with patch.object(m, "run_monitored", side_effect=fake_run):
+        result = dec.decode("6903014", force=True)
+    assert timeouts == [3600] and result.status == "timeout" and not result.relaunched
+
+
+def test_decode_many_validates_all_wmos_before_running(tmp_conf_file, tmp_runtime_dir, tmp_exec_file):
+    dec = m.Decoder(
+        decoder_conf_file=str(tmp_conf_file),
+        decoder_executable=str(tmp_exec_file),
+        matlab_runtime=str(tmp_runtime_dir),
+        input_files_directory=None,
+        output_files_directory=None,
+    )
+    with patch.object(m, "run_monitored") as mock_run:
+        with pytest.raises(m.WmoValidationError):
+            list(dec.decode_many(["6902892", "bad"]))
+        mock_run.assert_not_called()
+
+
+def _write_fake_report(xml_dir: Path, name: str, wmos, status="ok"):
+    floats = "".join(
+        f"<float_{i}><float_wmo>{w}</float_wmo><nb_cycles>2</nb_cycles><cycle_list>0 1 </cycle_list>"
+        f"<output_mono-profile_file>/out/{w}/profiles/R{w}_001.nc</output_mono-profile_file></float_{i}>"
+        for i, w in enumerate(wmos, start=1)
+    )
+    xml = f"<coriolis_function_report><function>co041404</function>{floats}<status>{status}</status></coriolis_function_report>"
+    (xml_dir / name).write_text(xml, encoding="utf-8")
+
+
+def test_decode_chunks_uses_float_list_for_argos(tmp_path: Path, tmp_runtime_dir, tmp_exec_file):
+    conf = tmp_path / "argos_conf.json"
+    conf.write_text('{"FLOAT_TRANSMISSION_TYPE": "1"}', encoding="utf-8")
+    dec = m.Decoder(
+        decoder_conf_file=str(conf),
+        decoder_executable=str(tmp_exec_file),
+        matlab_runtime=str(tmp_runtime_dir),
+        input_files_directory=None,
+        output_files_directory=None,
+    )
+    lists = []
+
+    def fake_run(cmd, **kwargs):
+        float_list = Path(cmd[cmd.index("floatwmolist") + 1])
+        wmos = float_list.read_text(encoding="utf-8").split()
+        lists.append(wmos)
+        assert "floatwmo" not in cmd and cmd[cmd.index("processmode") + 1] == "redecode"
+        xml_dir = Path(_run_conf(cmd)["DIR_OUTPUT_XML_FILE"])
+        _write_fake_report(xml_dir, cmd[cmd.index("xmlreport") + 1], wmos[:1])  # le 2e flotteur absent du rapport
+        return m.ProcessRun(returncode=0)
+
+    with patch.object(m, "run_monitored", side_effect=fake_run):
+        reports = dict(dec.decode_chunks(["6902892", "6903014", "6904182"], chunk_size=2, scratch_directory=tmp_path))
+
+    assert sorted(lists) == [["6902892", "6903014"], ["6904182"]]
+    assert reports["6902892"].status == "ok"
+    assert reports["6902892"].cycles == [0, 1]
+    assert reports["6902892"].output_files == ["/out/6902892/profiles/R6902892_001.nc"]
+    assert reports["6903014"].status == "nok" and reports["6903014"].returncode == 0
+
+
+def test_decode_chunks_falls_back_to_one_run_per_iridium_float(tmp_path: Path, tmp_runtime_dir, tmp_exec_file):
+    conf = tmp_path / "iridium_conf.json"
+    conf.write_text('{"FLOAT_TRANSMISSION_TYPE": "3"}', encoding="utf-8")
+    dec = m.Decoder(
+        decoder_conf_file=str(conf),
+        decoder_executable=str(tmp_exec_file),
+        matlab_runtime=str(tmp_runtime_dir),
+        input_files_directory=None,
+        output_files_directory=None,
+    )
+
+    def fake_run(cmd, **kwargs):
+        wmo = cmd[cmd.index("floatwmo") + 1]
+        xml_dir = Path(_run_conf(cmd)["DIR_OUTPUT_XML_FILE"])
+        _write_fake_report(xml_dir, cmd[cmd.index("xmlreport") + 1], [wmo])
+        return m.ProcessRun(returncode=0)
+
+    with patch.object(m, "run_monitored", side_effect=fake_run) as mock_run:
+        reports = dict(dec.decode_chunks(["6902892", "6903014"], chunk_size=10, scratch_directory=tmp_path))
+
+    assert mock_run.call_count == 2
+    assert {w: r.status for w, r in reports.items()} == {"6902892": "ok", "6903014": "ok"}
+
+
+def _make_script(tmp_path: Path, name: str, body: str) -> Path:
+    f = tmp_path / name
+    f.write_text("#!/bin/sh\n" + body, encoding="utf-8")
+    f.chmod(f.stat().st_mode | stat.S_IXUSR)
+    return f
+
+
+def test_astream_yields_decoder_output_lines(tmp_path: Path, tmp_conf_file, tmp_runtime_dir):
+    import asyncio
+
+    script = _make_script(tmp_path, "talk.sh", 'echo "start $1"\necho "oops" >&2\necho "end"\n')
+    dec = m.Decoder(
+        decoder_conf_file=str(tmp_conf_file),
+        decoder_executable=str(script),
+        matlab_runtime=str(tmp_runtime_dir),
+        input_files_directory=None,
+        output_files_directory=None,
+    )
+
+    async def collect():
+        return [item async for item in dec.astream("6902892")]
+
+    lines = asyncio.run(collect())
+    assert ("stdout", f"start {tmp_runtime_dir.resolve()}") in lines
+    assert ("stderr", "oops") in lines
+    assert [line for name, line in lines if name == "stdout"][-1] == "end"
+
+
+def test_adecode_cancellation_kills_process_tree(tmp_path: Path, tmp_conf_file, tmp_runtime_dir):
+    import asyncio
+
+    pid_file = tmp_path / "child.pid"
+    # le wrapper lance un enfant (comme le binaire MATLAB) puis attend
+    script = _make_script(tmp_path, "slow.sh", f"sleep 60 &\necho $! > {pid_file}\necho ready\nwait\n")
+    dec = m.Decoder(
+        decoder_conf_file=str(tmp_conf_file),
+        decoder_executable=str(script),
+        matlab_runtime=str(tmp_runtime_dir),
+        input_files_directory=None,
+        output_files_directory=None,
+    )
+
+    async def run_and_cancel():
+        ready = asyncio.Event()
+        task = asyncio.ensure_future(dec.adecode("6902892", on_output=lambda name, line: ready.set()))
+        await asyncio.wait_for(ready.wait(), timeout=10)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(run_and_cancel())
+    child = int(pid_file.read_text())
+    stat_file = Path(f"/proc/{child}/stat")
+
+    def dead():
+        # mort = disparu ou zombie en attente de ramassage par init
+        try:
+            return stat_file.read_text().split(")")[-1].split()[0] == "Z"
+        except FileNotFoundError:
+            return True
+
+    deadline = time.monotonic() + 5
+    while not dead() and time.monotonic() < deadline:
+        time.sleep(0.05)
+    assert dead()
+
+
+def test_decode_returns_result_with_produced_netcdf_files(
+    tmp_path: Path, tmp_conf_file, tmp_runtime_dir, tmp_input_dir
+):
+    out_dir = tmp_path / "nc"
+    out_dir.mkdir()
+    # faux décodeur : écrit un profil dans <DIR_OUTPUT_NETCDF_FILE>/<wmo>/profiles
+    script = _make_script(
+        tmp_path,
+        "writer.sh",
+        'while [ $# -gt 0 ]; do\n  case "$1" in\n    floatwmo) wmo=$2;;\n    DIR_OUTPUT_NETCDF_FILE) out=$2;;\n  esac\n'
+        '  shift\ndone\nmkdir -p "$out/$wmo/profiles"\ntouch "$out/$wmo/profiles/R${wmo}_001.nc"\necho done\n',
+    )
+    dec = m.Decoder(
+        decoder_conf_file=str(tmp_conf_file),
+        decoder_executable=str(script),
+        matlab_runtime=str(tmp_runtime_dir),
+        input_files_directory=str(tmp_input_dir),
+        output_files_directory=str(out_dir),
+    )
+    result = dec.decode("6902892")
+    assert result.ok and result.status == "ok"
+    assert result.wmo == "6902892"
+    assert result.stdout == "done\n"
+    assert result.netcdf_files == [out_dir / "6902892" / "profiles" / "R6902892_001.nc"]
+    assert result.peak_rss_kb is not None and result.wall_time > 0
+
+
+def test_memory_budget_is_passed_and_reported(tmp_conf_file, tmp_runtime_dir, tmp_exec_file):
+    dec = m.Decoder(
+        decoder_conf_file=str(tmp_conf_file),
+        decoder_executable=str(tmp_exec_file),
+        matlab_runtime=str(tmp_runtime_dir),
+        memory_budget_mb=512,
+        memory_sample_interval=0.25,
+    )
+    run = m.ProcessRun(returncode=-15, memory_exceeded=True, memory_samples=[(0.25, 1000), (0.5, 600 * 1024)])
+    with patch.object(m, "run_monitored", return_value=run) as mock_run:
+        result = dec.decode("6902892")
+    kwargs = mock_run.call_args.kwargs
+    assert kwargs["memory_budget_kb"] == 512 * 1024
+    assert kwargs["poll_interval"] == 0.25
+    assert result.status == "memory_exceeded"
+    assert result.peak_tree_rss_kb == 600 * 1024
+
+
+def _incremental_decoder(tmp_path: Path, tmp_runtime_dir, tmp_exec_file) -> tuple:
+    # arborescence conf : json_float_info/<WMO>_<IMEI>_info.json + rsync/<IMEI>/
+    info_dir = tmp_path / "json_float_info"
+    info_dir.mkdir()
+    (info_dir / "6902892_300234065895840_info.json").write_text("{}", encoding="utf-8")
+    archive = tmp_path / "rsync" / "300234065895840"
+    archive.mkdir(parents=True)
+    (archive / "co_20200629T084534Z_300234065895840_000001_000000_1234.txt").write_text("a", encoding="utf-8")
+    conf = tmp_path / "conf.json"
+    conf.write_text(
+        f'{{"DIR_INPUT_JSON_FLOAT_DECODING_PARAMETERS_FILE": "{info_dir}", '
+        f'"DIR_INPUT_RSYNC_DATA": "{tmp_path / "rsync"}"}}',
+        encoding="utf-8",
+    )
+    dec = m.Decoder(
+        decoder_conf_file=str(conf),
+        decoder_executable=str(tmp_exec_file),
+        matlab_runtime=str(tmp_runtime_dir),
+        state_directory=str(tmp_path / "state"),
+    )
+    return dec, archive
+
+
+def test_decode_skips_unchanged_inputs_unless_forced(tmp_path: Path, tmp_runtime_dir, tmp_exec_file):
+    dec, archive = _incremental_decoder(tmp_path, tmp_runtime_dir, tmp_exec_file)
+    with patch.object(m, "run_monitored", return_value=m.ProcessRun(returncode=0)) as mock_run:
+        assert dec.decode("6902892").status == "ok"
+        skipped = dec.decode("6902892")
+        assert skipped.status == "skipped" and skipped.ok
+        assert mock_run.call_count == 1
+
+        # nouveau fichier d'archive : le run suivant décode
+        (archive / "co_20200629T094534Z_300234065895840_000002_000000_1234.txt").write_text("b", encoding="utf-8")
+        assert dec.decode("6902892").status == "ok"
+        assert mock_run.call_count == 2
+
+        assert dec.decode("6902892", force=True).status == "ok"
+        assert mock_run.call_count == 3
+
+
+def test_failed_run_does_not_record_inputs(tmp_path: Path, tmp_runtime_dir, tmp_exec_file):
+    dec, _ = _incremental_decoder(tmp_path, tmp_runtime_dir, tmp_exec_file)
+    with patch.object(m, "run_monitored", return_value=m.ProcessRun(returncode=1)) as mock_run:
+        dec.decode("6902892")
+        dec.decode("6902892")
+    assert mock_run.call_count == 2
+    assert dec.input_state.load("6902892") is None
+
+
+def test_runs_of_the_same_float_are_serialised(tmp_path: Path, tmp_conf_file, tmp_runtime_dir, tmp_exec_file):
+    import threading
+
+    dec = m.Decoder(
+        decoder_conf_file=str(tmp_conf_file),
+        decoder_executable=str(tmp_exec_file),
+        matlab_runtime=str(tmp_runtime_dir),
+        scratch_directory=str(tmp_path / "scratch"),
+        lock_directory=str(tmp_path / "locks"),
+    )
+    active, overlaps, reports = [], [], []
+    guard = threading.Lock()
+
+    def fake_run(cmd, **kwargs):
+        with guard:
+            active.append(cmd)
+            overlaps.append(len(active))
+            reports.append(cmd[cmd.index("xmlreport") + 1])
+        time.sleep(0.2)
+        with guard:
+            active.remove(cmd)
+        return m.ProcessRun(returncode=0)
+
+    with patch.object(m, "run_monitored", side_effect=fake_run):
+        threads = [threading.Thread(target=dec.decode, args=("6902892",)) for _ in range(3)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+    assert overlaps == [1, 1, 1]
+    assert len(set(reports)) == 3
+
+
+def test_lock_timeout_is_reported(tmp_path: Path, tmp_conf_file, tmp_runtime_dir, tmp_exec_file):
+    dec = m.Decoder(
+        decoder_conf_file=str(tmp_conf_file),
+        decoder_executable=str(tmp_exec_file),
+        matlab_runtime=str(tmp_runtime_dir),
+        timeout_seconds=1,
+        lock_directory=str(tmp_path / "locks"),
+    )
+    other = m.FloatLocks(tmp_path / "locks")
+    with other.hold(["6902892"]), patch.object(m, "run_monitored") as mock_run:
+        assert dec.float_locks.locked("6902892")
+        result = dec.decode("6902892")
+    mock_run.assert_not_called()
+    assert result.status == "error" and "locked" in result.error
+    assert not dec.float_locks.locked("6902892")
+
+
+def test_submit_merges_requests_for_the_same_float(tmp_path: Path, tmp_conf_file, tmp_runtime_dir, tmp_exec_file):
+    dec = m.Decoder(
+        decoder_conf_file=str(tmp_conf_file),
+        decoder_executable=str(tmp_exec_file),
+        matlab_runtime=str(tmp_runtime_dir),
+        lock_directory=str(tmp_path / "locks"),
+    )
+    with patch.object(m, "run_monitored", return_value=m.ProcessRun(returncode=0)) as mock_run:
+        dec.start_job_queue(workers=1).submit("1111111")
+        futures = [dec.submit("6902892") for _ in range(4)]
+        dec.stop_job_queue()
+    assert all(f.result().ok for f in futures)
+    # 1111111 + au plus une relance de 6902892 en plus du run initial
+    assert 2 <= mock_run.call_count <= 3
+    with pytest.raises(m.WmoValidationError):
+        dec.submit("bad")
+
+
+def test_watch_queues_floats_receiving_rsync_files(tmp_path: Path, tmp_runtime_dir, tmp_exec_file):
+    info_dir, rsync_log = tmp_path / "json_float_info", tmp_path / "rsync_list"
+    info_dir.mkdir()
+    (rsync_log / "300234065895840").mkdir(parents=True)
+    (info_dir / "6902892_300234065895840_info.json").write_text("{}", encoding="utf-8")
+    conf = tmp_path / "conf.json"
+    conf.write_text(
+        json.dumps(
+            {"DIR_INPUT_JSON_FLOAT_DECODING_PARAMETERS_FILE": str(info_dir), "DIR_INPUT_RSYNC_LOG": str(rsync_log)}
+        ),
+        encoding="utf-8",
+    )
+    dec = m.Decoder(
+        decoder_conf_file=str(conf),
+        decoder_executable=str(tmp_exec_file),
+        matlab_runtime=str(tmp_runtime_dir),
+        lock_directory=str(tmp_path / "locks"),
+    )
+    with patch.object(m, "run_monitored", return_value=m.ProcessRun(returncode=0)) as mock_run:
+        watcher = dec.watch(debounce=0.1, poll_interval=0.1)
+        try:
+            (rsync_log / "300234065895840" / "rsync_20200629T092506Z.txt").write_text("x", encoding="utf-8")
+            deadline = time.monotonic() + 5
+            while not mock_run.called and time.monotonic() < deadline:
+                time.sleep(0.05)
+        finally:
+            watcher.stop()
+            dec.stop_job_queue()
+    cmd = mock_run.call_args.args[0]
+    assert cmd[cmd.index("floatwmo") + 1] == "6902892"
+
+
+def test_delta_rsync_logs_pass_only_new_lists(tmp_path: Path, tmp_runtime_dir, tmp_exec_file):
+    info_dir, rsync_log, iridium = tmp_path / "json_float_info", tmp_path / "rsync_list", tmp_path / "iridium"
+    info_dir.mkdir()
+    logs = rsync_log / "300234065895840"
+    logs.mkdir(parents=True)
+    (info_dir / "6902892_300234065895840_info.json").write_text("{}", encoding="utf-8")
+    conf = tmp_path / "conf.json"
+    conf.write_text(
+        json.dumps(
+            {
+                "DIR_INPUT_JSON_FLOAT_DECODING_PARAMETERS_FILE": str(info_dir),
+                "DIR_INPUT_RSYNC_LOG": str(rsync_log),
+                "IRIDIUM_DATA_DIRECTORY": str(iridium),
+            }
+        ),
+        encoding="utf-8",
+    )
+    dec = m.Decoder(
+        decoder_conf_file=str(conf),
+        decoder_executable=str(tmp_exec_file),
+        matlab_runtime=str(tmp_runtime_dir),
+        delta_rsync_logs=True,
+    )
+    history = iridium / "300234065895840_6902892" / "history_of_processed_data" / "processed_rsync_log_6902892.txt"
+
+    def fake_decoder(cmd, **kwargs):
+        # comme le décodeur : listes traitées ajoutées à l'historique, avec leur chemin réel
+        name = cmd[cmd.index("rsynclog") + 1]
+        names = [p.name for p in sorted(logs.iterdir())] if name == "all" else [name]
+        history.parent.mkdir(parents=True, exist_ok=True)
+        with open(history, "a", encoding="utf-8") as f:
+            f.writelines(f"{logs}//{n}\n" for n in names)
+        return m.ProcessRun(returncode=0)
+
+    def decode():
+        with patch.object(m, "run_monitored", side_effect=fake_decoder) as mock_run:
+            result = dec.decode("6902892")
+        return result, mock_run.call_args.args[0] if mock_run.called else None
+
+    (logs / "rsync_20200629T092506Z.txt").write_text("300234065895840/co_a.txt\n", encoding="utf-8")
+    result, cmd = decode()
+    assert cmd[cmd.index("rsynclog") + 1] == "rsync_20200629T092506Z.txt"
+    # les listes sont lues dans DIR_INPUT_RSYNC_LOG, pas dans une copie
+    assert "DIR_INPUT_RSYNC_LOG" not in cmd
+
+    # rien de nouveau, ou seulement une liste vide : pas de run
+    assert decode() == (m.DecodeResult(wmo="6902892", skipped=True), None)
+    (logs / "rsync_20200630T092506Z.txt").write_text("", encoding="utf-8")
+    assert decode()[1] is None
+
+    (logs / "rsync_20200701T092506Z.txt").write_text("300234065895840/co_b.txt\n", encoding="utf-8")
+    (logs / "rsync_20200702T092506Z.txt").write_text("300234065895840/co_c.txt\n", encoding="utf-8")
+    result, cmd = decode()
+    assert cmd[cmd.index("rsynclog") + 1] == "all"
+    assert m.RsyncLogHistory(iridium).new_logs("6902892", "300234065895840", logs) == []
+    assert decode()[1] is None
+
+    # mode full : l'historique est effacé, une seule nouvelle liste ne suffit plus
+    dec.output_mode = "full"
+    (logs / "rsync_20200703T092506Z.txt").write_text("300234065895840/co_d.txt\n", encoding="utf-8")
+    result, cmd = decode()
+    assert cmd[cmd.index("rsynclog") + 1] == "all"
+
+
+def test_reprocess_command_uses_the_registry_and_the_ledger(tmp_path: Path, tmp_runtime_dir, tmp_exec_file):
+    info_dir = tmp_path / "json_float_info"
+    info_dir.mkdir()
+    for name in ("6902892_300234065895840_info.json", "6903014_300234068508780_info.json"):
+        (info_dir / name).write_text("{}", encoding="utf-8")
+    conf = tmp_path / "conf.json"
+    conf.write_text(json.dumps({"DIR_INPUT_JSON_FLOAT_DECODING_PARAMETERS_FILE": str(info_dir)}), encoding="utf-8")
+    argv = [
+        "reprocess",
+        "--conf",
+        str(conf),
+        "--executable",
+        str(tmp_exec_file),
+        "--runtime",
+        str(tmp_runtime_dir),
+        "--ledger",
+        str(tmp_path / "ledger.jsonl"),
+        "--workers",
+        "2",
+    ]
+    with patch.object(m, "run_monitored", return_value=m.ProcessRun(returncode=0)) as mock_run:
+        assert m.main(argv) == 0
+        assert mock_run.call_count == 2
+        # reprise : tout est déjà dans le registre de reprise
+        assert m.main(argv) == 0
+        assert mock_run.call_count == 2
+    lines = (tmp_path / "ledger.jsonl").read_text(encoding="utf-8").splitlines()
+    assert sorted(json.loads(line)["wmo"] for line in lines) == ["6902892", "6903014"]
+
+
+def test_reprocess_decodes_again_the_lists_of_the_decoder_history(tmp_path: Path, tmp_runtime_dir):
+    from decoder_bindings.utilities.fake_decoder import install_fake_decoder
+
+    lists = tmp_path / "rsync_list" / "300234065895840"
+    lists.mkdir(parents=True)
+    (lists / "rsync_20250101T000000Z.txt").write_text("300234065895840/a.txt\n", encoding="utf-8")
+    info_dir = tmp_path / "json_float_info"
+    info_dir.mkdir()
+    (info_dir / "6902892_300234065895840_info.json").write_text("{}", encoding="utf-8")
+    iridium = tmp_path / "iridium"
+    conf = tmp_path / "conf.json"
+    conf.write_text(
+        json.dumps(
+            {
+                "DIR_OUTPUT_NETCDF_FILE": str(tmp_path / "nc"),
+                "DIR_INPUT_RSYNC_LOG": str(tmp_path / "rsync_list"),
+                "DIR_INPUT_JSON_FLOAT_DECODING_PARAMETERS_FILE": str(info_dir),
+                "IRIDIUM_DATA_DIRECTORY": str(iridium),
+            }
+        ),
+        encoding="utf-8",
+    )
+    dec = m.Decoder(
+        decoder_conf_file=str(conf),
+        decoder_executable=str(install_fake_decoder(tmp_path / "exec")),
+        matlab_runtime=str(tmp_runtime_dir),
+        scratch_directory=tmp_path / "scratch",
+    )
+    # décodage initial : la liste est inscrite dans l'historique du décodeur
+    assert dec.decode("6902892").report.floats[0].cycles == [1]
+    history = iridium / "300234065895840_6902892" / "history_of_processed_data" / "processed_rsync_log_6902892.txt"
+    assert history.read_text().count("rsync_20250101T000000Z.txt") == 1
+
+    # retraitement en mode in_place : le flotteur repart quand même de zéro
+    (tmp_path / "nc" / "6902892" / "stale.nc").write_bytes(b"old")
+    results = []
+    dec.reprocess(tmp_path / "ledger.jsonl", wmonums=["6902892"], on_progress=results.append)
+    entry = json.loads((tmp_path / "ledger.jsonl").read_text().splitlines()[-1])
+    assert entry["status"] == "ok" and len(results) == 1
+    assert not (tmp_path / "nc" / "6902892" / "stale.nc").exists()
+    assert (tmp_path / "nc" / "6902892" / "profiles" / "R6902892_001.nc").is_file()
+    assert history.read_text().count("rsync_20250101T000000Z.txt") == 1
+
+
+def test_batch_reports_are_parsed_and_merged(tmp_path: Path, tmp_conf_file, tmp_runtime_dir, tmp_exec_file):
+    dec = m.Decoder(
+        decoder_conf_file=str(tmp_conf_file),
+        decoder_executable=str(tmp_exec_file),
+        matlab_runtime=str(tmp_runtime_dir),
+        input_files_directory=None,
+        output_files_directory=None,
+    )
+
+    def fake_run(cmd, **kwargs):
+        wmo = cmd[cmd.index("floatwmo") + 1]
+        if wmo == "6904182":
+            return m.ProcessRun(returncode=None, timed_out=True)  # tué avant d'écrire son rapport
+        xml_dir = Path(_run_conf(cmd)["DIR_OUTPUT_XML_FILE"])
+        _write_fake_report(xml_dir, cmd[cmd.index("xmlreport") + 1], [wmo], "ok" if wmo == "6902892" else "nok")
+        return m.ProcessRun(returncode=0)
+
+    with patch.object(m, "run_monitored", side_effect=fake_run):
+        results = list(dec.decode_many(["6902892", "6903014", "6904182"], scratch_directory=tmp_path / "runs"))
+
+    results_by_wmo = dict(results)
+    assert results_by_wmo["6902892"].report.floats[0].cycles == [0, 1]
+    summary = dec.summarize(results)
+    assert summary.statuses == {"ok": 1, "nok": 1, "timeout": 1}
+    assert summary.failed == ["6903014", "6904182"]
+
+    # même bilan en ligne de commande, à partir des rapports restés dans les zones de run
+    output = tmp_path / "summary.json"
+    assert m.main(["report", str(tmp_path / "runs"), "--output", str(output)]) == 1
+    assert json.loads(output.read_text(encoding="utf-8"))["statuses"] == {"ok": 1, "nok": 1}
+
+
+def test_result_cache_restores_outputs_without_running(tmp_path: Path, tmp_runtime_dir, tmp_exec_file):
+    info_dir, rsync_data, out = tmp_path / "json_float_info", tmp_path / "rsync_data", tmp_path / "nc"
+    iridium, labels, greylist = tmp_path / "iridium", tmp_path / "_techParamNames", tmp_path / "ar_greylist.txt"
+    info_dir.mkdir()
+    (info_dir / "6902892_300234065895840_info.json").write_text("{}", encoding="utf-8")
+    labels.mkdir()
+    (labels / "tech_labels.json").write_text("{}", encoding="utf-8")
+    greylist.write_text("PLATFORM_CODE,PARAMETER_NAME\n", encoding="utf-8")
+    (rsync_data / "300234065895840").mkdir(parents=True)
+    sbd = rsync_data / "300234065895840" / "co_a.sbd"
+    sbd.write_bytes(b"sbd")
+    conf = tmp_path / "conf.json"
+    conf.write_text(
+        json.dumps(
+            {
+                "DIR_INPUT_JSON_FLOAT_DECODING_PARAMETERS_FILE": str(info_dir),
+                "DIR_INPUT_RSYNC_DATA": str(rsync_data),
+                "DIR_OUTPUT_NETCDF_FILE": str(out),
+                "IRIDIUM_DATA_DIRECTORY": str(iridium),
+                "DIR_INPUT_JSON_TECH_LABEL_FILE": str(labels),
+                "TEST015_GREY_LIST_FILE": str(greylist),
+            }
+        ),
+        encoding="utf-8",
+    )
+    dec = m.Decoder(
+        decoder_conf_file=str(conf),
+        decoder_executable=str(tmp_exec_file),
+        matlab_runtime=str(tmp_runtime_dir),
+        cache_directory=tmp_path / "cache",
+        output_mode="full",
+    )
+    profile = out / "6902892" / "profiles" / "R6902892_001.nc"
+    meta = out / "6902892" / "6902892_meta.nc"
+    history = iridium / "300234065895840_6902892" / "history_of_processed_data" / "processed_rsync_log_6902892.txt"
+
+    def fake_run(cmd, **kwargs):
+        for path in (profile, meta, history):
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_bytes(b"CDF\x01")
+        _write_fake_report(Path(_run_conf(cmd)["DIR_OUTPUT_XML_FILE"]), cmd[cmd.index("xmlreport") + 1], ["6902892"])
+        return m.ProcessRun(returncode=0)
+
+    with patch.object(m, "run_monitored", side_effect=fake_run) as mock_run:
+        first = dec.decode("6902892", force=True)
+        profile.unlink()
+        again = dec.decode("6902892", force=True)
+        assert mock_run.call_count == 1
+        sbd.write_bytes(b"sbd2")  # nouvelles données : le décodeur tourne
+        dec.decode("6902892", force=True)
+        assert mock_run.call_count == 2
+        # fichiers de référence modifiés : les sorties en cache ne valent plus
+        (labels / "tech_labels.json").write_text('{"TECH_1": "label"}', encoding="utf-8")
+        dec.decode("6902892", force=True)
+        assert mock_run.call_count == 3
+        greylist.write_text("PLATFORM_CODE,PARAMETER_NAME\n6902892,PSAL\n", encoding="utf-8")
+        dec.decode("6902892", force=True)
+        assert mock_run.call_count == 4
+        dec.decode("6902892", force=True)
+        assert mock_run.call_count == 4
+
+    assert not first.cached and again.cached and again.ok
+    # toute l'arborescence du flotteur et son état Iridium, comme après un vrai run
+    assert again.netcdf_files == [meta, profile] and profile.read_bytes() == b"CDF\x01"
+    assert history.is_file()
+    assert again.report.floats[0].wmo == "6902892" and again.report_file != first.report_file
+
+    # hors mode full, les sorties dépendent des runs précédents : pas de cache
+    dec.output_mode = "in_place"
+    assert dec._plan_run("6902892", force=True).cache_key is None
+    assert dec._plan_run("6902892", force=True, full=True).cache_key is not None
+
+
+def test_successful_runs_publish_changed_netcdf_files(tmp_path: Path, tmp_runtime_dir, tmp_exec_file):
+    from decoder_bindings.utilities.netcdf import write_classic
+
+    out = tmp_path / "nc"
+    conf = tmp_path / "conf.json"
+    conf.write_text(json.dumps({"DIR_OUTPUT_NETCDF_FILE": str(out)}), encoding="utf-8")
+    dec = m.Decoder(
+        decoder_conf_file=str(conf),
+        decoder_executable=str(tmp_exec_file),
+        matlab_runtime=str(tmp_runtime_dir),
+        publish_directory=tmp_path / "gdac",
+    )
+    cycles = [1]
+
+    def fake_run(cmd, **kwargs):
+        for cycle in cycles:
+            path = out / "6902892" / "profiles" / f"R6902892_{cycle:03d}.nc"
+            path.parent.mkdir(parents=True, exist_ok=True)
+            write_classic(path, {"N_PROF": 1}, {"CYCLE_NUMBER": (["N_PROF"], [cycle], {})}, {"history": str(cmd)})
+        return m.ProcessRun(returncode=0)
+
+    with patch.object(m, "run_monitored", side_effect=fake_run):
+        first = dec.decode("6902892")
+        cycles.append(2)
+        second = dec.decode("6902892")
+
+    published = tmp_path / "gdac" / "6902892" / "profiles"
+    assert first.published == [published / "R6902892_001.nc"]
+    assert second.published == [published / "R6902892_002.nc"]
+
+
+def test_compare_command(tmp_path: Path):
+    from decoder_bindings.utilities.netcdf import write_classic
+
+    for root, pres in (("test", 10.0), ("ref", 10.0), ("new", 10.2)):
+        path = tmp_path / root / "6902892" / "R6902892_001.nc"
+        path.parent.mkdir(parents=True)
+        write_classic(path, {"N_LEVELS": 1}, {"PRES": (["N_LEVELS"], [pres], {})}, {"history": root})
+    output = tmp_path / "diff.json"
+
+    assert m.main(["compare", str(tmp_path / "test"), str(tmp_path / "ref"), "--workers", "1"]) == 0
+    assert m.main(["compare", str(tmp_path / "new"), str(tmp_path / "ref"), "--output", str(output)]) == 1
+    assert json.loads(output.read_text())["files"][0]["variables"][0]["max_abs_diff"] == pytest.approx(0.2)
+    assert m.main(["compare", str(tmp_path / "new"), str(tmp_path / "ref"), "--atol", "0.5"]) == 0
+
+
+def test_output_modes(tmp_path: Path, tmp_runtime_dir, tmp_exec_file):
+    out, iridium = tmp_path / "nc", tmp_path / "iridium"
+    (iridium / "300234065895840_6902892").mkdir(parents=True)
+    old = out / "6902892" / "R6902892_001.nc"
+    old.parent.mkdir(parents=True)
+    old.write_bytes(b"cycle 1")
+    conf = tmp_path / "conf.json"
+    conf.write_text(
+        json.dumps({"DIR_OUTPUT_NETCDF_FILE": str(out), "IRIDIUM_DATA_DIRECTORY": str(iridium)}), encoding="utf-8"
+    )
+    seen = []
+
+    def fake_run(cmd, **kwargs):
+        target = Path(cmd[cmd.index("DIR_OUTPUT_NETCDF_FILE") + 1]) / "6902892"
+        seen.append(sorted(p.name for p in target.iterdir()) if target.is_dir() else [])
+        target.mkdir(parents=True, exist_ok=True)
+        (target / "R6902892_002.nc").write_bytes(b"cycle 2")
+        return m.ProcessRun(returncode=0 if len(seen) == 1 else 1)
+
+    def decoder(mode):
+        return m.Decoder(
+            decoder_conf_file=str(conf),
+            decoder_executable=str(tmp_exec_file),
+            matlab_runtime=str(tmp_runtime_dir),
+            input_files_directory=str(tmp_path),
+            output_files_directory=str(out),
+            output_mode=mode,
+        )
+
+    def reflink(source, destination):
+        # système de fichiers à reflinks, simulé par une copie
+        shutil.copy2(source, destination)
+        return True
+
+    staging = sys.modules[m.OutputStage.__module__]
+    with (
+        patch.object(m, "run_monitored", side_effect=fake_run) as mock_run,
+        patch.object(staging, "reflink_file", side_effect=reflink),
+    ):
+        result = decoder("incremental").decode("6902892")
+        cmd = mock_run.call_args.args[0]
+        assert cmd.count("DIR_OUTPUT_NETCDF_FILE") == 1  # la copie de travail remplace output_files_directory
+        assert seen[0] == ["R6902892_001.nc"] and result.netcdf_files == [out / "6902892" / "R6902892_002.nc"]
+        # run en échec : la copie de travail est abandonnée, sorties et état Iridium restent intacts
+        (out / "6902892" / "R6902892_002.nc").unlink()
+        history = iridium / "300234065895840_6902892" / "processed_rsync_log_6902892.txt"
+        mock_run.side_effect = lambda cmd, **kwargs: (history.write_text("rsync_1.txt\n"), fake_run(cmd))[1]
+        assert decoder("incremental").decode("6902892").status == "failed"
+        assert sorted(p.name for p in (out / "6902892").iterdir()) == ["R6902892_001.nc"]
+        assert not history.exists()
+        mock_run.side_effect = fake_run
+
+        decoder("full").decode("6902892")
+        assert seen[-1] == [] and not (iridium / "300234065895840_6902892").exists()
+        assert sorted(p.name for p in (out / "6902892").iterdir()) == ["R6902892_002.nc"]
+
+    with pytest.raises(ValueError):
+        decoder("wipe")
+
+
+def test_decoding_with_the_fake_decoder(tmp_path: Path, tmp_runtime_dir, monkeypatch):
+    from decoder_bindings.utilities.fake_decoder import install_fake_decoder
+
+    out = tmp_path / "nc"
+    lists = tmp_path / "rsync_list" / "300234065895840"
+    lists.mkdir(parents=True)
+    (lists / "rsync_20250101T000000Z.txt").write_text("300234065895840/a.txt\n", encoding="utf-8")
+    conf = tmp_path / "conf.json"
+    conf.write_text(
+        json.dumps({"DIR_OUTPUT_NETCDF_FILE": str(out), "DIR_INPUT_RSYNC_LOG": str(tmp_path / "rsync_list")}),
+        encoding="utf-8",
+    )
+
+    def decoder(**kwargs):
+        return m.Decoder(
+            decoder_conf_file=str(conf),
+            decoder_executable=str(install_fake_decoder(tmp_path / "exec")),
+            matlab_runtime=str(tmp_runtime_dir),
+            scratch_directory=tmp_path / "scratch",
+            **kwargs,
+        )
+
+    result = decoder(output_mode="incremental").decode("6902892")
+    assert result.status == "ok" and result.report.status == "ok"
+    assert result.report.floats[0].cycles == [1]
+    assert sorted(p.name for p in result.netcdf_files) == [
+        "6902892_Rtraj.nc",
+        "6902892_meta.nc",
+        "6902892_tech.nc",
+        "R6902892_001.nc",
+    ]
+
+    monkeypatch.setenv("FAKE_DECODER_FAIL", "hang")
+    result = decoder(timeout_seconds=1).decode("6902892")
+    assert result.status == "timeout"
+
+
+def test_adecode_goes_through_the_steps_of_decode(tmp_path: Path, tmp_runtime_dir):
+    import asyncio
+
+    from decoder_bindings.utilities.fake_decoder import install_fake_decoder
+
+    lists = tmp_path / "rsync_list" / "300234065895840"
+    lists.mkdir(parents=True)
+    (lists / "rsync_20250101T000000Z.txt").write_text("300234065895840/a.txt\n", encoding="utf-8")
+    conf = tmp_path / "conf.json"
+    conf.write_text(
+        json.dumps(
+            {"DIR_OUTPUT_NETCDF_FILE": str(tmp_path / "nc"), "DIR_INPUT_RSYNC_LOG": str(tmp_path / "rsync_list")}
+        ),
+        encoding="utf-8",
+    )
+    dec = m.Decoder(
+        decoder_conf_file=str(conf),
+        decoder_executable=str(install_fake_decoder(tmp_path / "exec")),
+        matlab_runtime=str(tmp_runtime_dir),
+        scratch_directory=tmp_path / "scratch",
+        output_mode="incremental",
+        cost_history_file=tmp_path / "costs.json",
+        publish_directory=tmp_path / "published",
+    )
+
+    result = asyncio.run(dec.adecode("6902892"))
+    assert result.status == "ok" and result.report.status == "ok"
+    # sorties validées depuis la copie de travail, publiées, et durée enregistrée
+    assert (tmp_path / "nc" / "6902892" / "profiles" / "R6902892_001.nc") in result.netcdf_files
+    assert sorted(p.name for p in result.published) == sorted(p.name for p in result.netcdf_files)
+    assert not list((tmp_path / "nc" / ".staging").iterdir())
+    assert dec.cost_history.durations("6902892") == [result.wall_time]
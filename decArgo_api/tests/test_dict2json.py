@@ -0,0 +1,51 @@
+"""Tests de l'écriture des fichiers info/meta/conf (utilities/dict2json.py)."""
+
+import json
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import pytest
+
+from decoder_bindings.utilities.dict2json import save_fleet_info_meta_conf, write_json_if_changed
+
+
+def _float(wmo: str, ptt: str, cycle_length: str = "120") -> tuple[dict, dict]:
+    return {"WMO": wmo, "PTT": ptt, "CYCLE_LENGTH": cycle_length}, {"PLATFORM_NUMBER": wmo}
+
+
+def test_write_json_if_changed_skips_identical_content(tmp_path: Path):
+    path = tmp_path / "a" / "6902892_meta.json"
+    assert write_json_if_changed(path, {"k": "é"}) is True
+    mtime = path.stat().st_mtime_ns
+    assert write_json_if_changed(path, {"k": "é"}) is False
+    assert path.stat().st_mtime_ns == mtime
+    assert write_json_if_changed(path, {"k": "e"}) is True
+    assert json.loads(path.read_text(encoding="utf-8")) == {"k": "e"}
+    # pas de fichier temporaire laissé derrière
+    assert sorted(p.name for p in path.parent.iterdir()) == [".6902892_meta.json.lock", "6902892_meta.json"]
+
+
+def test_fleet_save_only_touches_changed_floats(tmp_path: Path):
+    dirs = (tmp_path / "config", tmp_path / "info", tmp_path / "meta")
+    floats = [_float("6902892", "300234065895840"), _float("6903014", "300234068508780")]
+    first = save_fleet_info_meta_conf(*dirs, floats, decoder_conf={"a": 1})
+    assert len(first["written"]) == 5 and first["unchanged"] == []
+
+    floats[1] = _float("6903014", "300234068508780", cycle_length="240")
+    second = save_fleet_info_meta_conf(*dirs, floats, decoder_conf={"a": 1})
+    assert second["written"] == [str((tmp_path / "info" / "6903014_300234068508780_info.json").absolute())]
+    assert len(second["unchanged"]) == 4
+
+
+def test_fleet_save_validates_before_writing(tmp_path: Path):
+    with pytest.raises(ValueError):
+        save_fleet_info_meta_conf(tmp_path, tmp_path / "info", tmp_path / "meta", [_float("6902892", "1"), ({}, {})])
+    assert not (tmp_path / "info").exists()
+
+
+def test_concurrent_writers_leave_a_complete_file(tmp_path: Path):
+    path = tmp_path / "decoder_conf.json"
+    payloads = [{"writer": i, "data": "x" * 10000} for i in range(20)]
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(lambda data: write_json_if_changed(path, data), payloads))
+    assert json.loads(path.read_text(encoding="utf-8")) in payloads
@@ -0,0 +1,108 @@
+"""Tests du décodeur factice utilisé pour les essais de charge sans MATLAB (utilities/fake_decoder.py)."""
+
+import json
+import signal
+import subprocess
+from pathlib import Path
+
+import pytest
+
+from decoder_bindings.utilities.fake_decoder import FakeDecoderSettings, install_fake_decoder
+from decoder_bindings.utilities.netcdf import read_header
+from decoder_bindings.utilities.xml_report import parse_report
+
+REPORT = "co041404_20250101T000000Z_test.xml"
+
+
+@pytest.fixture
+def setup(tmp_path: Path) -> dict:
+    conf = {
+        "DIR_INPUT_RSYNC_LOG": str(tmp_path / "rsync_list"),
+        "DIR_INPUT_JSON_FLOAT_DECODING_PARAMETERS_FILE": str(tmp_path / "json_float_info"),
+        "DIR_OUTPUT_NETCDF_FILE": str(tmp_path / "nc"),
+        "DIR_OUTPUT_LOG_FILE": str(tmp_path / "log"),
+        "DIR_OUTPUT_XML_FILE": str(tmp_path / "xml"),
+        "IRIDIUM_DATA_DIRECTORY": str(tmp_path / "iridium"),
+    }
+    (tmp_path / "json_float_info").mkdir()
+    (tmp_path / "json_float_info" / "6902892_300234065895840_info.json").write_text("{}", encoding="utf-8")
+    lists = tmp_path / "rsync_list" / "300234065895840"
+    lists.mkdir(parents=True)
+    (lists / "rsync_20250101T000000Z.txt").write_text(
+        "300234065895840/a.txt\n300234065895840/b.txt\n", encoding="utf-8"
+    )
+    (tmp_path / "conf.json").write_text(json.dumps(conf), encoding="utf-8")
+    return {"root": tmp_path, "executable": install_fake_decoder(tmp_path / "exec"), "conf": tmp_path / "conf.json"}
+
+
+def _run(setup: dict, env: dict | None = None, *extra: str) -> subprocess.CompletedProcess:
+    cmd = [str(setup["executable"]), str(setup["root"]), "rsynclog", "all", "configfile", str(setup["conf"])]
+    cmd += ["xmlreport", REPORT, "floatwmo", "6902892", "PROCESS_REMAINING_BUFFERS", "1", *extra]
+    return subprocess.run(cmd, capture_output=True, text=True, env={"PATH": "/usr/bin:/bin", **(env or {})})
+
+
+def test_outputs_follow_the_decoder_layout(setup: dict):
+    root = setup["root"]
+    assert _run(setup, {"FAKE_DECODER_WARNINGS": "1"}).returncode == 0
+
+    profiles = sorted(p.name for p in (root / "nc" / "6902892" / "profiles").iterdir())
+    assert profiles == ["R6902892_001.nc", "R6902892_002.nc"]
+    assert read_header(root / "nc" / "6902892" / "6902892_Rtraj.nc").dimensions["N_CYCLE"] == 2
+    log = (root / "log" / "decode_argo_2_nc_rt_20250101T000000Z_test.log").read_text()
+    assert log.startswith("INFO: Float #6902892: 2 new cycle(s) from 2 input file(s)")
+    report = parse_report(root / "xml" / REPORT)
+    assert report.status == "ok" and report.duration == 0
+    (float_report,) = report.floats
+    assert float_report.cycles == [1, 2] and len(float_report.output_files) == 5
+    assert float_report.warnings == ["Float #6902892 Cycle #1: fake warning"]
+
+    # nouveau run : les cycles suivent ceux déjà produits (descentes comprises) ; les DIR_* passés en argument priment
+    (root / "nc" / "6902892" / "profiles" / "R6902892_002.nc").rename(
+        root / "nc" / "6902892" / "profiles" / "R6902892_002D.nc"
+    )
+    assert _run(setup, {"FAKE_DECODER_CYCLES": "1"}, "DIR_OUTPUT_NETCDF_FILE", str(root / "other")).returncode == 0
+    assert [p.name for p in (root / "other" / "6902892" / "profiles").iterdir()] == ["R6902892_001.nc"]
+    assert _run(setup, {"FAKE_DECODER_CYCLES": "1"}).returncode == 0
+    assert (root / "nc" / "6902892" / "profiles" / "R6902892_003.nc").is_file()
+
+
+def test_processed_rsync_lists_are_not_decoded_again(setup: dict):
+    root = setup["root"]
+    history = root / "iridium" / "300234065895840_6902892" / "history_of_processed_data"
+    assert _run(setup).returncode == 0
+    assert (history / "processed_rsync_log_6902892.txt").read_text().splitlines() == [
+        str(root / "rsync_list" / "300234065895840" / "rsync_20250101T000000Z.txt")
+    ]
+
+    # rsynclog all : seule la nouvelle liste est décodée
+    assert _run(setup).returncode == 0
+    (root / "rsync_list" / "300234065895840" / "rsync_20250102T000000Z.txt").write_text(
+        "300234065895840/c.txt\n", encoding="utf-8"
+    )
+    assert _run(setup).returncode == 0
+    log = (root / "log" / "decode_argo_2_nc_rt_20250101T000000Z_test.log").read_text()
+    assert log.startswith("INFO: Float #6902892: 1 new cycle(s) from 1 input file(s)")
+    assert parse_report(root / "xml" / REPORT).floats[0].cycles == [3]
+    assert len((history / "processed_rsync_log_6902892.txt").read_text().splitlines()) == 2
+
+
+def test_failure_modes(setup: dict):
+    xml = setup["root"] / "xml" / REPORT
+    assert _run(setup, {"FAKE_DECODER_FAIL": "matlab_error"}).returncode == 0
+    assert parse_report(xml).status == "nok" and parse_report(xml).floats[0].errors
+    xml.unlink()
+
+    assert _run(setup, {"FAKE_DECODER_FAIL": "exit"}).returncode == 1 and not xml.exists()
+    assert _run(setup, {"FAKE_DECODER_FAIL": "crash"}).returncode == -signal.SIGSEGV
+    assert _run(setup, {"FAKE_DECODER_FAIL": "exit", "FAKE_DECODER_FAIL_WMOS": "6903014"}).returncode == 0
+
+
+def test_settings_from_environment():
+    settings = FakeDecoderSettings.from_environ(
+        {"FAKE_DECODER_SECONDS": "2.5", "FAKE_DECODER_FAIL": "hang", "FAKE_DECODER_FAIL_WMOS": "1,2"}
+    )
+    assert settings.seconds == 2.5 and settings.fail_wmos == ["1", "2"]
+    assert settings.fails("1") and not settings.fails("3")
+    assert not FakeDecoderSettings(fail="hang", fail_rate=0.0).fails("1")
+    drawn = [FakeDecoderSettings(fail="exit", fail_rate=0.5, seed="s").fails(str(wmo)) for wmo in range(200)]
+    assert 50 < sum(drawn) < 150
@@ -10,7 +10,6 @@ import importlib
 from pathlib import Path
 from typing import Iterable
 
-import numpy as np
 import pytest
 
 # --- Marqueurs: désactivés par défaut ---
@@ -74,95 +73,26 @@ sys.modules.setdefault(
 )
 
 from decoder_bindings.main import Decoder  # noqa: E402
+from decoder_bindings.utilities.compare import compare_trees  # noqa: E402
 
 
-# --- Comparaison NetCDF robuste (échec au moindre écart par défaut) ----------
-def _assert_netcdf_equal(test_path: Path, ref_path: Path, *, atol: float, rtol: float) -> None:
-    """
-    Compare deux fichiers NetCDF:
-      - dimensions (noms, tailles)
-      - variables (noms, dtypes, shapes, valeurs)
-      - attributs globaux (sauf liste ignorée)
-    Echec si la moindre différence est détectée.
-    """
-    try:
-        from netCDF4 import Dataset
-    except Exception as e:
-        pytest.skip(f"netCDF4 not available: {e}")
-
-    volatile_globals = {
-        "history",
-        "date_created",
-        "creation_date",
-        "last_update",
-        "date_update",
-        "uuid",
-        "checksum",
-        "processing_history",
-        "file_generation_time",
-    }
-
-    with Dataset(test_path, "r") as tds, Dataset(ref_path, "r") as rds:
-        # Dimensions
-        assert set(tds.dimensions.keys()) == set(rds.dimensions.keys()), "Different dimension names"
-        for name in tds.dimensions.keys():
-            assert len(tds.dimensions[name]) == len(rds.dimensions[name]), f"Dimension size mismatch: {name}"
-
-        # Variables
-        assert set(tds.variables.keys()) == set(rds.variables.keys()), "Different variable names"
-        for vname in tds.variables.keys():
-            tv = tds.variables[vname]
-            rv = rds.variables[vname]
-            # dtype + shape
-            assert tv.dtype == rv.dtype, f"dtype mismatch for var {vname}"
-            assert tv.shape == rv.shape, f"shape mismatch for var {vname}"
-            # valeurs (avec tolérances pour numériques)
-            tdata = np.array(tv[:])
-            rdata = np.array(rv[:])
-            if np.issubdtype(tv.dtype, np.number):
-                # ma/masques -> on remplit avec NaN pour comparer
-                if np.ma.isMaskedArray(tdata):
-                    tdata = tdata.filled(np.nan)
-                if np.ma.isMaskedArray(rdata):
-                    rdata = rdata.filled(np.nan)
-                # tout écart au-delà des tolérances = échec
-                assert np.allclose(tdata, rdata, atol=atol, rtol=rtol, equal_nan=True), f"value mismatch in var {vname}"
-            else:
-                # strings, bytes: égalité stricte
-                assert np.array_equal(tdata, rdata), f"value mismatch in var {vname}"
-
-        # Attributs globaux (hors volatiles)
-        tga = {k: getattr(tds, k) for k in tds.ncattrs() if k not in volatile_globals}
-        rga = {k: getattr(rds, k) for k in rds.ncattrs() if k not in volatile_globals}
-        assert tga == rga, "global attributes mismatch (non-volatile)"
-
-
-def _iter_nc_files(dirpath: Path) -> Iterable[Path]:
-    return sorted(dirpath.rglob("*.nc"))
-
-
+# --- Comparaison NetCDF (échec au moindre écart par défaut) -------------------
 def _iter_nc(dirpath: Path) -> Iterable[Path]:
     return sorted(dirpath.rglob("*.nc"))
 
 
 def _compare_dirs_nc(test_dir: Path, ref_dir: Path, *, atol: float, rtol: float) -> None:
     """
-    Compare l'ensemble des .nc produits vs la référence:
+    Compare l'ensemble des .nc produits vs la référence (utilities/compare.py):
       - mêmes fichiers (noms relatifs)
-      - contenu égal (cf _assert_netcdf_equal)
+      - dimensions, attributs globaux (hors volatiles), variables et valeurs égaux
+    Les dates (DATE_CREATION, DATE_UPDATE...) sont comparées elles aussi.
     """
-    # map par chemin relatif (pour supporter des sous-répertoires identiques)
-    t_map = {p.relative_to(test_dir): p for p in _iter_nc_files(test_dir)}
-    r_map = {p.relative_to(ref_dir): p for p in _iter_nc_files(ref_dir)}
-
-    assert set(t_map.keys()) == set(r_map.keys()), (
-        "Different NetCDF file sets:\n"
-        f"Only in test: {sorted(set(t_map.keys()) - set(r_map.keys()))}\n"
-        f"Only in ref : {sorted(set(r_map.keys()) - set(t_map.keys()))}"
+    report = compare_trees(test_dir, ref_dir, atol=atol, rtol=rtol, ignore_variables=frozenset())
+    assert not report.only_in_test and not report.only_in_reference, (
+        f"Different NetCDF file sets:\nOnly in test: {report.only_in_test}\nOnly in ref : {report.only_in_reference}"
     )
-
-    for rel in sorted(t_map.keys()):
-        _assert_netcdf_equal(t_map[rel], r_map[rel], atol=atol, rtol=rtol)
+    assert report.equal, report.model_dump_json(indent=2)
 
 
 # ========================== Test A : exécution OK =============================
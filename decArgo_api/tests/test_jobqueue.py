@@ -0,0 +1,64 @@
+"""Tests de la file de jobs avec fusion des demandes (utilities/jobqueue.py)."""
+
+import threading
+
+from decoder_bindings.utilities.jobqueue import CoalescingQueue
+
+
+def test_requests_for_a_queued_float_are_merged():
+    gate = threading.Event()
+    runs = []
+
+    def handler(wmo, force):
+        gate.wait(5)
+        runs.append((wmo, force))
+        return wmo
+
+    with CoalescingQueue(handler, workers=1) as queue:
+        first = queue.submit("1111111")  # occupe le worker
+        while queue.running() != ["1111111"]:
+            pass
+        futures = [queue.submit("6902892"), queue.submit("6902892", force=True), queue.submit("6902892")]
+        assert queue.pending() == ["6902892"]
+        gate.set()
+        assert first.result(5) == "1111111"
+        assert {f.result(5) for f in futures} == {"6902892"}
+        assert futures[0] is futures[1] is futures[2]
+
+    assert runs == [("1111111", False), ("6902892", True)]
+    assert queue.stats == {"requests": 4, "merged": 2, "follow_ups": 0, "runs": 2}
+
+
+def test_request_during_a_run_schedules_one_follow_up():
+    started, release = threading.Event(), threading.Event()
+    runs, active, overlaps = [], [], []
+
+    def handler(wmo, force):
+        active.append(wmo)
+        overlaps.append(len(active))
+        runs.append(wmo)
+        started.set()
+        release.wait(5)
+        active.remove(wmo)
+
+    with CoalescingQueue(handler, workers=3) as queue:
+        queue.submit("6902892")
+        assert started.wait(5)
+        follow_ups = [queue.submit("6902892") for _ in range(3)]
+        assert queue.pending() == []  # pas lancé tant que le run en cours n'est pas fini
+        release.set()
+        assert queue.join(5)
+
+    assert runs == ["6902892", "6902892"]
+    assert overlaps == [1, 1]
+    assert follow_ups[0] is follow_ups[1] is follow_ups[2]
+    assert queue.stats["follow_ups"] == 1 and queue.stats["merged"] == 2
+
+
+def test_handler_errors_go_to_the_future():
+    def handler(wmo, force):
+        raise RuntimeError("boom")
+
+    with CoalescingQueue(handler) as queue:
+        future = queue.submit("6902892")
+        assert isinstance(future.exception(5), RuntimeError)
@@ -0,0 +1,51 @@
+"""Tests du manifeste des sorties NetCDF et de la publication des seuls fichiers modifiés (utilities/manifest.py)."""
+
+from pathlib import Path
+
+from decoder_bindings.utilities.manifest import OutputPublisher
+from decoder_bindings.utilities.netcdf import write_classic
+
+
+def _write(path: Path, cycle: int, history: str = "run 1") -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    write_classic(path, {"N_PROF": 1}, {"CYCLE_NUMBER": (["N_PROF"], [cycle], {})}, {"history": history})
+
+
+def test_only_new_and_changed_files_are_published(tmp_path: Path):
+    source, destination = tmp_path / "nc" / "6902892", tmp_path / "gdac"
+    _write(source / "profiles" / "R6902892_001.nc", 1)
+    _write(source / "profiles" / "R6902892_002.nc", 2)
+    publisher = OutputPublisher(destination)
+
+    first = publisher.publish("6902892", source)
+    assert first.new == ["profiles/R6902892_001.nc", "profiles/R6902892_002.nc"] and first.unchanged == 0
+
+    # nouveau run : tout est réécrit, seul l'historique change pour le cycle 1
+    _write(source / "profiles" / "R6902892_001.nc", 1, history="run 2")
+    _write(source / "profiles" / "R6902892_002.nc", 20, history="run 2")
+    (source / "profiles" / "R6902892_003.nc").write_bytes((source / "profiles" / "R6902892_002.nc").read_bytes())
+    published_copy = destination / "6902892" / "profiles" / "R6902892_001.nc"
+    before = published_copy.stat().st_mtime_ns
+
+    second = OutputPublisher(destination).publish("6902892", source)
+    assert second.changed == ["profiles/R6902892_002.nc"] and second.new == ["profiles/R6902892_003.nc"]
+    assert second.unchanged == 1 and published_copy.stat().st_mtime_ns == before
+    assert (destination / "6902892" / "profiles" / "R6902892_002.nc").read_bytes() == (
+        source / "profiles" / "R6902892_002.nc"
+    ).read_bytes()
+    assert not list((destination / "6902892" / "profiles").glob(".*"))
+
+
+def test_removed_files_and_hardlinks(tmp_path: Path):
+    source, destination = tmp_path / "nc" / "6902892", tmp_path / "gdac"
+    _write(source / "R6902892_001.nc", 1)
+    _write(source / "R6902892_002.nc", 2)
+    publisher = OutputPublisher(destination, tmp_path / "manifests", hardlink=True, delete_removed=True)
+    publisher.publish("6902892", source)
+    assert (destination / "6902892" / "R6902892_001.nc").stat().st_ino == (source / "R6902892_001.nc").stat().st_ino
+
+    (source / "R6902892_002.nc").unlink()
+    report = publisher.publish("6902892", source)
+    assert report.removed == ["R6902892_002.nc"] and report.unchanged == 1
+    assert not (destination / "6902892" / "R6902892_002.nc").exists()
+    assert (tmp_path / "manifests" / "6902892_manifest.json").is_file()
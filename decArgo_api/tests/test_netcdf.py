@@ -0,0 +1,64 @@
+"""Tests de la lecture des fichiers NetCDF classiques et de leur empreinte (utilities/netcdf.py)."""
+
+from pathlib import Path
+
+import pytest
+
+from decoder_bindings.utilities.netcdf import (
+    NetcdfFormatError,
+    content_hash,
+    iter_variable_data,
+    read_header,
+    write_classic,
+)
+
+TEMPLATES = Path(__file__).resolve().parents[2] / "decArgo_soft" / "soft" / "util" / "misc"
+
+
+def _profile(path: Path, pres=(5.0, 10.0), history="2025-01-01 decoding", date_update="20250101000000"):
+    write_classic(
+        path,
+        {"N_PROF": 1, "N_LEVELS": len(pres), "DATE_TIME": 14},
+        {
+            "DATE_UPDATE": (["DATE_TIME"], date_update, {}),
+            "CYCLE_NUMBER": (["N_PROF"], [12], {"long_name": "Float cycle number"}),
+            "PRES": (["N_PROF", "N_LEVELS"], list(pres), {"units": "decibar", "_FillValue": 99999.0}),
+        },
+        {"title": "Argo float vertical profile", "history": history},
+    )
+    return path
+
+
+def test_argo_templates_headers():
+    header = read_header(TEMPLATES / "ArgoProf_V3.1_cfile_part1.nc")
+    assert header.version == 1 and header.unlimited == "N_HISTORY" and header.numrecs == 0
+    assert header.variable("PLATFORM_NUMBER").dimensions == ["N_PROF", "STRING8"]
+    assert read_header(TEMPLATES / "ArgoProf_V3.1_cfile_part2.nc").variable("HISTORY_DATE").record
+    with pytest.raises(NetcdfFormatError):
+        read_header(TEMPLATES / "ArgoSProf_V1.0_netcdf4_classic.nc")
+
+
+def test_written_file_reads_back(tmp_path: Path):
+    path = _profile(tmp_path / "R6902892_012.nc")
+    header = read_header(path)
+
+    assert header.dimensions == {"N_PROF": 1, "N_LEVELS": 2, "DATE_TIME": 14}
+    assert header.attributes["title"] == "Argo float vertical profile"
+    pres = header.variable("PRES")
+    assert pres.shape == [1, 2] and pres.attributes == {"units": "decibar", "_FillValue": [99999.0]}
+    with open(path, "rb") as f:
+        assert b"".join(iter_variable_data(f, header, header.variable("CYCLE_NUMBER"))) == b"\0\0\0\x0c"
+        assert len(b"".join(iter_variable_data(f, header, pres, chunk_size=3))) == 16
+
+
+def test_content_hash_ignores_volatile_attributes_and_dates(tmp_path: Path):
+    reference = content_hash(_profile(tmp_path / "a.nc"))
+
+    assert content_hash(_profile(tmp_path / "b.nc", history="2025-06-01 redecoding", date_update="20250601000000")) == (
+        reference
+    )
+    assert content_hash(_profile(tmp_path / "c.nc", pres=(5.0, 10.5))) != reference
+    # fichier d'un autre format sans netCDF4 : empreinte des octets
+    other = tmp_path / "d.nc"
+    other.write_bytes(b"\x89HDF\r\n")
+    assert content_hash(other) == content_hash(other)
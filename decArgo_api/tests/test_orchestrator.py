@@ -0,0 +1,165 @@
+"""Tests de l'orchestration des conteneurs du décodeur (utilities/orchestrator.py)."""
+
+import threading
+import time
+from pathlib import Path
+
+from decoder_bindings.utilities.orchestrator import (
+    CONF_MOUNT,
+    INPUT_MOUNT,
+    MANAGED_LABEL,
+    OUTPUT_MOUNT,
+    RUNTIME_MOUNT,
+    ContainerOrchestrator,
+    DockerException,
+)
+
+
+class FakeContainer:
+    def __init__(self, name, options, duration, exit_code, logs):
+        self.name = name
+        self.options = options
+        self.status = "running"
+        self.attrs = {"State": {}}
+        self.removed = False
+        self.killed = False
+        self.remove_error = None
+        self._end = time.monotonic() + duration
+        self._exit_code = exit_code
+        self._logs = logs
+
+    def reload(self):
+        # comme le démon : l'état n'est visible qu'après un reload
+        if self.killed:
+            self.status = "exited"
+            self.attrs["State"] = {"ExitCode": 137, "OOMKilled": False}
+        elif self.status == "running" and time.monotonic() >= self._end:
+            self.status = "exited"
+            self.attrs["State"] = {"ExitCode": self._exit_code, "OOMKilled": False}
+
+    def logs(self, stream, follow):
+        yield from self._logs
+
+    def kill(self):
+        self.killed = True
+
+    def remove(self, force=False):
+        if self.remove_error is not None:
+            raise self.remove_error
+        self.removed = True
+
+
+class FakeContainers:
+    def __init__(self, duration=0.0, exit_code=0, logs=(b"decoding\n",)):
+        self.started: list[FakeContainer] = []
+        self.duration = duration
+        self.exit_code = exit_code
+        self.logs = logs
+        self._lock = threading.Lock()
+
+    def run(self, image, name, **options):
+        container = FakeContainer(name, {"image": image, **options}, self.duration, self.exit_code, self.logs)
+        with self._lock:
+            self.started.append(container)
+        return container
+
+    def list(self, all, filters):
+        return [c for c in self.started if not c.removed and filters["label"] in c.options["labels"]]
+
+
+class FakeClient:
+    def __init__(self, **kwargs):
+        self.containers = FakeContainers(**kwargs)
+
+
+def _orchestrator(tmp_path: Path, client: FakeClient, **kwargs) -> ContainerOrchestrator:
+    return ContainerOrchestrator(
+        input_directory=tmp_path / "input",
+        conf_directory=tmp_path / "config",
+        output_directory=tmp_path / "output",
+        client=client,
+        poll_interval=0.01,
+        **kwargs,
+    )
+
+
+def test_run_mounts_the_compose_volumes_with_limits_and_unique_names(tmp_path: Path):
+    client = FakeClient()
+    lines = []
+    orchestrator = _orchestrator(
+        tmp_path, client, cpus=2, mem_limit="4g", user="1000:1000", on_log=lambda wmo, line: lines.append((wmo, line))
+    )
+
+    first = orchestrator.run("6902892")
+    second = orchestrator.run("6902892")
+
+    assert first.ok and first.returncode == 0
+    assert first.container_name != second.container_name
+    assert first.container_name.startswith("argo-decoder-6902892-")
+    options = client.containers.started[0].options
+    assert options["volumes"] == {
+        "runtime-matlab-volume": {"bind": RUNTIME_MOUNT, "mode": "ro"},
+        str(tmp_path / "input"): {"bind": INPUT_MOUNT, "mode": "rw"},
+        str(tmp_path / "config"): {"bind": CONF_MOUNT, "mode": "ro"},
+        str(tmp_path / "output"): {"bind": OUTPUT_MOUNT, "mode": "rw"},
+    }
+    assert options["nano_cpus"] == 2_000_000_000 and options["mem_limit"] == "4g"
+    assert options["user"] == "1000:1000" and options["group_add"] == ["gbatch"]
+    assert options["labels"][MANAGED_LABEL] == "1"
+    cmd = first.command
+    assert cmd[cmd.index("floatwmo") + 1] == "6902892"
+    assert cmd[cmd.index("configfile") + 1] == f"{CONF_MOUNT}/decoder_conf.json"
+    assert cmd[cmd.index("xmlreport") + 1] != second.command[second.command.index("xmlreport") + 1]
+    assert lines == [("6902892", "decoding"), ("6902892", "decoding")]
+    assert first.stdout == "decoding\n"
+    assert all(c.removed for c in client.containers.started)
+
+
+def test_timed_out_container_is_killed_and_removed(tmp_path: Path):
+    client = FakeClient(duration=5.0)
+    result = _orchestrator(tmp_path, client, timeout=0.1, on_log=None).run("6902892")
+
+    assert result.status == "timeout"
+    container = client.containers.started[0]
+    assert container.killed and container.removed
+    assert result.wall_time < 5
+    # état relu après le kill
+    assert result.returncode == 137
+
+
+def test_failed_removal_does_not_hide_the_result(tmp_path: Path):
+    client = FakeClient(exit_code=1)
+    client.containers.run = _failing_removal(client.containers.run)
+    results = dict(_orchestrator(tmp_path, client, on_log=None).run_many(["1000001", "1000002"]))
+
+    assert {r.status for r in results.values()} == {"failed"}
+    assert {r.returncode for r in results.values()} == {1}
+
+
+def _failing_removal(run):
+    def wrapper(*args, **kwargs):
+        container = run(*args, **kwargs)
+        container.remove_error = DockerException("409 Client Error: removal of container is already in progress")
+        return container
+
+    return wrapper
+
+
+def test_run_many_decodes_each_float_once(tmp_path: Path):
+    client = FakeClient(duration=0.1, exit_code=1)
+    orchestrator = _orchestrator(tmp_path, client, max_parallel=2, on_log=None)
+
+    results = dict(orchestrator.run_many(["1000001", "1000002", "1000003", "1000001"]))
+
+    assert sorted(results) == ["1000001", "1000002", "1000003"]
+    assert {r.status for r in results.values()} == {"failed"}
+    assert len(client.containers.started) == 3
+
+
+def test_cleanup_removes_leftover_containers(tmp_path: Path):
+    client = FakeClient()
+    orchestrator = _orchestrator(tmp_path, client)
+    leftover = client.containers.run("image", name="argo-decoder-1-x", labels={MANAGED_LABEL: "1"})
+
+    assert orchestrator.cleanup() == ["argo-decoder-1-x"]
+    assert leftover.removed
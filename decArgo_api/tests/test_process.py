@@ -0,0 +1,73 @@
+"""Tests for the monitored process runner."""
+
+import sys
+import threading
+
+from decoder_bindings.utilities.process import BoundedOutput, ProcessControl, run_monitored
+
+
+def test_bounded_output_keeps_the_tail():
+    buffer = BoundedOutput(limit=5)
+    buffer.write(b"abc")
+    buffer.write(b"defgh")
+    assert buffer.text() == "defgh"
+    assert buffer.truncated
+
+
+def test_run_monitored_measures_the_child():
+    code = "import sys; data = bytearray(30 * 1024 * 1024); print('x' * 1000); sys.exit(3)"
+    run = run_monitored([sys.executable, "-c", code], max_output_bytes=100, poll_interval=0.05)
+    assert run.returncode == 3
+    assert not run.timed_out
+    assert run.stdout == "x" * 99 + "\n"
+    assert run.output_truncated
+    assert run.peak_rss_kb > 30 * 1024
+    assert run.cpu_seconds is not None and run.cpu_seconds >= 0
+    assert run.wall_time > 0
+
+
+def test_run_monitored_counts_page_cache_io(tmp_path):
+    # lecture servie par le cache de pages et écriture non synchronisée : aucun bloc disque
+    source = tmp_path / "source.bin"
+    source.write_bytes(b"x" * 4 * 1024 * 1024)
+    source.read_bytes()
+    code = f"data = open({str(source)!r}, 'rb').read(); open({str(tmp_path / 'copy.bin')!r}, 'wb').write(data)"
+    run = run_monitored(["sh", "-c", f'{sys.executable} -c "{code}"; true'], poll_interval=0.05)
+    assert run.returncode == 0
+    assert run.read_bytes >= 4 * 1024 * 1024
+    assert run.written_bytes >= 4 * 1024 * 1024
+    assert run.block_read_bytes is not None and run.block_written_bytes is not None
+
+
+def test_run_monitored_timeout_kills_the_group():
+    run = run_monitored(["sh", "-c", "sleep 30 & wait"], timeout=0.2, poll_interval=0.05, kill_grace=1)
+    assert run.timed_out
+    assert run.returncode != 0
+    assert run.wall_time < 10
+
+
+def test_run_monitored_samples_tree_memory_and_enforces_budget():
+    # le parent shell reste petit, c'est l'enfant python qui grossit
+    code = "import time; data = bytearray(200 * 1024 * 1024); data[::4096] = b'x' * len(data[::4096]); time.sleep(30)"
+    run = run_monitored(
+        ["sh", "-c", f'{sys.executable} -c "{code}"; echo never'],
+        poll_interval=0.05,
+        memory_budget_kb=100 * 1024,
+        kill_grace=1,
+    )
+    assert run.memory_exceeded
+    assert not run.timed_out
+    assert run.peak_tree_rss_kb > 100 * 1024
+    assert "never" not in run.stdout
+    elapsed = [t for t, _ in run.memory_samples]
+    assert elapsed == sorted(elapsed)
+
+
+def test_paused_time_is_not_charged_to_the_timeout():
+    control = ProcessControl()
+    control.pause()  # appliqué dès le démarrage du process
+    threading.Timer(0.6, control.resume).start()
+    run = run_monitored(["sleep", "0.2"], timeout=0.5, poll_interval=0.05, control=control)
+    assert not run.timed_out and run.returncode == 0
+    assert run.wall_time > 0.6
+    assert control.paused_seconds >= 0.6 and control.pid is None
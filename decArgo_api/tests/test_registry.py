@@ -0,0 +1,66 @@
+"""Tests du registre des flotteurs (utilities/registry.py)."""
+
+import json
+import os
+from pathlib import Path
+
+from decoder_bindings.utilities.registry import FloatRegistry
+
+TXT_LINES = (
+    "1900599\t1\t66315\t31\t240\t12\t-1\t20060531195800\t-7.499\t-0.005\t20060531\t99999999999999\t0\n"
+    "6903178\t2002\txxxxxxxxxxxxxxx\t-1\t240\t12\t-1\t20151030140800\t17.694\t41.743\t20151030\t99999999999999\t0\n"
+    "6902892\t212\t300234065895840\t31\t240\t3\t-1\t20210313020600\t-47.061\t-47.013\t20210313\t99999999999999\t0\n"
+)
+
+
+def _sources(tmp_path: Path) -> tuple[Path, Path]:
+    info_file = tmp_path / "argo_floats_information_co.txt"
+    info_file.write_text(TXT_LINES, encoding="utf-8")
+    info_dir = tmp_path / "json_float_info"
+    info_dir.mkdir()
+    (info_dir / "6902892_300234065895840_info.json").write_text(
+        json.dumps({"WMO": "6902892", "PTT": "300234065895840", "DECODER_ID": "221", "FLOAT_TYPE": "PROVOR"}),
+        encoding="utf-8",
+    )
+    return info_dir, info_file
+
+
+def test_lookups_join_both_sources(tmp_path: Path):
+    registry = FloatRegistry(*_sources(tmp_path))
+    assert len(registry) == 3
+    record = registry.get("6902892")
+    # json prioritaire, texte en complément
+    assert record.decoder_id == "221" and record.float_type == "PROVOR"
+    assert record.launch_date == "20210313020600"
+    assert registry.wmo("300234065895840") == "6902892"
+    assert registry.ptt("1900599") == "66315"
+    assert registry.ptt("6903178") is None
+    assert "0000000" not in registry
+
+
+def test_refresh_reloads_changed_sources(tmp_path: Path):
+    info_dir, info_file = _sources(tmp_path)
+    registry = FloatRegistry(info_dir, info_file, refresh_interval=None)
+    assert registry.refresh() is False
+
+    (info_dir / "6903014_300234068508780_info.json").write_text('{"DECODER_ID": "223"}', encoding="utf-8")
+    info_file.write_text(TXT_LINES.splitlines(keepends=True)[0], encoding="utf-8")
+    os.utime(info_file, ns=(1, 1))
+    assert "6903014" not in registry  # pas de rafraîchissement automatique
+    assert registry.refresh() is True
+    assert registry.wmo("300234068508780") == "6903014"
+    assert registry.get("6903014").decoder_id == "223"
+    assert sorted(registry.wmos()) == ["1900599", "6902892", "6903014"]
+
+
+def test_unknown_json_ptt_is_none(tmp_path: Path):
+    info_dir, info_file = _sources(tmp_path)
+    for wmo in ("3901850", "1900599"):
+        (info_dir / f"{wmo}_xxxxxxxxxxxxxxx_info.json").write_text(
+            json.dumps({"WMO": wmo, "PTT": "xxxxxxxxxxxxxxx"}), encoding="utf-8"
+        )
+    registry = FloatRegistry(info_dir, info_file)
+    assert registry.ptt("3901850") is None
+    assert registry.by_ptt("xxxxxxxxxxxxxxx") is None
+    # le PTT connu du fichier texte n'est pas écrasé par celui, inconnu, du json
+    assert registry.ptt("1900599") == "66315"
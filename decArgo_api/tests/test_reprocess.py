@@ -0,0 +1,58 @@
+"""Tests du retraitement reprenable (utilities/reprocess.py)."""
+
+from pathlib import Path
+from types import SimpleNamespace
+
+from decoder_bindings.utilities.reprocess import Ledger, plan, reprocess
+
+
+def _runner(statuses: dict[str, str], calls: list):
+    def run_batch(wmos):
+        calls.append(list(wmos))
+        for wmo in wmos:
+            yield wmo, SimpleNamespace(status=statuses.get(wmo, "ok"), returncode=0, wall_time=1.0, error=None)
+
+    return run_batch
+
+
+def test_reprocess_resumes_from_the_ledger(tmp_path: Path):
+    ledger = Ledger(tmp_path / "ledger.jsonl")
+    wmos = ["1000000", "1000001", "1000002", "1000003"]
+    calls = []
+
+    # premier passage interrompu après deux flotteurs
+    def interrupted(todo):
+        for wmo, result in _runner({"1000001": "failed"}, calls)(todo):
+            yield wmo, result
+            if wmo == "1000001":
+                return
+
+    first = reprocess(wmos, ledger, interrupted)
+    assert (first.done, first.ok, first.failed) == (2, 1, 1)
+
+    progress = []
+    second = reprocess(wmos, ledger, _runner({}, calls), on_progress=lambda p: progress.append(p.summary()))
+    assert calls[-1] == ["1000002", "1000003"]
+    assert (second.already_done, second.done, second.remaining) == (2, 2, 0)
+    assert progress and "4/4 floats" in progress[-1]
+
+    third = reprocess(wmos, ledger, _runner({}, calls), retry_failed=True)
+    assert calls[-1] == ["1000001"] and third.ok == 1
+    assert ledger.entries()["1000001"].status == "ok"
+
+
+def test_truncated_ledger_line_is_ignored(tmp_path: Path):
+    ledger = Ledger(tmp_path / "ledger.jsonl")
+    ledger.record("1000000", SimpleNamespace(status="ok", returncode=0, wall_time=2.0, error=None))
+    with open(ledger.path, "a", encoding="utf-8") as f:
+        f.write('{"wmo": "1000001", "sta')  # crash pendant l'écriture
+    assert plan(["1000000", "1000001"], ledger) == (["1000001"], 1)
+
+
+def test_throughput_and_eta(tmp_path: Path):
+    ledger = Ledger(tmp_path / "ledger.jsonl")
+    progress = reprocess(["1000000"], ledger, _runner({}, []))
+    progress.total, progress.elapsed_seconds = 11, 360.0
+    assert progress.throughput_per_hour == 10.0
+    assert progress.eta_seconds == 10 * 360
+    assert "ETA 01:00:00" in progress.summary()
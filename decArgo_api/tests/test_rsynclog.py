@@ -0,0 +1,40 @@
+"""Tests de la lecture des listes rsync et de l'historique des listes traitées (utilities/rsynclog.py)."""
+
+from pathlib import Path
+
+from decoder_bindings.utilities.rsynclog import RsyncLogHistory, parse_rsync_log, rsync_logs
+
+DEMO_RSYNC_LIST = Path(__file__).resolve().parents[2] / "decArgo_demo" / "input" / "rsync_list"
+
+
+def test_parse_plain_and_itemized_demo_lists():
+    plain = parse_rsync_log(DEMO_RSYNC_LIST / "300234065895840" / "rsync_20200629T092506Z.txt")
+    assert plain[0] == "300234065895840/co_20200629T083042Z_300234065895840_000004_000000_20420.txt"
+
+    itemized = parse_rsync_log(DEMO_RSYNC_LIST / "nocbio002b" / "rsync_20250913T064345Z.txt")
+    assert itemized[0] == "250912_205203_nocbio002b_00137.bin"
+    assert all(not name.startswith("f+") for name in itemized)
+
+
+def test_itemized_directories_and_deletions_are_left_out(tmp_path: Path):
+    log = tmp_path / "rsync_20250913T064345Z.txt"
+    log.write_text(
+        "cd+++++++++ sub/\n>f+++++++++ sub/a.bin\n*deleting   old.bin\n.f..t...... b.bin\n\n", encoding="utf-8"
+    )
+    assert parse_rsync_log(log) == ["sub/a.bin", "b.bin"]
+
+
+def test_history_returns_only_new_lists_in_order(tmp_path: Path):
+    logs = tmp_path / "rsync_list" / "300234065895840"
+    logs.mkdir(parents=True)
+    for name in ("rsync_20200629T092506Z.txt", "rsync_20200628T092506Z.txt", "notes.txt"):
+        (logs / name).write_text("x\n", encoding="utf-8")
+    history = RsyncLogHistory(tmp_path / "iridium")
+
+    assert rsync_logs(logs) == ["rsync_20200628T092506Z.txt", "rsync_20200629T092506Z.txt"]
+    assert history.new_logs("6902892", "300234065895840", logs) == rsync_logs(logs)
+    # historique écrit par le décodeur : chemins complets, tels qu'il les a vus
+    history_file = history.history_file("6902892", "300234065895840")
+    history_file.parent.mkdir(parents=True)
+    history_file.write_text("/mnt/data/rsync_list/300234065895840//rsync_20200628T092506Z.txt\n", encoding="utf-8")
+    assert history.new_logs("6902892", "300234065895840", logs) == ["rsync_20200629T092506Z.txt"]
@@ -0,0 +1,135 @@
+"""Tests de l'ordonnanceur à deux files (utilities/scheduler.py)."""
+
+import threading
+import time
+
+from decoder_bindings.utilities.process import run_monitored
+from decoder_bindings.utilities.scheduler import BULK, REALTIME, LaneScheduler
+
+
+def test_bulk_lane_keeps_a_slot_free_for_realtime():
+    release = threading.Event()
+    active = {REALTIME: 0, BULK: 0}
+    peaks = {REALTIME: 0, BULK: 0}
+    lock = threading.Lock()
+    lanes = {}
+
+    def handler(wmo, force, control):
+        lane = lanes[wmo]
+        with lock:
+            active[lane] += 1
+            peaks[lane] = max(peaks[lane], active[lane])
+        release.wait(5)
+        with lock:
+            active[lane] -= 1
+        return wmo
+
+    with LaneScheduler(handler, slots=3) as scheduler:
+        for i in range(5):
+            lanes[f"100000{i}"] = BULK
+            scheduler.submit(f"100000{i}", lane=BULK)
+        lanes["6902892"] = REALTIME
+        realtime = scheduler.submit("6902892")
+        time.sleep(0.2)
+        metrics = scheduler.metrics()
+        assert metrics[BULK].running == 2 and metrics[BULK].queued == 3
+        assert metrics[REALTIME].running == 1
+        release.set()
+        assert realtime.result(5) == "6902892"
+    assert peaks[BULK] == 2
+    metrics = scheduler.metrics()
+    assert metrics[BULK].completed == 5 and metrics[REALTIME].completed == 1
+    assert metrics[BULK].wait_max >= metrics[BULK].wait_p50 >= 0
+    assert metrics[REALTIME].run_p95 is not None
+
+
+def test_realtime_job_preempts_a_running_bulk_job():
+    finished = []
+
+    def handler(wmo, force, control):
+        duration = "0.6" if wmo == "1000000" else "0.2"
+        run = run_monitored(["sleep", duration], poll_interval=0.02, control=control)
+        finished.append((wmo, control.paused_seconds))
+        return run
+
+    with LaneScheduler(handler, slots=1, bulk_slots=1) as scheduler:
+        bulk = scheduler.submit("1000000", lane=BULK)
+        time.sleep(0.2)
+        realtime = scheduler.submit("6902892", lane=REALTIME)
+        assert scheduler.metrics()[BULK].paused == 1
+        assert realtime.result(5).returncode == 0
+        assert bulk.result(5).returncode == 0
+
+    assert [wmo for wmo, _ in finished] == ["6902892", "1000000"]
+    assert finished[1][1] >= 0.15  # le job bulk a été suspendu pendant le run temps réel
+    assert scheduler.metrics()[BULK].preemptions == 1
+
+
+def test_realtime_request_promotes_a_queued_bulk_job():
+    gate = threading.Event()
+    order = []
+
+    def handler(wmo, force, control):
+        gate.wait(5)
+        order.append((wmo, force))
+
+    with LaneScheduler(handler, slots=1, preempt=False) as scheduler:
+        scheduler.submit("1000000", lane=BULK)
+        scheduler.submit("1000001", lane=BULK)
+        scheduler.submit("1000002", lane=BULK)
+        promoted = scheduler.submit("1000002", lane=REALTIME, force=True)
+        gate.set()
+        promoted.result(5)
+    assert order == [("1000000", False), ("1000002", True), ("1000001", False)]
+
+
+def test_bulk_job_without_a_process_is_not_counted_as_paused():
+    gate = threading.Event()
+
+    def handler(wmo, force, control):
+        if wmo == "1000000":
+            gate.wait(5)  # avant le lancement du décodeur (verrou, cache...)
+            return run_monitored(["sleep", "0.4"], poll_interval=0.02, control=control), control.paused_seconds
+        return run_monitored(["sleep", "0.3"], poll_interval=0.02, control=control), 0.0
+
+    with LaneScheduler(handler, slots=1, bulk_slots=1) as scheduler:
+        bulk = scheduler.submit("1000000", lane=BULK)
+        time.sleep(0.1)
+        realtime = scheduler.submit("6902892", lane=REALTIME)
+        metrics = scheduler.metrics()
+        assert metrics[BULK].paused == 0 and metrics[REALTIME].queued == 1
+        # le process bulk démarre : il est suspendu aussitôt au profit du job temps réel
+        gate.set()
+        assert realtime.result(5)[0].returncode == 0
+        run, paused = bulk.result(5)
+        assert run.returncode == 0 and paused >= 0.2
+    assert scheduler.metrics()[BULK].preemptions == 1
+
+
+def test_realtime_request_resumes_the_paused_run_of_its_float():
+    locks = {wmo: threading.Lock() for wmo in ("1000000", "6902892")}
+    runs = []
+
+    def handler(wmo, force, control):
+        # verrou du flotteur, comme Decoder._run
+        if not locks[wmo].acquire(timeout=2):
+            return "lock timeout"
+        try:
+            run = run_monitored(["sleep", "0.4" if wmo == "1000000" else "0.2"], poll_interval=0.02, control=control)
+            runs.append(wmo)
+            return run.returncode
+        finally:
+            locks[wmo].release()
+
+    with LaneScheduler(handler, slots=1, bulk_slots=1) as scheduler:
+        bulk = scheduler.submit("1000000", lane=BULK)
+        time.sleep(0.15)
+        other = scheduler.submit("6902892", lane=REALTIME)
+        assert scheduler.metrics()[BULK].paused == 1
+        # le run suspendu tient le verrou du flotteur : il est relancé et passe en temps réel
+        realtime = scheduler.submit("1000000", lane=REALTIME)
+        metrics = scheduler.metrics()
+        assert metrics[BULK].paused == 0 and metrics[REALTIME].running == 2
+        assert metrics[REALTIME].queued == 1
+        assert bulk.result(5) == 0 and realtime.result(5) == 0 and other.result(5) == 0
+    assert runs.count("1000000") == 2 and runs[-1] == "1000000"
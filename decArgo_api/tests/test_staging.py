@@ -0,0 +1,124 @@
+"""Tests du mode de sortie incrémental (utilities/staging.py)."""
+
+import shutil
+from pathlib import Path
+
+import pytest
+
+from decoder_bindings.utilities import staging
+from decoder_bindings.utilities.netcdf import write_classic
+from decoder_bindings.utilities.staging import OutputStage, wipe_float_outputs
+
+
+def _profile(path: Path, cycle: int, history: str = "run 1") -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    write_classic(path, {"N_PROF": 1}, {"CYCLE_NUMBER": (["N_PROF"], [cycle], {})}, {"history": history})
+
+
+def fake_reflink(source: Path, destination: Path) -> bool:
+    # copie ordinaire : le système de fichiers des tests n'a pas forcément de reflinks
+    shutil.copy2(source, destination)
+    return True
+
+
+@pytest.fixture
+def reflinks(monkeypatch):
+    monkeypatch.setattr(staging, "reflink_file", fake_reflink)
+
+
+@pytest.mark.usefixtures("reflinks")
+def test_commit_swaps_only_new_and_changed_files(tmp_path: Path):
+    live = tmp_path / "nc" / "6902892"
+    for cycle in (1, 2, 3):
+        _profile(live / "profiles" / f"R6902892_{cycle:03d}.nc", cycle)
+    stage = OutputStage(tmp_path / "nc", "6902892")
+    directory = stage.prepare()
+    staged = directory / "6902892" / "profiles"
+    assert sorted(p.name for p in staged.iterdir()) == ["R6902892_001.nc", "R6902892_002.nc", "R6902892_003.nc"]
+
+    # le décodeur : réécrit le cycle 2 à l'identique (dates mises à part), modifie le 3, ajoute le 4, supprime le 1
+    _profile(staged / "R6902892_002.nc", 2, history="run 2")
+    _profile(staged / "R6902892_003.nc", 30, history="run 2")
+    _profile(staged / "R6902892_004.nc", 4, history="run 2")
+    (staged / "R6902892_001.nc").unlink()
+    inode_2 = (live / "profiles" / "R6902892_002.nc").stat().st_ino
+    report = stage.commit()
+
+    assert report.new == ["profiles/R6902892_004.nc"] and report.changed == ["profiles/R6902892_003.nc"]
+    assert report.unchanged == 1 and report.removed == ["profiles/R6902892_001.nc"]
+    assert sorted(p.name for p in (live / "profiles").iterdir()) == [
+        "R6902892_002.nc",
+        "R6902892_003.nc",
+        "R6902892_004.nc",
+    ]
+    assert (live / "profiles" / "R6902892_002.nc").stat().st_ino == inode_2
+    assert not list((tmp_path / "nc" / ".staging").iterdir())
+
+
+@pytest.mark.usefixtures("reflinks")
+def test_discard_leaves_live_outputs(tmp_path: Path):
+    live = tmp_path / "nc" / "6902892"
+    _profile(live / "R6902892_001.nc", 1)
+    before = (live / "R6902892_001.nc").read_bytes()
+    stage = OutputStage(tmp_path / "nc", "6902892")
+    (stage.prepare() / "6902892" / "R6902892_001.nc").write_bytes(b"partial")
+    stage.discard()
+
+    assert (live / "R6902892_001.nc").read_bytes() == before
+    assert not stage.directory.exists()
+
+
+def test_without_reflinks_the_decoder_writes_in_place(tmp_path: Path, monkeypatch):
+    monkeypatch.setattr(staging, "reflink_file", lambda source, destination: False)
+    live = tmp_path / "nc" / "6902892"
+    for cycle in (1, 2):
+        _profile(live / f"R6902892_{cycle:03d}.nc", cycle)
+    stage = OutputStage(tmp_path / "nc", "6902892")
+
+    # pas de copie : le décodeur reçoit la racine des sorties
+    assert stage.prepare() == tmp_path / "nc" and stage.in_place
+    assert not list((tmp_path / "nc" / ".staging").iterdir())
+    _profile(live / "R6902892_002.nc", 20, history="run 2")
+    _profile(live / "R6902892_003.nc", 3, history="run 2")
+    (live / "R6902892_001.nc").unlink()
+    report = stage.commit()
+
+    assert report.new == ["R6902892_003.nc"] and report.changed == ["R6902892_002.nc"]
+    assert report.removed == ["R6902892_001.nc"] and report.unchanged == 0
+    assert sorted(p.name for p in live.iterdir()) == ["R6902892_002.nc", "R6902892_003.nc"]
+
+
+def test_discard_rolls_back_the_iridium_state(tmp_path: Path):
+    iridium = tmp_path / "iridium"
+    history = iridium / "300234065895840_6902892" / "history_of_processed_data" / "processed_rsync_log_6902892.txt"
+    history.parent.mkdir(parents=True)
+    history.write_text("rsync_list/300234065895840//rsync_1.txt\n", encoding="utf-8")
+    (iridium / "300234068508780_6903014").mkdir()
+
+    # run tué : listes inscrites dans l'historique, nouveau répertoire de buffers
+    stage = OutputStage(tmp_path / "nc", "6902892", iridium)
+    stage.prepare()
+    history.write_text("rsync_list/300234065895840//rsync_1.txt\nrsync_list/300234065895840//rsync_2.txt\n")
+    (iridium / "300234099999999_6902892").mkdir()
+    stage.discard()
+    assert history.read_text().splitlines() == ["rsync_list/300234065895840//rsync_1.txt"]
+    assert sorted(p.name for p in iridium.iterdir()) == ["300234065895840_6902892", "300234068508780_6903014"]
+    assert not list((tmp_path / "nc" / ".staging").iterdir())
+
+    # run réussi : l'état qu'il a écrit est gardé
+    stage = OutputStage(tmp_path / "nc", "6902892", iridium)
+    stage.prepare()
+    history.write_text("rsync_list/300234065895840//rsync_2.txt\n")
+    stage.commit()
+    assert history.read_text() == "rsync_list/300234065895840//rsync_2.txt\n"
+    assert not list((tmp_path / "nc" / ".staging").iterdir())
+
+
+def test_wipe_float_outputs(tmp_path: Path):
+    (tmp_path / "nc" / "6902892").mkdir(parents=True)
+    (tmp_path / "iridium" / "300234065895840_6902892" / "archive").mkdir(parents=True)
+    (tmp_path / "iridium" / "300234068508780_6903014").mkdir(parents=True)
+
+    deleted = wipe_float_outputs(tmp_path / "nc", tmp_path / "iridium", "6902892")
+    assert deleted == [tmp_path / "nc" / "6902892", tmp_path / "iridium" / "300234065895840_6902892"]
+    assert (tmp_path / "iridium" / "300234068508780_6903014").is_dir()
@@ -0,0 +1,52 @@
+"""Tests de l'état incrémental par flotteur (utilities/state.py)."""
+
+import os
+from pathlib import Path
+
+from decoder_bindings.utilities.state import InputState
+
+
+def test_snapshot_detects_new_and_modified_files(tmp_path: Path):
+    inputs = tmp_path / "inputs"
+    inputs.mkdir()
+    (inputs / "a.txt").write_text("a", encoding="utf-8")
+    (inputs / "sub").mkdir()  # les sous-dossiers sont ignorés
+    state = InputState(tmp_path / "state")
+
+    snapshot = state.snapshot(inputs)
+    assert list(snapshot) == ["a.txt"]
+    assert not state.unchanged("6902892", snapshot)
+    state.save("6902892", snapshot)
+    assert state.unchanged("6902892", state.snapshot(inputs))
+
+    (inputs / "b.txt").write_text("b", encoding="utf-8")
+    os.utime(inputs / "a.txt", ns=(1, 1))
+    assert state.new_files("6902892", state.snapshot(inputs)) == ["a.txt", "b.txt"]
+
+
+def test_content_hash_is_part_of_the_fingerprint(tmp_path: Path):
+    inputs = tmp_path / "inputs"
+    inputs.mkdir()
+    (inputs / "a.txt").write_text("a", encoding="utf-8")
+    state = InputState(tmp_path / "state", use_content_hash=True)
+    snapshot = state.snapshot(inputs)
+    assert len(snapshot["a.txt"]) == 3
+    state.save("6902892", snapshot)
+    (inputs / "a.txt").write_text("z", encoding="utf-8")
+    assert not state.unchanged("6902892", state.snapshot(inputs))
+
+
+def test_snapshot_from_the_archive_catalog(tmp_path: Path):
+    inputs = tmp_path / "archive" / "300234065895840"
+    inputs.mkdir(parents=True)
+    (inputs / "a.txt").write_text("a", encoding="utf-8")
+    state = InputState(tmp_path / "state", use_catalog=True)
+
+    snapshot = state.snapshot(inputs)
+    assert snapshot == InputState(tmp_path / "other").snapshot(inputs)
+    state.save("6902892", snapshot)
+    assert state.unchanged("6902892", state.snapshot(inputs))
+    assert list((tmp_path / "state").glob("catalog_*.sqlite"))
+
+    (inputs / "b.txt").write_text("b", encoding="utf-8")
+    assert state.new_files("6902892", state.snapshot(inputs)) == ["b.txt"]
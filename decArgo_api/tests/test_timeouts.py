@@ -0,0 +1,27 @@
+"""Tests des timeouts adaptatifs (utilities/timeouts.py)."""
+
+import pytest
+
+from decoder_bindings.utilities.timeouts import TimeoutPolicy, percentile
+
+
+def test_percentile_nearest_rank():
+    assert percentile([], 0.95) is None
+    assert percentile([5.0, 1.0, 3.0], 0.5) == 3.0
+    assert percentile([float(i) for i in range(1, 101)], 0.95) == 95.0
+
+
+def test_timeout_follows_history_within_bounds():
+    policy = TimeoutPolicy(percentile=0.95, margin=2.0, minimum=60.0, min_runs=3)
+
+    # historique trop court : timeout fixe
+    assert policy.timeout_for([100.0, 110.0], 3600) == 3600
+    assert policy.timeout_for([100.0, 110.0, 120.0], 3600) == 240.0
+    assert policy.timeout_for([1.0, 2.0, 3.0], 3600) == 60.0
+    assert policy.timeout_for([2000.0, 2500.0, 3000.0], 3600) == 3600
+    assert policy.timeout_for([2000.0, 2500.0, 3000.0], None) == 6000.0
+
+
+def test_policy_rejects_a_margin_below_one():
+    with pytest.raises(ValueError):
+        TimeoutPolicy(margin=0.5)
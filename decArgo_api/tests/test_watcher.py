@@ -0,0 +1,73 @@
+"""Tests du déclenchement des décodages sur arrivée de fichiers rsync (utilities/watcher.py)."""
+
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+from decoder_bindings.utilities.watcher import DropWatcher, InotifySource, PollingSource
+
+FLOATS = {"300234065895840": "6902892", "nocbio002b": "6990001"}
+
+
+def _watcher(roots, triggered, **kwargs) -> DropWatcher:
+    def on_float(wmo):
+        triggered.append(wmo)
+        done.set()
+
+    done = threading.Event()
+    watcher = DropWatcher(roots, FLOATS.get, on_float, debounce=0.2, poll_interval=0.1, **kwargs)
+    watcher.done = done
+    return watcher
+
+
+@pytest.mark.parametrize("use_inotify", [True, False])
+def test_new_files_trigger_one_decoding_per_float(tmp_path: Path, use_inotify):
+    data, logs = tmp_path / "data", tmp_path / "rsync_list"
+    (data / "300234065895840").mkdir(parents=True)
+    logs.mkdir()
+    triggered = []
+
+    with _watcher([logs, data], triggered, use_inotify=use_inotify) as watcher:
+        for i in range(3):
+            (data / "300234065895840" / f"co_20200629T08304{i}Z_300234065895840_00000{i}_000000_1.txt").write_text("x")
+        (logs / "300234065895840").mkdir()
+        (logs / "300234065895840" / "rsync_20200629T092506Z.txt").write_text("300234065895840/co.txt\n")
+        assert watcher.done.wait(5)
+        time.sleep(0.5)
+
+    assert triggered == ["6902892"]
+    assert watcher.backend == ("inotify" if use_inotify else "polling")
+
+
+def test_unknown_float_and_temporary_files_are_ignored(tmp_path: Path):
+    data = tmp_path / "data"
+    (data / "999").mkdir(parents=True)
+    (data / "nocbio002b").mkdir()
+    triggered = []
+
+    with _watcher([data], triggered, use_inotify=False) as watcher:
+        (data / "999" / "file.bin").write_text("x")
+        (data / "nocbio002b" / ".250912_205203_nocbio002b_00137.bin.Xy12").write_text("x")
+        time.sleep(0.6)
+        (data / "nocbio002b" / "250912_205203_nocbio002b_00137.bin").write_text("x")
+        assert watcher.done.wait(5)
+
+    assert triggered == ["6990001"]
+    assert watcher.stats["unknown"] == 1
+
+
+def test_sources_report_float_directories(tmp_path: Path):
+    (tmp_path / "300234065895840").mkdir()
+    polling = PollingSource([tmp_path], interval=0)
+    (tmp_path / "300234065895840" / "a.txt").write_text("x")
+    assert polling.changes(0) == {tmp_path / "300234065895840"}
+    assert polling.changes(0) == set()
+
+    inotify = InotifySource([tmp_path])
+    try:
+        (tmp_path / "300234065895840" / "b.txt").write_text("x")
+        assert inotify.changes(1) == {tmp_path / "300234065895840"}
+    finally:
+        inotify.close()
@@ -0,0 +1,109 @@
+"""Tests de la lecture des rapports XML et de leur bilan par lot (utilities/xml_report.py)."""
+
+from pathlib import Path
+
+from decoder_bindings.utilities.xml_report import (
+    parse_duration,
+    parse_report,
+    split_report_by_float,
+    summarize_report_files,
+)
+
+
+def _report(directory: Path, name: str, floats: dict[str, str], messages: str = "", status="ok", duration="00:01:30"):
+    body = "".join(
+        f"<float_{i}><float_wmo>{wmo}</float_wmo><nb_cycles>2</nb_cycles><cycle_list>0 1 </cycle_list>"
+        f"<input_file>{wmo}/in.txt</input_file>{outputs}</float_{i}>"
+        for i, (wmo, outputs) in enumerate(floats.items(), start=1)
+    )
+    path = directory / name
+    path.write_text(
+        "<?xml version='1.0' encoding='utf-8'?><coriolis_function_report><function>co041404</function>"
+        "<decoder_version>066a</decoder_version><date>01/01/2025 00:00:00</date>"
+        f"{body}{messages}<duration>{duration}</duration><status>{status}</status></coriolis_function_report>",
+        encoding="utf-8",
+    )
+    return path
+
+
+def _nc(wmo: str, cycle: int) -> str:
+    return f"<output_mono-profile_file>/out/{wmo}/profiles/R{wmo}_{cycle:03d}.nc</output_mono-profile_file>"
+
+
+def test_parse_report_reads_run_fields_messages_and_floats(tmp_path: Path):
+    path = _report(
+        tmp_path,
+        "co041404_20250101T000000Z_6902892.xml",
+        {"6902892": _nc("6902892", 1) + "<output_meta_file></output_meta_file>"},
+        "<decoding_info>Float #6902892: 2 cycles</decoding_info>"
+        "<decoding_warning>Float #6902892 Cycle #1: 3 CTD levels dropped</decoding_warning>"
+        "<rt_qc_warning>Test 6 failed on PRES</rt_qc_warning>",
+        duration="01:02:03",
+    )
+    report = parse_report(path)
+
+    assert (report.function, report.decoder_version, report.status) == ("co041404", "066a", "ok")
+    assert report.duration == 3723
+    assert [(m.stage, m.level) for m in report.messages] == [
+        ("decoding", "info"),
+        ("decoding", "warning"),
+        ("rt_qc", "warning"),
+    ]
+    (float_report,) = report.floats
+    assert float_report.cycles == [0, 1] and float_report.input_files == ["6902892/in.txt"]
+    assert float_report.output_files == ["/out/6902892/profiles/R6902892_001.nc"]
+    # un seul flotteur : tous les messages du run le concernent
+    assert float_report.warnings == ["Float #6902892 Cycle #1: 3 CTD levels dropped", "Test 6 failed on PRES"]
+    assert float_report.duration == 3723
+
+
+def test_matlab_error_fails_only_its_float(tmp_path: Path):
+    path = _report(
+        tmp_path,
+        "co041404_20250101T000000Z_chunk.xml",
+        {"6902892": "", "6903014": ""},
+        "<decoding_error>Float #6903014: inconsistent CALIBRATION_COEF</decoding_error>"
+        "<matlab_error><float_wmo>6903014</float_wmo><error_message>Index exceeds</error_message>"
+        "<stack_line>Line: 12 File: x.m (func: x)</stack_line></matlab_error>",
+        status="ok",
+    )
+    reports = split_report_by_float(path)
+
+    assert reports["6902892"].status == "ok" and reports["6902892"].errors == []
+    assert reports["6903014"].status == "nok"
+    assert reports["6903014"].errors == ["Float #6903014: inconsistent CALIBRATION_COEF", "Index exceeds"]
+    assert reports["6903014"].duration is None
+
+
+def test_parse_duration():
+    assert parse_duration("00:00:07") == 7
+    assert parse_duration("- 00:01:00") == 60
+    assert parse_duration("") is None and parse_duration(None) is None
+
+
+def test_batch_summary_groups_messages_across_floats(tmp_path: Path):
+    for wmo, minutes in (("6902892", "01"), ("6903014", "05")):
+        _report(
+            tmp_path,
+            f"co041404_20250101T000000Z_{wmo}.xml",
+            {wmo: _nc(wmo, 1) + _nc(wmo, 2)},
+            f"<decoding_warning>Float #{wmo} Cycle #4: 3 CTD levels dropped</decoding_warning>",
+            duration=f"00:{minutes}:00",
+        )
+    _report(tmp_path, "co041404_20250101T000001Z_6904182.xml", {"6904182": ""}, status="nok", duration="00:00:10")
+    (tmp_path / "co041404_20250101T000002Z_broken.xml").write_text("<coriolis_function_report>", encoding="utf-8")
+    (tmp_path / "notes.xml").write_text("<x/>", encoding="utf-8")
+
+    summary = summarize_report_files([tmp_path], slowest=2)
+
+    assert summary.reports == 3 and len(summary.unreadable) == 1
+    assert summary.statuses == {"ok": 2, "nok": 1} and summary.failed == ["6904182"]
+    assert summary.output_files == 4
+    (warning,) = summary.warnings
+    assert warning.count == 2 and warning.wmos == ["6902892", "6903014"]
+    assert warning.signature == "Float #N Cycle #N: N CTD levels dropped"
+    assert summary.total_duration == 370 and summary.median_duration == 60
+    assert summary.slowest == [("6903014", 300.0), ("6902892", 60.0)]
+
+    summary.write(tmp_path / "summary.json")
+    assert '"failed": [\n    "6904182"\n  ]' in (tmp_path / "summary.json").read_text(encoding="utf-8")